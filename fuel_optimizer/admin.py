@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import FuelStation
+from .models import FuelStation, LaneCorridor
 
 
 @admin.register(FuelStation)
@@ -8,3 +8,9 @@ class FuelStationAdmin(admin.ModelAdmin):
     list_display = ["name", "city", "state", "retail_price"]
     list_filter = ["state"]
     search_fields = ["name", "city"]
+
+
+@admin.register(LaneCorridor)
+class LaneCorridorAdmin(admin.ModelAdmin):
+    list_display = ["name", "start_location", "end_location", "distance_miles"]
+    search_fields = ["name", "start_location", "end_location"]
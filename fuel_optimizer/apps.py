@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FuelOptimizerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "fuel_optimizer"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,123 @@
+import functools
+
+import openrouteservice
+from django.conf import settings
+from django.utils.module_loading import import_string
+from geopy.adapters import RequestsAdapter
+from geopy.extra.rate_limiter import RateLimiter
+from geopy.geocoders import ArcGIS
+from requests.adapters import HTTPAdapter
+
+from .roadgraph import RoadGraphRouter, load_road_graph
+from .standin import StandIn, StandInGeocoder, StandInRouter
+
+
+def openrouteservice_client():
+    """OpenRouteService client with one keep-alive pool for request threads"""
+    client = openrouteservice.Client(
+        key=settings.OPENROUTE_API_KEY,
+        base_url=settings.ORS_BASE_URL,
+        timeout=settings.ORS_TIMEOUT,
+    )
+    pool = HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_SIZE,
+        pool_maxsize=settings.HTTP_POOL_SIZE,
+    )
+    client._session.mount("https://", pool)
+    client._session.mount("http://", pool)
+    return client
+
+
+def arcgis_geocoder():
+    """ArcGIS geocoder with a keep-alive pool sized like the routing client"""
+    return ArcGIS(
+        scheme=settings.ARCGIS_SCHEME,
+        domain=settings.ARCGIS_DOMAIN,
+        timeout=settings.GEOCODER_TIMEOUT,
+        adapter_factory=functools.partial(
+            RequestsAdapter,
+            pool_connections=settings.HTTP_POOL_SIZE,
+            pool_maxsize=settings.HTTP_POOL_SIZE,
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_standin() -> StandIn:
+    return StandIn(
+        latency_ms=settings.STANDIN_LATENCY_MS,
+        jitter_ms=settings.STANDIN_JITTER_MS,
+        road_factor=settings.STANDIN_ROAD_FACTOR,
+        routes_file=settings.STANDIN_ROUTES_FILE,
+    )
+
+
+def standin_router() -> StandInRouter:
+    """In-process deterministic routing, no network"""
+    return StandInRouter(get_standin())
+
+
+def standin_geocoder() -> StandInGeocoder:
+    """In-process deterministic geocoding, no network"""
+    return StandInGeocoder(get_standin())
+
+
+def road_graph_router() -> RoadGraphRouter:
+    """In-process routing over the road graph in ``ROAD_GRAPH_DIR``"""
+    return RoadGraphRouter(load_road_graph(str(settings.ROAD_GRAPH_DIR)))
+
+
+def _call(fn, *args, **kwargs):
+    return fn(*args, **kwargs)
+
+
+def _limiter(rate: float) -> RateLimiter:
+    """Limiter spacing the calls it is given at most ``rate`` per second"""
+    return RateLimiter(
+        _call, min_delay_seconds=1 / rate, max_retries=0, swallow_exceptions=False
+    )
+
+
+class RateLimitedRouter:
+    """Routing client with the ``openrouteservice.Client`` call shape that
+    passes at most ``rate`` requests per second on to ``client``"""
+
+    def __init__(self, client, rate: float):
+        self.client = client
+        self.limiter = _limiter(rate)
+
+    def directions(
+        self, coordinates, profile="driving-car", format="geojson", **kwargs
+    ):
+        return self.limiter(
+            self.client.directions,
+            coordinates=coordinates,
+            profile=profile,
+            format=format,
+            **kwargs,
+        )
+
+
+class RateLimitedGeocoder:
+    """Geocoder with the geopy call shape that passes at most ``rate``
+    forward and reverse lookups per second, together, on to ``geocoder``"""
+
+    def __init__(self, geocoder, rate: float):
+        self.geocoder = geocoder
+        self.limiter = _limiter(rate)
+
+    def geocode(self, query: str, **kwargs):
+        return self.limiter(self.geocoder.geocode, query, **kwargs)
+
+    def reverse(self, query, **kwargs):
+        return self.limiter(self.geocoder.reverse, query, **kwargs)
+
+
+def get_routing_client():
+    """Routing client built by the ``ROUTING_BACKEND`` factory"""
+    return import_string(settings.ROUTING_BACKEND)()
+
+
+def get_geocoder():
+    """Geocoder built by the ``GEOCODING_BACKEND`` factory"""
+    return import_string(settings.GEOCODING_BACKEND)()
@@ -0,0 +1,227 @@
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Sequence
+from unittest.mock import patch
+
+import numpy as np
+from django.conf import settings
+from django.core.cache.backends.dummy import DummyCache
+
+from .geometry import MILES_PER_DEGREE_LAT
+from .polyline import simplify
+from .prices import read_chunks
+from .services import RouteOptimizationService
+from .spatial import StationIndex, first_per_point
+
+# Contiguous US bounding box used for synthetic coordinates
+CONUS_LAT = (25.0, 49.0)
+CONUS_LNG = (-124.0, -67.0)
+
+ROUTE_STEP_MILES = 0.25  # Spacing of raw synthetic route points, like ORS output
+STATION_SPREAD_DEGREES = 0.1  # Std. deviation of town offsets from the roads
+
+
+def synthetic_stations(
+    csv_file: str, count: int, routes: Sequence[Dict], seed: int
+) -> StationIndex:
+    """Station index from the price file with synthetic coordinates.
+
+    Each unique city/state gets a random point near one of ``routes``, the
+    way truck stops line the interstates, and stations in one town share that
+    point as real city-centroid geocodes do. Rows are replicated with
+    jittered points and new ids to reach ``count``.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for frame in read_chunks(csv_file, settings.CSV_CHUNK_SIZE):
+        rows.extend(
+            frame[
+                ["opis_truckstop_id", "truckstop_name", "city", "state", "retail_price"]
+            ].itertuples(index=False, name=None)
+        )
+    rows = list({row[0]: row for row in reversed(rows)}.values())[::-1]
+
+    places = sorted({(row[2], row[3]) for row in rows})
+    roads = np.concatenate([np.asarray(route["coordinates"]) for route in routes])
+    anchors = roads[rng.integers(0, len(roads), len(places))]
+    offsets = rng.normal(0, STATION_SPREAD_DEGREES, (len(places), 2))
+    points = dict(
+        zip(places, zip(anchors[:, 1] + offsets[:, 0], anchors[:, 0] + offsets[:, 1]))
+    )
+
+    stations = []
+    for i in range(count):
+        opis_id, name, city, state, price = rows[i % len(rows)]
+        lat, lng = points[(city, state)]
+        if i >= len(rows):
+            opis_id += (i // len(rows)) * 10_000_000
+            lat += rng.normal(0, STATION_SPREAD_DEGREES)
+            lng += rng.normal(0, STATION_SPREAD_DEGREES)
+        stations.append((opis_id, name, city, state, float(price), lat, lng))
+
+    # Same ordering and co-located collapse as StationIndex.from_database
+    stations.sort(key=lambda row: (row[4], row[0]))
+    columns = list(zip(*first_per_point(stations)))
+    return StationIndex(*columns, version=count)
+
+
+def synthetic_route(length_miles: float, seed: int) -> Dict:
+    """Winding route of about ``length_miles`` inside the contiguous US,
+    simplified the same way as routes from OpenRouteService"""
+    rng = np.random.default_rng(seed)
+    while True:
+        start = np.array([rng.uniform(*CONUS_LAT), rng.uniform(*CONUS_LNG)])
+        bearing = rng.uniform(0, 2 * np.pi)
+        kx = MILES_PER_DEGREE_LAT * np.cos(np.radians(start[0]))
+        delta = np.array(
+            [
+                length_miles * np.cos(bearing) / MILES_PER_DEGREE_LAT,
+                length_miles * np.sin(bearing) / kx,
+            ]
+        )
+        # Straight-line span is shorter than the winding road
+        end = start + delta * 0.9
+        if CONUS_LAT[0] <= end[0] <= CONUS_LAT[1] and (
+            CONUS_LNG[0] <= end[1] <= CONUS_LNG[1]
+        ):
+            break
+
+    n = max(2, int(length_miles / ROUTE_STEP_MILES))
+    t = np.linspace(0.0, 1.0, n)
+    wiggle = np.sin(t * np.pi * rng.uniform(5, 15)) * 0.3 + rng.normal(0, 0.002, n)
+    normal = np.array([-delta[1], delta[0]]) / np.hypot(*delta)
+    lat = start[0] + t * (end[0] - start[0]) + wiggle * normal[0]
+    lng = start[1] + t * (end[1] - start[1]) + wiggle * normal[1]
+
+    coordinates = simplify(
+        np.column_stack((lng, lat)).tolist(), settings.ROUTE_SIMPLIFY_TOLERANCE_MILES
+    )
+    return {
+        "geometry": {"type": "LineString", "coordinates": coordinates},
+        "distance_miles": float(length_miles),
+        "coordinates": coordinates,
+    }
+
+
+def measure(fn: Callable[[int], object], iterations: int) -> Dict[str, float]:
+    """Latency percentiles in milliseconds and throughput of ``fn(i)``"""
+    fn(-1)  # Warm up caches, lazy grids and imports
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - started)
+
+    ms = np.asarray(samples) * 1000
+    return {
+        "iterations": iterations,
+        "mean_ms": round(float(ms.mean()), 3),
+        "min_ms": round(float(ms.min()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "ops_per_second": round(float(iterations / ms.sum() * 1000), 2),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(
+    csv_file: str,
+    station_counts: Sequence[int],
+    route_lengths: Sequence[float],
+    iterations: int,
+    seed: int,
+) -> Dict:
+    """Benchmark the optimizer hot paths with stubbed network calls"""
+    # Never caches, so every iteration queries the corridor and plans afresh
+    service = RouteOptimizationService()
+    service.cache = DummyCache("benchmark", {})
+    results: List[Dict] = []
+
+    routes = [
+        synthetic_route(length, seed + i) for i, length in enumerate(route_lengths)
+    ]
+    for count in station_counts:
+        index = synthetic_stations(csv_file, count, routes, seed)
+        for length, route in zip(route_lengths, routes):
+            case = {
+                "stations": count,
+                "indexed_stations": len(index),
+                "route_miles": length,
+                "route_points": len(route["coordinates"]),
+            }
+
+            with (
+                patch("fuel_optimizer.services.get_station_index", return_value=index),
+                patch.object(service, "geocode", return_value=(0.0, 0.0)),
+                patch.object(service, "get_route", return_value=route),
+                patch.object(service, "match_lane", return_value=None),
+            ):
+                fuel_stops = service.find_fuel_stops(route)
+                cases = {
+                    "find_fuel_stops": lambda i: service.find_fuel_stops(route),
+                    "calculate_costs": lambda i: service.calculate_costs(
+                        route, fuel_stops
+                    ),
+                    "optimize_route": lambda i: service.optimize_route(
+                        "Benchmark Start", "Benchmark End"
+                    ),
+                }
+                for name, fn in cases.items():
+                    results.append(
+                        {"benchmark": name, **case, **measure(fn, iterations)}
+                    )
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "seed": seed,
+            "vehicle_range_miles": settings.VEHICLE_RANGE_MILES,
+            "vehicle_mpg": settings.VEHICLE_MPG,
+            "corridor_radius_miles": settings.CORRIDOR_RADIUS_MILES,
+            "detour_prune_window_miles": settings.DETOUR_PRUNE_WINDOW_MILES,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict) -> List[Dict]:
+    """Median latency change of each benchmark case against a baseline run"""
+
+    def key(result):
+        return (result["benchmark"], result["stations"], result["route_miles"])
+
+    before = {key(result): result for result in baseline["results"]}
+    changes = []
+    for result in current["results"]:
+        previous = before.get(key(result))
+        if previous and previous["p50_ms"] > 0:
+            changes.append(
+                {
+                    "benchmark": result["benchmark"],
+                    "stations": result["stations"],
+                    "route_miles": result["route_miles"],
+                    "baseline_p50_ms": previous["p50_ms"],
+                    "p50_ms": result["p50_ms"],
+                    "change": round(result["p50_ms"] / previous["p50_ms"] - 1, 3),
+                }
+            )
+    return changes
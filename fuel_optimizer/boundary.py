@@ -0,0 +1,95 @@
+import functools
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+from .geometry import point_segment_distance
+
+BOUNDARY_FILE = Path(__file__).resolve().parent / "data" / "us_boundary.json"
+
+
+class _Ring:
+    """Closed polygon ring with a precomputed bounding box"""
+
+    def __init__(self, coordinates: List[List[float]]):
+        points = np.asarray(coordinates, dtype=np.float64)
+        self.lng, self.lat = points[:, 0], points[:, 1]
+        self.next_lng = np.roll(self.lng, -1)
+        self.next_lat = np.roll(self.lat, -1)
+        self.min_lng, self.max_lng = self.lng.min(), self.lng.max()
+        self.min_lat, self.max_lat = self.lat.min(), self.lat.max()
+
+    def in_bbox(self, lat: float, lng: float, pad: float = 0.0) -> bool:
+        return (
+            self.min_lat - pad <= lat <= self.max_lat + pad
+            and self.min_lng - pad <= lng <= self.max_lng + pad
+        )
+
+    def contains(self, lat: float, lng: float) -> bool:
+        """Even-odd ray casting"""
+        if not self.in_bbox(lat, lng):
+            return False
+        crosses = (self.lat > lat) != (self.next_lat > lat)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            x = self.lng + (lat - self.lat) * (self.next_lng - self.lng) / (
+                self.next_lat - self.lat
+            )
+        return bool(np.count_nonzero(crosses & (lng < x)) % 2)
+
+    def distance(self, lat: float, lng: float) -> float:
+        """Distance in miles to the nearest ring edge"""
+        distance, _ = point_segment_distance(
+            lat, lng, self.lat, self.lng, self.next_lat, self.next_lng
+        )
+        return float(distance.min())
+
+
+class USBoundary:
+    """Offline USA membership test against a bundled simplified outline.
+
+    Coastlines in the outline are drawn slightly offshore and the land and
+    lake borders with neighbouring countries are kept separately. Points deep
+    inside the outline or far outside it are decided locally; points within
+    ``margin_miles`` of a border are left undecided so the caller can fall
+    back to an authoritative lookup.
+    """
+
+    def __init__(self, data: Dict, margin_miles: float):
+        self.polygons = [_Ring(ring) for ring in data["polygons"].values()]
+        self.borders = [
+            np.asarray(line, dtype=np.float64) for line in data["borders"].values()
+        ]
+        self.margin_miles = margin_miles
+        # Bounding-box padding in degrees; generous enough for Alaska longitudes
+        self._pad = margin_miles / 20.0
+
+    def _border_distance(self, lat: float, lng: float) -> float:
+        nearest = np.inf
+        for line in self.borders:
+            lng0, lat0 = line[:-1, 0], line[:-1, 1]
+            lng1, lat1 = line[1:, 0], line[1:, 1]
+            distance, _ = point_segment_distance(lat, lng, lat0, lng0, lat1, lng1)
+            nearest = min(nearest, float(distance.min()))
+        return nearest
+
+    def contains(self, lat: float, lng: float) -> Optional[bool]:
+        """True inside the USA, False outside, None when too close to call"""
+        inside = any(ring.contains(lat, lng) for ring in self.polygons)
+        if inside:
+            if self._border_distance(lat, lng) > self.margin_miles:
+                return True
+            return None
+
+        near = [ring for ring in self.polygons if ring.in_bbox(lat, lng, self._pad)]
+        if all(ring.distance(lat, lng) > self.margin_miles for ring in near):
+            return False
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def get_us_boundary() -> USBoundary:
+    with open(BOUNDARY_FILE) as f:
+        return USBoundary(json.load(f), settings.US_BORDER_MARGIN_MILES)
@@ -0,0 +1,209 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded in-process LRU cache with per-entry TTL.
+
+    Values are stored pickled, like Django's LocMemCache, so callers never
+    share mutable objects and the byte budget reflects real memory use.
+    Entries are evicted least-recently-used first when either the entry
+    count or the byte budget is exceeded.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, default_timeout: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_timeout = default_timeout
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            payload, expires = entry
+            if expires <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+        return pickle.loads(payload)
+
+    def set(self, key: str, value: Any, timeout: Optional[float] = None):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return
+
+        timeout = self.default_timeout if timeout is None else timeout
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (payload, time.monotonic() + timeout)
+            self._bytes += len(payload)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        payload, _ = self._data.pop(key)
+        self._bytes -= len(payload)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+            }
+
+
+class TieredCache:
+    """In-process LRU in front of a shared Django cache backend.
+
+    Reads try the local tier first and fall back to the shared tier, copying
+    hits into the local tier. Writes go to both. The local copy lives at most
+    ``local_timeout`` seconds so other workers' updates become visible.
+    """
+
+    def __init__(self, local: LRUCache, shared, local_timeout: float):
+        self.local = local
+        self.shared = shared
+        self.local_timeout = local_timeout
+        self._lock = threading.Lock()
+        self.shared_hits = self.shared_misses = self.shared_sets = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        value = self.shared.get(key, _MISSING)
+        with self._lock:
+            if value is _MISSING:
+                self.shared_misses += 1
+                return default
+            self.shared_hits += 1
+
+        self.local.set(key, value, self.local_timeout)
+        return value
+
+    def set(self, key: str, value: Any, timeout: Optional[float] = None):
+        self.shared.set(key, value, timeout)
+        local_timeout = self.local_timeout
+        if timeout is not None:
+            local_timeout = min(local_timeout, timeout)
+        self.local.set(key, value, local_timeout)
+        with self._lock:
+            self.shared_sets += 1
+
+    def delete(self, key: str):
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            shared = {
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+                "sets": self.shared_sets,
+            }
+        return {"local": self.local.stats(), "shared": shared}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one computation.
+
+    The first caller for a key runs ``fn``; callers arriving while it runs
+    wait and receive the same result or exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+_tiered_cache: Optional[TieredCache] = None
+_tiered_cache_lock = threading.Lock()
+
+
+def get_cache() -> TieredCache:
+    """Return the process-wide tiered cache used for geocodes and routes"""
+    global _tiered_cache
+
+    if _tiered_cache is None:
+        with _tiered_cache_lock:
+            if _tiered_cache is None:
+                _tiered_cache = TieredCache(
+                    LRUCache(
+                        settings.LOCAL_CACHE_MAX_ENTRIES,
+                        settings.LOCAL_CACHE_MAX_BYTES,
+                        settings.LOCAL_CACHE_TIMEOUT,
+                    ),
+                    caches[settings.SHARED_CACHE_ALIAS],
+                    settings.LOCAL_CACHE_TIMEOUT,
+                )
+    return _tiered_cache
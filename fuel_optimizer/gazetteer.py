@@ -0,0 +1,158 @@
+import csv
+import difflib
+import logging
+import re
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+
+from .boundary import get_us_boundary
+from .geocoding import normalize_location
+from .spatial import StationIndex, get_station_index
+
+logger = logging.getLogger("fuel_optimizer")
+
+# "City, ST" with an optional country suffix, after normalize_location
+PLACE = re.compile(
+    r"^(?P<city>[^,]+), (?P<state>[a-z]{2})(?:, (?:usa|us|united states))?$"
+)
+
+# Spelled-out prefixes that users and price files abbreviate inconsistently
+ABBREVIATIONS = {"saint": "st", "sainte": "ste", "fort": "ft", "mount": "mt"}
+
+
+def city_key(city: str) -> str:
+    """Comparable form of a city name: lowercase, no punctuation, common
+    prefixes abbreviated"""
+    words = re.sub(r"[^a-z0-9 ]", " ", city.lower()).split()
+    return " ".join(ABBREVIATIONS.get(word, word) for word in words)
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Insertions, deletions, substitutions and adjacent transpositions
+    turning ``a`` into ``b``"""
+    previous, current = [], list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j, y in enumerate(b, 1):
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)
+            )
+            if i > 1 and j > 1 and x == b[j - 2] and a[i - 2] == y:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[-1]
+
+
+def parse_place(location: str) -> Optional[Tuple[str, str]]:
+    """(city key, state code) of a "City, ST" location, or None"""
+    match = PLACE.match(normalize_location(location))
+    if not match:
+        return None
+    return city_key(match["city"]), match["state"].upper()
+
+
+class Gazetteer:
+    """In-process (city, state) -> coordinates lookup of US places.
+
+    Built from the cities of the station index, which were geocoded when the
+    stations were loaded, plus an optional places file. A misspelled city
+    resolves only to the one city of its state that ``difflib`` finds close
+    and that is a single typo away; towns the gazetteer does not know are
+    often spelled much like one it does, so anything less certain is left
+    to the geocoder.
+    """
+
+    def __init__(
+        self,
+        places: Dict[str, Dict[str, Tuple[float, float]]],
+        version: int = 0,
+    ):
+        self.places = places  # State code -> city key -> (lat, lng)
+        self.version = version
+
+    @classmethod
+    def from_index(
+        cls, index: StationIndex, places_file: Optional[str] = None
+    ) -> "Gazetteer":
+        places: Dict[str, Dict[str, Tuple[float, float]]] = {}
+
+        def add(entries: Iterable[Tuple[str, str, float, float]], replace: bool):
+            for city, state, lat, lng in entries:
+                cities = places.setdefault(state.strip().upper(), {})
+                key = city_key(city)
+                if replace or key not in cities:
+                    cities[key] = (float(lat), float(lng))
+
+        # Stations are ordered by price; any one of a city's points will do
+        add(
+            zip(index.cities, index.states, index.latitudes, index.longitudes),
+            replace=False,
+        )
+        if places_file:
+            with open(places_file, newline="") as f:
+                add(
+                    (
+                        (row["city"], row["state"], row["latitude"], row["longitude"])
+                        for row in csv.DictReader(f)
+                    ),
+                    replace=True,
+                )
+        return cls(places, index.version)
+
+    def __len__(self) -> int:
+        return sum(len(cities) for cities in self.places.values())
+
+    def lookup(self, location: str) -> Optional[Tuple[float, float]]:
+        """Coordinates of a "City, ST" location, exact or fuzzy, or None"""
+        place = parse_place(location)
+        if place is None:
+            return None
+        city, state = place
+        cities = self.places.get(state)
+        if not cities:
+            return None
+
+        coords = cities.get(city)
+        if coords is None and len(city) >= settings.GAZETTEER_FUZZY_MIN_LENGTH:
+            matches = difflib.get_close_matches(
+                city, cities, n=2, cutoff=settings.GAZETTEER_FUZZY_CUTOFF
+            )
+            if (
+                len(matches) == 1
+                and edit_distance(city, matches[0])
+                <= settings.GAZETTEER_FUZZY_MAX_EDITS
+            ):
+                coords = cities[matches[0]]
+
+        # Guard against a mis-geocoded station putting a place abroad
+        if coords is None or get_us_boundary().contains(*coords) is False:
+            return None
+        return coords
+
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Return the shared gazetteer, rebuilt alongside the station index"""
+    global _gazetteer
+
+    index = get_station_index()
+    gazetteer = _gazetteer
+    if gazetteer is not None and gazetteer.version == index.version:
+        return gazetteer
+
+    with _gazetteer_lock:
+        if _gazetteer is None or _gazetteer.version != index.version:
+            started = time.perf_counter()
+            _gazetteer = Gazetteer.from_index(
+                index, settings.GAZETTEER_PLACES_FILE or None
+            )
+            logger.info(
+                f"Gazetteer built: {len(_gazetteer)} places, "
+                f"version {index.version}, {time.perf_counter() - started:.3f}s"
+            )
+        return _gazetteer
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from geopy.exc import GeopyError
+
+logger = logging.getLogger("fuel_optimizer")
+
+Place = Tuple[str, str]
+Coordinates = Optional[Tuple[float, float]]
+
+
+def normalize_location(location: str) -> str:
+    """Canonical form of a user-supplied location for cache keys"""
+    return " ".join(re.sub(r"\s*,\s*", ", ", location.lower()).split()).strip(" ,.")
+
+
+def place_key(city: str, state: str) -> str:
+    return f"{city.strip().upper()}|{state.strip().upper()}"
+
+
+class GeocodeCache:
+    """Persistent (city, state) -> coordinates map backed by a JSON file.
+
+    Places that the geocoder could not find are stored as ``None`` so they
+    are not retried. The file is rewritten atomically on ``save`` and doubles
+    as the checkpoint for interrupted bulk loads.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._data: Dict[str, Optional[list]] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                self._data = json.load(f)
+
+    def __contains__(self, place: Place) -> bool:
+        return place_key(*place) in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, place: Place) -> Coordinates:
+        value = self._data.get(place_key(*place))
+        return tuple(value) if value else None
+
+    def set(self, place: Place, coordinates: Coordinates):
+        with self._lock:
+            self._data[place_key(*place)] = list(coordinates) if coordinates else None
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with self._lock:
+            with open(tmp, "w") as f:
+                json.dump(self._data, f)
+        os.replace(tmp, self.path)
+
+
+def geocode_places(
+    places: Iterable[Place],
+    geocode: Callable,
+    cache: GeocodeCache,
+    workers: int,
+    checkpoint_every: int = 100,
+    progress: Optional[Callable[[], None]] = None,
+) -> Dict[Place, Coordinates]:
+    """Geocode unique (city, state) places concurrently through ``cache``.
+
+    ``geocode`` is called from ``workers`` threads and is expected to do its
+    own rate limiting. Geocoder errors leave the place out of the cache so a
+    later run retries it; the cache is saved every ``checkpoint_every``
+    lookups and once at the end.
+    """
+    places = list(dict.fromkeys(places))
+    results = {place: cache.get(place) for place in places if place in cache}
+    pending = [place for place in places if place not in cache]
+
+    def lookup(place: Place) -> Coordinates:
+        location = geocode(f"{place[0]}, {place[1]}, USA")
+        return (location.latitude, location.longitude) if location else None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(lookup, place): place for place in pending}
+            for done, future in enumerate(as_completed(futures), start=1):
+                place = futures[future]
+                try:
+                    results[place] = future.result()
+                    cache.set(place, results[place])
+                except GeopyError as e:
+                    logger.warning(f"Geocoding failed for {place}: {e}")
+
+                if progress:
+                    progress()
+                if done % checkpoint_every == 0:
+                    cache.save()
+    finally:
+        cache.save()
+
+    return results
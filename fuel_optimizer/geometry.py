@@ -0,0 +1,225 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+
+def haversine_miles(
+    lat1: np.ndarray, lng1: np.ndarray, lat2: np.ndarray, lng2: np.ndarray
+) -> np.ndarray:
+    """Great-circle distance in miles"""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def point_segment_distance(
+    lat: np.ndarray,
+    lng: np.ndarray,
+    a_lat: np.ndarray,
+    a_lng: np.ndarray,
+    b_lat: np.ndarray,
+    b_lng: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Distance in miles from points to segments (local equirectangular) and
+    the fraction along each segment of the closest point"""
+    kx = MILES_PER_DEGREE_LAT * np.cos(np.radians(lat))
+    ax, ay = (a_lng - lng) * kx, (a_lat - lat) * MILES_PER_DEGREE_LAT
+    dx, dy = (b_lng - a_lng) * kx, (b_lat - a_lat) * MILES_PER_DEGREE_LAT
+    length2 = dx * dx + dy * dy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(length2 > 0, -(ax * dx + ay * dy) / length2, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.hypot(ax + t * dx, ay + t * dy), t
+
+
+def densify(
+    latitudes: np.ndarray, longitudes: np.ndarray, max_step: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Insert points so no segment spans more than ``max_step`` degrees"""
+    if len(latitudes) < 2:
+        return latitudes, longitudes
+
+    span = np.maximum(np.abs(np.diff(latitudes)), np.abs(np.diff(longitudes)))
+    steps = np.maximum(1, np.ceil(span / max_step).astype(np.int64))
+    if steps.max() == 1:
+        return latitudes, longitudes
+
+    segment = np.repeat(np.arange(len(steps)), steps)
+    fraction = (
+        np.arange(steps.sum()) - np.repeat(np.cumsum(steps) - steps, steps)
+    ) / np.repeat(steps, steps)
+    lat = latitudes[segment] + fraction * np.diff(latitudes)[segment]
+    lng = longitudes[segment] + fraction * np.diff(longitudes)[segment]
+    return np.append(lat, latitudes[-1]), np.append(lng, longitudes[-1])
+
+
+def cell_key(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Pack (row, col) grid cells into a single sortable int64 key"""
+    return (rows.astype(np.int64) << 20) + (cols.astype(np.int64) + (1 << 19))
+
+
+class GridBuckets:
+    """Points bucketed into a uniform lat/lng grid for neighbourhood lookups"""
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, cell: float):
+        self.cell = cell
+        keys = cell_key(*self.cells(latitudes, longitudes))
+        self.order = np.argsort(keys, kind="stable")
+        self.keys, self.starts, self.counts = np.unique(
+            keys[self.order], return_index=True, return_counts=True
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        cell: float,
+        order: np.ndarray,
+        keys: np.ndarray,
+        starts: np.ndarray,
+        counts: np.ndarray,
+    ) -> "GridBuckets":
+        """Grid from the arrays of one built earlier, without re-sorting"""
+        grid = cls.__new__(cls)
+        grid.cell = cell
+        grid.order, grid.keys, grid.starts, grid.counts = order, keys, starts, counts
+        return grid
+
+    def cells(
+        self, latitudes: np.ndarray, longitudes: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        rows = np.floor(np.asarray(latitudes) / self.cell).astype(np.int64)
+        cols = np.floor(np.asarray(longitudes) / self.cell).astype(np.int64)
+        return rows, cols
+
+    def pairs(
+        self,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        ring_rows: int,
+        ring_cols: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (query index, bucketed point index) pairs for nearby cells"""
+        if not len(self.keys) or not len(latitudes):
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+
+        rows, cols = self.cells(latitudes, longitudes)
+        queries, targets = [], []
+        for dr in range(-ring_rows, ring_rows + 1):
+            for dc in range(-ring_cols, ring_cols + 1):
+                keys = cell_key(rows + dr, cols + dc)
+                loc = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+                hit = np.nonzero(self.keys[loc] == keys)[0]
+                if not len(hit):
+                    continue
+
+                counts = self.counts[loc[hit]]
+                offsets = np.arange(counts.sum()) - np.repeat(
+                    np.cumsum(counts) - counts, counts
+                )
+                queries.append(np.repeat(hit, counts))
+                targets.append(
+                    self.order[np.repeat(self.starts[loc[hit]], counts) + offsets]
+                )
+
+        if not queries:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(queries), np.concatenate(targets)
+
+
+class RouteGeometry:
+    """Route polyline as NumPy arrays with cumulative route mileage.
+
+    Built once per request from the ORS (lng, lat) coordinate list and shared
+    by the corridor query and stop planning. Mile markers are scaled to the
+    routed road distance so they line up with the trip length.
+    """
+
+    def __init__(
+        self,
+        coordinates: List[List[float]],
+        distance_miles: Optional[float] = None,
+        max_step: Optional[float] = None,
+    ):
+        route = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        self.max_step = max_step or settings.STATION_INDEX_CELL_DEGREES
+        lat, lng = densify(route[:, 1], route[:, 0], self.max_step)
+        if len(lat) == 1:
+            lat, lng = np.repeat(lat, 2), np.repeat(lng, 2)
+        self.latitudes, self.longitudes = lat, lng
+
+        self.segment_miles = haversine_miles(lat[:-1], lng[:-1], lat[1:], lng[1:])
+        polyline_miles = float(self.segment_miles.sum())
+        self.scale = (
+            distance_miles / polyline_miles
+            if distance_miles and polyline_miles > 0
+            else 1.0
+        )
+        self.mileage = np.concatenate(([0.0], np.cumsum(self.segment_miles)))
+        self.mileage *= self.scale
+        self._grids: Dict[float, GridBuckets] = {}
+
+    @classmethod
+    def from_route(cls, route_data: Dict) -> "RouteGeometry":
+        return cls(route_data["coordinates"], route_data.get("distance_miles"))
+
+    def __len__(self) -> int:
+        """Number of polyline segments"""
+        return len(self.segment_miles)
+
+    @property
+    def length_miles(self) -> float:
+        return float(self.mileage[-1]) if len(self.mileage) else 0.0
+
+    @property
+    def max_segment_miles(self) -> float:
+        return float(self.segment_miles.max()) if len(self) else 0.0
+
+    def segment_grid(self, cell: float) -> GridBuckets:
+        """Segments bucketed by their start point, cached per cell size"""
+        if cell not in self._grids:
+            self._grids[cell] = GridBuckets(
+                self.latitudes[:-1], self.longitudes[:-1], cell
+            )
+        return self._grids[cell]
+
+    def project(
+        self,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        point_idx: np.ndarray,
+        segment_idx: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Closest segment for each point over candidate (point, segment) pairs.
+
+        Returns the points that had at least one pair, their perpendicular
+        distance to the route and their along-route mile marker.
+        """
+        lat, lng = latitudes[point_idx], longitudes[point_idx]
+        distance, fraction = point_segment_distance(
+            lat,
+            lng,
+            self.latitudes[segment_idx],
+            self.longitudes[segment_idx],
+            self.latitudes[segment_idx + 1],
+            self.longitudes[segment_idx + 1],
+        )
+        nearest = np.full(len(latitudes), np.inf)
+        np.minimum.at(nearest, point_idx, distance)
+        closest = np.nonzero(distance == nearest[point_idx])[0]
+        points, first = np.unique(point_idx[closest], return_index=True)
+        closest = closest[first]
+
+        segment = segment_idx[closest]
+        miles = self.mileage[segment] + fraction[closest] * (
+            self.mileage[segment + 1] - self.mileage[segment]
+        )
+        return points, distance[closest], miles
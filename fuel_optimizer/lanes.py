@@ -0,0 +1,225 @@
+import logging
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .geocoding import normalize_location
+from .geometry import RouteGeometry
+from .models import CorridorStation, LaneCorridor
+from .polyline import pack_route, unpack_route
+from .spatial import StationIndex, get_station_index
+
+logger = logging.getLogger("fuel_optimizer")
+
+LANE_TABLE_VERSION_KEY = "lane_table_version"
+
+
+def lane_key(start_location: str, end_location: str) -> str:
+    return f"{normalize_location(start_location)}|{normalize_location(end_location)}"
+
+
+class Lane(NamedTuple):
+    """Precomputed lane resolved against the current station index"""
+
+    name: str
+    route: Dict
+    positions: np.ndarray  # Station index positions, ordered by mile marker
+    mile_markers: np.ndarray
+    detour_miles: np.ndarray
+    version: int  # Station data version the positions refer to
+
+
+def corridor_stations(
+    index: StationIndex, route_data: Dict
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Positions, mile markers and detours of corridor stations in route order"""
+    positions, distances, miles = index.near_route(
+        RouteGeometry.from_route(route_data), settings.CORRIDOR_RADIUS_MILES
+    )
+    order = np.argsort(miles, kind="stable")
+    return positions[order], miles[order], distances[order]
+
+
+@transaction.atomic
+def save_lane(
+    name: str,
+    start_location: str,
+    end_location: str,
+    route_data: Dict,
+    index: StationIndex,
+) -> LaneCorridor:
+    """Store a lane's route and its corridor station table"""
+    packed = pack_route(route_data, settings.POLYLINE_PRECISION)
+    lane, _ = LaneCorridor.objects.update_or_create(
+        name=name,
+        defaults={
+            "start_location": start_location,
+            "end_location": end_location,
+            "polyline": packed["polyline"],
+            "polyline_precision": packed["precision"],
+            "distance_miles": packed["distance_miles"],
+            "corridor_radius_miles": settings.CORRIDOR_RADIUS_MILES,
+        },
+    )
+
+    positions, miles, detours = corridor_stations(index, route_data)
+    lane.stations.all().delete()
+    CorridorStation.objects.bulk_create(
+        [
+            CorridorStation(
+                lane=lane,
+                opis_id=int(index.opis_ids[position]),
+                mile_marker=float(mile),
+                detour_miles=float(detour),
+                latitude=float(index.latitudes[position]),
+                longitude=float(index.longitudes[position]),
+            )
+            for position, mile, detour in zip(positions, miles, detours)
+        ],
+        batch_size=settings.STATION_BULK_BATCH_SIZE,
+    )
+    return lane
+
+
+class LaneTable:
+    """In-process lookup of precomputed lanes by normalized start and end.
+
+    Corridor stations are stored by point and resolved to positions in the
+    station index the table is built for, so prices are always current even
+    when a repriced station now represents the point. A lane with a point
+    the index no longer has is marked stale and served with a fresh corridor
+    query. Lanes built with a different corridor radius are ignored.
+    """
+
+    STALE = -1  # Lane version that never matches a station index
+
+    def __init__(self, lanes: Dict[str, Lane], version: int = 0, lane_version: int = 0):
+        self.lanes = lanes
+        self.version = version
+        self.lane_version = lane_version
+
+    @classmethod
+    def from_database(cls, index: StationIndex, lane_version: int = 0) -> "LaneTable":
+        position_of = {
+            point: p
+            for p, point in enumerate(
+                zip(index.latitudes.tolist(), index.longitudes.tolist())
+            )
+        }
+        corridors = list(
+            LaneCorridor.objects.filter(
+                corridor_radius_miles=settings.CORRIDOR_RADIUS_MILES
+            )
+        )
+        stations: Dict[int, list] = {corridor.pk: [] for corridor in corridors}
+        stale = set()
+        for lane_id, lat, lng, mile, detour in CorridorStation.objects.filter(
+            lane_id__in=list(stations)
+        ).values_list(
+            "lane_id", "latitude", "longitude", "mile_marker", "detour_miles"
+        ):
+            position = position_of.get((lat, lng))
+            if position is None:
+                stale.add(lane_id)
+            else:
+                stations[lane_id].append((position, mile, detour))
+
+        lanes = {}
+        for corridor in corridors:
+            if corridor.pk in stale:
+                logger.warning(
+                    f"Lane {corridor.name} has stations missing from the index, "
+                    "using a fresh corridor query"
+                )
+            rows = stations[corridor.pk]
+            columns = list(zip(*rows)) if rows else [[]] * 3
+            lanes[lane_key(corridor.start_location, corridor.end_location)] = Lane(
+                name=corridor.name,
+                route=unpack_route(corridor.packed_route),
+                positions=np.asarray(columns[0], dtype=np.int64),
+                mile_markers=np.asarray(columns[1], dtype=np.float64),
+                detour_miles=np.asarray(columns[2], dtype=np.float64),
+                version=cls.STALE if corridor.pk in stale else index.version,
+            )
+        return cls(lanes, index.version, lane_version)
+
+    def __len__(self) -> int:
+        return len(self.lanes)
+
+    def match(self, start_location: str, end_location: str) -> Optional[Lane]:
+        return self.lanes.get(lane_key(start_location, end_location))
+
+
+_lane_version: Optional[int] = None
+_lane_version_checked = 0.0
+_lane_table: Optional[LaneTable] = None
+_lane_table_lock = threading.Lock()
+
+
+def lane_version() -> int:
+    """Current stored lane version, re-read at most every
+    STATION_INDEX_CHECK_SECONDS"""
+    global _lane_version, _lane_version_checked
+
+    now = time.monotonic()
+    if (
+        _lane_version is None
+        or now - _lane_version_checked >= settings.STATION_INDEX_CHECK_SECONDS
+    ):
+        version = cache.get(LANE_TABLE_VERSION_KEY)
+        if version is None:
+            # Later than any used before, so a lost entry still differs
+            cache.add(LANE_TABLE_VERSION_KEY, int(time.time() * 1000), None)
+            version = cache.get(LANE_TABLE_VERSION_KEY, 0)
+        _lane_version = version
+        _lane_version_checked = now
+    return _lane_version
+
+
+def invalidate_lane_table() -> int:
+    """Signal every process that stored lanes changed; returns the new lane
+    version. Station data, its snapshot and cached results are untouched."""
+    global _lane_version
+
+    try:
+        version = cache.incr(LANE_TABLE_VERSION_KEY)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(LANE_TABLE_VERSION_KEY, version, None)
+    _lane_version = None
+    return version
+
+
+def get_lane_table() -> LaneTable:
+    """Return the shared lane table, rebuilt when the station index or the
+    stored lanes change"""
+    global _lane_table
+
+    index = get_station_index()
+    lanes = lane_version()
+    table = _lane_table
+    if (
+        table is not None
+        and table.version == index.version
+        and table.lane_version == lanes
+    ):
+        return table
+
+    with _lane_table_lock:
+        if (
+            _lane_table is None
+            or _lane_table.version != index.version
+            or _lane_table.lane_version != lanes
+        ):
+            started = time.perf_counter()
+            _lane_table = LaneTable.from_database(index, lanes)
+            logger.info(
+                f"Lane table built: {len(_lane_table)} lanes, "
+                f"version {index.version}, {time.perf_counter() - started:.3f}s"
+            )
+        return _lane_table
@@ -0,0 +1,90 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from fuel_optimizer.benchmark import compare, run_benchmarks
+
+
+def int_list(value: str):
+    return [int(item) for item in value.split(",") if item]
+
+
+class Command(BaseCommand):
+    help = "Benchmark fuel stop search, cost calculation and end-to-end optimization"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--csv-file",
+            type=str,
+            default=str(settings.BENCHMARK_CSV_FILE),
+            help="Price file the synthetic station set is drawn from",
+        )
+        parser.add_argument(
+            "--stations",
+            type=int_list,
+            default=settings.BENCHMARK_STATION_COUNTS,
+            help="Comma-separated station counts",
+        )
+        parser.add_argument(
+            "--route-miles",
+            type=int_list,
+            default=settings.BENCHMARK_ROUTE_MILES,
+            help="Comma-separated route lengths in miles",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=settings.BENCHMARK_ITERATIONS,
+            help="Timed runs per benchmark case",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed for synthetic coordinates and routes",
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            help="Write results as JSON to this file instead of stdout",
+        )
+        parser.add_argument(
+            "--baseline",
+            type=str,
+            help="Earlier results file to compare median latencies against",
+        )
+
+    def handle(self, *args, **options):
+        report = run_benchmarks(
+            options["csv_file"],
+            options["stations"],
+            options["route_miles"],
+            options["iterations"],
+            options["seed"],
+        )
+
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                report["comparison"] = compare(json.load(f), report)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            for result in report["results"]:
+                self.stdout.write(
+                    f"{result['benchmark']:<16} stations={result['stations']:<6} "
+                    f"miles={result['route_miles']:<5} "
+                    f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms "
+                    f"{result['ops_per_second']:.1f}/s"
+                )
+            for change in report.get("comparison", []):
+                self.stdout.write(
+                    f"{change['benchmark']:<16} stations={change['stations']:<6} "
+                    f"miles={change['route_miles']:<5} p50 {change['change']:+.1%}"
+                )
+            self.stdout.write(
+                self.style.SUCCESS(f"Results written to {options['output']}")
+            )
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,70 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from fuel_optimizer.lanes import invalidate_lane_table, save_lane
+from fuel_optimizer.models import LaneCorridor
+from fuel_optimizer.polyline import unpack_route
+from fuel_optimizer.services import get_route_optimization_service
+from fuel_optimizer.spatial import get_station_index
+
+
+class Command(BaseCommand):
+    help = "Precompute corridor station tables for frequently run lanes"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "lanes_file",
+            nargs="?",
+            type=str,
+            help='JSON list of {"name", "start", "end"} lanes; without it, '
+            "stored lanes are recomputed from their saved routes",
+        )
+
+    def handle(self, *args, **options):
+        index = get_station_index()
+        lanes_file = options["lanes_file"]
+
+        if lanes_file:
+            try:
+                with open(lanes_file) as f:
+                    lanes = json.load(f)
+            except FileNotFoundError:
+                self.stderr.write(f"File not found: {lanes_file}")
+                return
+            except ValueError as e:
+                self.stderr.write(f"Failed to parse file: {str(e)}")
+                return
+
+            service = get_route_optimization_service()
+            routes = []
+            for lane in lanes:
+                try:
+                    start_coords = service.geocode(lane["start"])
+                    end_coords = service.geocode(lane["end"])
+                    route_data = service.get_route(start_coords, end_coords)
+                except ValueError as e:
+                    self.stderr.write(f"Skipping lane {lane['name']}: {e}")
+                    continue
+                routes.append((lane["name"], lane["start"], lane["end"], route_data))
+        else:
+            # Stations or corridor settings changed; reuse the stored routes
+            routes = [
+                (
+                    lane.name,
+                    lane.start_location,
+                    lane.end_location,
+                    unpack_route(lane.packed_route),
+                )
+                for lane in LaneCorridor.objects.all()
+            ]
+
+        for name, start, end, route_data in routes:
+            lane = save_lane(name, start, end, route_data, index)
+            self.stdout.write(f"{lane}: {lane.stations.count()} corridor stations")
+
+        if routes:
+            # Workers rebuild only their lane tables
+            invalidate_lane_table()
+
+        self.stdout.write(self.style.SUCCESS(f"Built {len(routes)} lane corridors"))
@@ -0,0 +1,72 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from fuel_optimizer.roadgraph import RoadGraph
+
+
+def road_lines(geojson):
+    """(lng, lat) polylines of the LineString and MultiLineString features"""
+    for feature in geojson.get("features", []):
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") == "LineString":
+            yield geometry["coordinates"]
+        elif geometry.get("type") == "MultiLineString":
+            yield from geometry["coordinates"]
+
+
+class Command(BaseCommand):
+    help = "Build the memory-mapped road graph used by the road_graph_router backend"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "geojson_file",
+            type=str,
+            help="GeoJSON FeatureCollection of road centerlines",
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            default=str(settings.ROAD_GRAPH_DIR),
+            help="Directory for the graph arrays",
+        )
+        parser.add_argument(
+            "--precision",
+            type=int,
+            default=5,
+            help="Decimals to which vertices are rounded before joining lines",
+        )
+        parser.add_argument(
+            "--no-hierarchy",
+            action="store_true",
+            help="Skip the contraction hierarchy and route with plain A*",
+        )
+
+    def handle(self, *args, **options):
+        geojson_file = options["geojson_file"]
+        try:
+            with open(geojson_file) as f:
+                geojson = json.load(f)
+        except FileNotFoundError:
+            self.stderr.write(f"File not found: {geojson_file}")
+            return
+        except ValueError as e:
+            self.stderr.write(f"Failed to parse file: {str(e)}")
+            return
+
+        started = time.perf_counter()
+        graph = RoadGraph.from_lines(road_lines(geojson), options["precision"])
+        shortcuts = ""
+        if not options["no_hierarchy"]:
+            hierarchy = graph.contract()
+            shortcuts = f", {int((hierarchy.middles >= 0).sum())} shortcuts"
+        graph.save(options["output"], source=geojson_file)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Road graph built: {len(graph)} nodes, {len(graph.indices)} edges"
+                f"{shortcuts} in {time.perf_counter() - started:.1f}s "
+                f"-> {options['output']}"
+            )
+        )
@@ -1,95 +1,200 @@
+from collections import Counter
+from decimal import Decimal
+from typing import Dict, List
+
 import pandas as pd
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandParser
-from geopy.exc import GeocoderServiceError, GeocoderTimedOut
+from django.db import connection
 from geopy.extra.rate_limiter import RateLimiter
 from geopy.geocoders import ArcGIS
 from tqdm import tqdm
 
+from fuel_optimizer.geocoding import GeocodeCache, geocode_places
 from fuel_optimizer.models import FuelStation
+from fuel_optimizer.prices import read_chunks
+from fuel_optimizer.spatial import (
+    StationIndex,
+    invalidate_station_index,
+    publish_station_snapshot,
+)
 
 
 class Command(BaseCommand):
-    help = "One-time geocoding of all fuel stations"
+    help = "Geocode new fuel stations and optionally refresh existing prices"
 
     def add_arguments(self, parser: CommandParser):
         parser.add_argument("csv_file", type=str, help="Path to the CSV file")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.GEOCODE_WORKERS,
+            help="Concurrent geocoder requests",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=settings.GEOCODE_RATE_PER_SECOND,
+            help="Maximum geocoder requests per second",
+        )
+        parser.add_argument(
+            "--update-prices",
+            action="store_true",
+            help="Apply retail price changes to stations that already exist",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.CSV_CHUNK_SIZE,
+            help="Rows read and processed at a time",
+        )
+        parser.add_argument(
+            "--cache-file",
+            type=str,
+            default=str(settings.GEOCODE_CACHE_FILE),
+            help="Persistent geocode cache, also used to resume interrupted runs",
+        )
+
+    def existing_stations(self, opis_ids: List[int]) -> Dict:
+        """Map opis_id -> (pk, retail_price) for stations already stored"""
+        batch_size = connection.ops.bulk_batch_size(["opis_id"], opis_ids)
+        existing = {}
+        for start in range(0, len(opis_ids), batch_size):
+            rows = FuelStation.objects.filter(
+                opis_id__in=opis_ids[start : start + batch_size]
+            ).values_list("opis_id", "pk", "retail_price")
+            existing.update((opis_id, (pk, price)) for opis_id, pk, price in rows)
+        return existing
+
+    def update_prices(self, df: pd.DataFrame, existing: Dict) -> int:
+        """Bulk update stations whose retail price changed; returns the count"""
+        changed = []
+        for opis_id, price in zip(df["opis_truckstop_id"], df["retail_price"]):
+            pk, current = existing[opis_id]
+            price = Decimal(str(round(float(price), 3)))
+            if price != current:
+                changed.append(FuelStation(pk=pk, opis_id=opis_id, retail_price=price))
+
+        FuelStation.objects.bulk_update(
+            changed, ["retail_price"], batch_size=settings.STATION_BULK_BATCH_SIZE
+        )
+        return len(changed)
+
+    def create_stations(
+        self, df: pd.DataFrame, geocode, cache: GeocodeCache, options
+    ) -> int:
+        """Geocode unique places of new stations and bulk insert them; returns
+        the number of rows that could not be geocoded"""
+        # Stations in the same town share one lookup
+        places = list(zip(df["city"], df["state"]))
+        unique_places = list(dict.fromkeys(places))
+        pending = sum(1 for place in unique_places if place not in cache)
+
+        with tqdm(total=pending, desc="Geocoding locations", leave=False) as progress:
+            coordinates = geocode_places(
+                unique_places,
+                geocode,
+                cache,
+                workers=options["workers"],
+                checkpoint_every=settings.GEOCODE_CHECKPOINT_EVERY,
+                progress=progress.update,
+            )
+
+        stations = []
+        for row, place in zip(df.itertuples(index=False), places):
+            location = coordinates.get(place)
+            if not location:
+                continue
+
+            stations.append(
+                FuelStation(
+                    opis_id=int(row.opis_truckstop_id),
+                    name=row.truckstop_name.strip(),
+                    city=place[0],
+                    state=place[1],
+                    retail_price=round(float(row.retail_price), 3),
+                    latitude=round(location[0], 7),
+                    longitude=round(location[1], 7),
+                )
+            )
+
+        FuelStation.objects.bulk_create(
+            stations,
+            batch_size=settings.STATION_BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        return len(df) - len(stations)
 
     def handle(self, *args, **options):
         csv_file = options["csv_file"]
 
-        geocoder = ArcGIS(timeout=10)
-        geocode = RateLimiter(geocoder.geocode, min_delay_seconds=1, max_retries=3)
+        geocoder = ArcGIS(timeout=settings.GEOCODER_TIMEOUT)
+        geocode = RateLimiter(
+            geocoder.geocode,
+            min_delay_seconds=1 / options["rate"],
+            max_retries=3,
+            swallow_exceptions=False,
+        )
+        cache = GeocodeCache(options["cache_file"])
 
         self.stdout.write(f"Loading fuel stations from: {csv_file}")
 
+        counts = Counter()
+        # OPIS ids read so far this run, existing or new
+        seen = set()
+        before = FuelStation.objects.count()
         try:
-            df = pd.read_csv(csv_file)
+            for chunk in read_chunks(csv_file, options["chunk_size"]):
+                counts["rows"] += len(chunk)
+
+                # The first row for an OPIS id is canonical; repeats are dropped
+                ids = chunk["opis_truckstop_id"]
+                repeated = ids.duplicated() | ids.isin(seen)
+                counts["duplicates"] += int(repeated.sum())
+                chunk = chunk[~repeated]
+                seen.update(chunk["opis_truckstop_id"].tolist())
+                existing = self.existing_stations(chunk["opis_truckstop_id"].tolist())
+
+                # Skip existing stations, optionally refreshing their prices
+                is_existing = chunk["opis_truckstop_id"].isin(existing.keys())
+                counts["skipped"] += int(is_existing.sum())
+                if options["update_prices"]:
+                    counts["updated"] += self.update_prices(
+                        chunk[is_existing], existing
+                    )
+
+                new = chunk[~is_existing]
+                if len(new):
+                    counts["failed"] += self.create_stations(
+                        new, geocode, cache, options
+                    )
         except FileNotFoundError:
             self.stderr.write(f"File not found: {csv_file}")
             return
         except Exception as e:
             self.stderr.write(f"Failed to parse file: {str(e)}")
             return
+        finally:
+            created_count = FuelStation.objects.count() - before
+            # Bulk writes bypass post_save, so invalidate the index once here
+            if created_count or counts["updated"]:
+                version = invalidate_station_index()
+                # Workers map the new snapshot instead of each querying the table
+                publish_station_snapshot(StationIndex.from_database(version=version))
+                self.stdout.write(f"Station data version: {version}")
 
-        df.rename(
-            columns=lambda col: col.strip().lower().replace(" ", "_"), inplace=True
+        self.stdout.write(
+            f"Read {counts['rows']} rows, dropped {counts['duplicates']} "
+            f"repeated OPIS ids"
         )
-
-        # Skip existing stations
-        csv_ids = df["opis_truckstop_id"].tolist()
-        existing_ids = set(
-            FuelStation.objects.filter(opis_id__in=csv_ids).values_list(
-                "opis_id", flat=True
+        self.stdout.write(f"Skipped {counts['skipped']} existing stations")
+        if options["update_prices"]:
+            self.stdout.write(
+                f"Updated prices for {counts['updated']} existing stations"
             )
-        )
-        initial_count = len(df)
-        df = df[~df["opis_truckstop_id"].isin(existing_ids)]
-
-        self.stdout.write(f"Skipping {initial_count - len(df)} existing stations")
-        self.stdout.write(f"Processing {len(df)} new fuel stations...")
-
-        if len(df) == 0:
-            self.stdout.write("No new stations to process!")
-            return
-
-        geocoded_count = 0
-        failed_count = 0
-
-        for idx, row in tqdm(
-            df.iterrows(), total=len(df), desc="Geocoding new stations"
-        ):
-            try:
-                opis_id = int(row["opis_truckstop_id"])
-                address = f"{row['city']}, {row['state']}, USA"
-                location = geocode(address, timeout=10)
-
-                if location:
-                    FuelStation.objects.get_or_create(
-                        opis_id=opis_id,
-                        name=row["truckstop_name"].strip(),
-                        city=row["city"].strip(),
-                        state=row["state"].strip().upper(),
-                        retail_price=float(row["retail_price"]),
-                        latitude=location.latitude,
-                        longitude=location.longitude,
-                    )
-                    geocoded_count += 1
-                else:
-                    failed_count += 1
-
-            except (GeocoderTimedOut, GeocoderServiceError):
-                failed_count += 1
-                self.stderr.write(
-                    f"[{failed_count}] Geocoder error on row {idx} (ID={opis_id}, address='{address}'): {e}"
-                )
-            except Exception:
-                failed_count += 1
-                self.stderr.write(
-                    f"[{failed_count}] Unexpected error on row {idx} (ID={opis_id}, address='{address}'): {e}"
-                )
-
         self.stdout.write(
             self.style.SUCCESS(
-                f"Geocoding complete! Created: {geocoded_count}, Failed: {failed_count}"
+                f"Geocoding complete! Created: {created_count}, "
+                f"Failed: {counts['failed']}"
             )
         )
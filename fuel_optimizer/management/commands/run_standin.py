@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from fuel_optimizer.standin import StandIn, make_server
+
+
+class Command(BaseCommand):
+    help = "Serve deterministic ArcGIS and OpenRouteService stand-ins for load tests"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--host", type=str, default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8100)
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=settings.STANDIN_LATENCY_MS,
+            help="Added delay per request",
+        )
+        parser.add_argument(
+            "--jitter-ms",
+            type=float,
+            default=settings.STANDIN_JITTER_MS,
+            help="Upper bound of random extra delay per request",
+        )
+        parser.add_argument(
+            "--routes-file",
+            type=str,
+            default=settings.STANDIN_ROUTES_FILE,
+            help="JSON list of recorded ORS GeoJSON responses to replay",
+        )
+
+    def handle(self, *args, **options):
+        standin = StandIn(
+            latency_ms=options["latency_ms"],
+            jitter_ms=options["jitter_ms"],
+            road_factor=settings.STANDIN_ROAD_FACTOR,
+            routes_file=options["routes_file"],
+        )
+        server = make_server(options["host"], options["port"], standin)
+        address = f"{options['host']}:{options['port']}"
+        self.stdout.write(
+            f"Stand-in listening on http://{address}\n"
+            f"  ORS_BASE_URL=http://{address} ARCGIS_DOMAIN={address} "
+            "ARCGIS_SCHEME=http"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
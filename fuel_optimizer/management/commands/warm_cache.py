@@ -0,0 +1,178 @@
+import functools
+import json
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from fuel_optimizer.backends import RateLimitedGeocoder, RateLimitedRouter
+from fuel_optimizer.geocoding import normalize_location
+from fuel_optimizer.services import RouteOptimizationService, capture
+from fuel_optimizer.spatial import get_station_index
+
+# "Route optimized: <start> -> <end>, ..." lines of the service log
+LOG_LINE = re.compile(
+    r"Route optimized: (?P<start>.+?) -> (?P<end>.+), "
+    r"(?:\d+ stops|\d+ vehicle plans)"
+)
+
+
+def read_trips(path: str) -> List[Dict]:
+    """Trips from a JSON lane list, JSON lines of request bodies, or a
+    service log"""
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+
+    trips = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("{"):
+            trips.append(json.loads(line))
+        elif match := LOG_LINE.search(line):
+            trips.append({"start": match["start"], "end": match["end"]})
+    return trips
+
+
+def top_trips(trips: List[Dict], limit: Optional[int] = None) -> List[Dict]:
+    """Distinct trips, most frequent first"""
+    stops = {}
+    counts: Counter = Counter()
+    for trip in trips:
+        locations = [trip["start"], *trip.get("waypoints", ()), trip["end"]]
+        key = tuple(normalize_location(location) for location in locations)
+        stops.setdefault(key, trip)
+        counts[key] += 1
+    return [stops[key] for key, _ in counts.most_common(limit)]
+
+
+class Command(BaseCommand):
+    help = "Prefetch geocodes, routes and corridors of frequent trips into the cache"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "trips_file",
+            type=str,
+            help='JSON list of {"start", "end"} lanes, JSON lines of request '
+            "bodies, or a service log with 'Route optimized' lines",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=None,
+            help="Only the N most frequent trips",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.WARM_CACHE_WORKERS,
+            help="Concurrent lookups",
+        )
+        parser.add_argument(
+            "--geocode-rate",
+            type=float,
+            default=settings.WARM_CACHE_GEOCODE_RATE,
+            help="Maximum geocoder requests per second",
+        )
+        parser.add_argument(
+            "--route-rate",
+            type=float,
+            default=settings.WARM_CACHE_ROUTE_RATE,
+            help="Maximum routing requests per second",
+        )
+        parser.add_argument(
+            "--skip-corridors",
+            action="store_true",
+            help="Only prefetch geocodes and routes",
+        )
+
+    def handle(self, *args, **options):
+        trips_file = options["trips_file"]
+        try:
+            trips = top_trips(read_trips(trips_file), options["top"])
+        except FileNotFoundError:
+            self.stderr.write(f"File not found: {trips_file}")
+            return
+        except ValueError as e:
+            self.stderr.write(f"Failed to parse file: {str(e)}")
+            return
+
+        service = RouteOptimizationService()
+        # Cache hits are free; only calls that reach the backends are limited
+        service.geocoder = RateLimitedGeocoder(
+            service.geocoder, options["geocode_rate"]
+        )
+        service.ors_client = RateLimitedRouter(
+            service.ors_client, options["route_rate"]
+        )
+
+        # Precomputed lanes already skip geocoding, routing and the corridor
+        trips = [
+            trip
+            for trip in trips
+            if trip.get("waypoints")
+            or not service.match_lane(trip["start"], trip["end"])
+        ]
+        self.stdout.write(f"Warming the cache for {len(trips)} trips")
+
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as pool:
+            # Geocode each distinct address once
+            addresses = {}
+            for trip in trips:
+                for address in service.trip_stops(trip):
+                    addresses.setdefault(normalize_location(address), address)
+            geocodes = dict(
+                zip(
+                    addresses,
+                    pool.map(
+                        functools.partial(capture, service.geocode),
+                        addresses.values(),
+                    ),
+                )
+            )
+            for key, (_, error) in geocodes.items():
+                if error:
+                    self.stderr.write(f"Skipping {addresses[key]}: {error}")
+
+            # Fetch each distinct route once
+            pairs = []
+            for trip in trips:
+                stops = [
+                    geocodes[normalize_location(a)] for a in service.trip_stops(trip)
+                ]
+                if not any(error for _, error in stops):
+                    pairs.append(tuple(coords for coords, _ in stops))
+            pairs = list(dict.fromkeys(pairs))
+            routes = []
+            for pair, (route, error) in zip(
+                pairs,
+                pool.map(
+                    lambda p: capture(service.get_route, p[0], p[-1], p[1:-1]),
+                    pairs,
+                ),
+            ):
+                if error:
+                    self.stderr.write(f"Skipping route {pair}: {error}")
+                else:
+                    routes.append(route)
+
+            corridors = 0
+            if routes and not options["skip_corridors"]:
+                index = get_station_index()
+                for _, error in pool.map(
+                    lambda r: capture(service.corridor_stations, r, None, None, index),
+                    routes,
+                ):
+                    corridors += not error
+
+        geocoded = sum(not error for _, error in geocodes.values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Warmed {geocoded} geocodes, {len(routes)} routes "
+                f"and {corridors} corridors"
+            )
+        )
@@ -0,0 +1,166 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+STAGE_SECONDS = "fuel_optimizer_stage_seconds"
+RESULT_CACHE_TOTAL = "fuel_optimizer_result_cache_total"
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+DESCRIPTIONS = {
+    STAGE_SECONDS: "Time spent in each stage of the optimize pipeline",
+    RESULT_CACHE_TOTAL: "Optimize result cache lookups by outcome",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Stage timings of the current request, collected for the Server-Timing header
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(labels: Labels, **extra: str) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe in-process counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    def increment(self, name: str, amount: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# HELP {name} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(
+                        histogram.buckets + ("+Inf",), histogram.counts
+                    ):
+                        cumulative += count
+                        lines.append(
+                            f"{name}_bucket{_format_labels(labels, le=str(bound))} "
+                            f"{cumulative}"
+                        )
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(
+                        f"{name}_count{_format_labels(labels)} {histogram.count}"
+                    )
+
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# HELP {name} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def render_cache_stats(stats: Dict[str, Dict[str, int]]) -> str:
+    """Expose TieredCache.stats() as Prometheus gauges per tier"""
+    lines = []
+    names = sorted({field for tier in stats.values() for field in tier})
+    for field in names:
+        name = f"fuel_optimizer_cache_{field}"
+        lines.append(f"# HELP {name} Tiered cache {field} per tier")
+        lines.append(f"# TYPE {name} gauge")
+        for tier, values in sorted(stats.items()):
+            if field in values:
+                lines.append(f'{name}{{tier="{tier}"}} {values[field]}')
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def span(stage: str):
+    """Time a pipeline stage into the stage histogram and the current
+    request's Server-Timing entries"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe(STAGE_SECONDS, elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def timed(stage: str):
+    """Decorator form of ``span``"""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def start_request_timings() -> List[Tuple[str, float]]:
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Server-Timing value with per-stage totals in milliseconds"""
+    durations: Dict[str, float] = {}
+    for stage, elapsed in timings:
+        durations[stage] = durations.get(stage, 0.0) + elapsed
+    durations["total"] = total
+    return ", ".join(
+        f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in durations.items()
+    )
@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from .metrics import server_timing_header, start_request_timings
+
+
+@sync_and_async_middleware
+def server_timing_middleware(get_response):
+    """Add a Server-Timing header with the request's pipeline stage timings"""
+
+    def add_header(response, timings, started):
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = server_timing_header(
+                timings, time.perf_counter() - started
+            )
+        return response
+
+    if asyncio.iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            started = time.perf_counter()
+            timings = start_request_timings()
+            response = await get_response(request)
+            return add_header(response, timings, started)
+
+    else:
+
+        def middleware(request):
+            started = time.perf_counter()
+            timings = start_request_timings()
+            response = get_response(request)
+            return add_header(response, timings, started)
+
+    return middleware
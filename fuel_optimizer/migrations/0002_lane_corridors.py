@@ -0,0 +1,70 @@
+# Generated by Django 3.2.23 on 2026-10-17 04:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fuel_optimizer", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LaneCorridor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("start_location", models.CharField(max_length=200)),
+                ("end_location", models.CharField(max_length=200)),
+                ("polyline", models.TextField()),
+                ("polyline_precision", models.PositiveSmallIntegerField(default=5)),
+                ("distance_miles", models.FloatField()),
+                ("corridor_radius_miles", models.FloatField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CorridorStation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("opis_id", models.IntegerField()),
+                ("mile_marker", models.FloatField()),
+                ("detour_miles", models.FloatField()),
+                (
+                    "lane",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stations",
+                        to="fuel_optimizer.lanecorridor",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["lane", "mile_marker"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="corridorstation",
+            index=models.Index(
+                fields=["lane", "mile_marker"], name="fuel_optimi_lane_id_94b14c_idx"
+            ),
+        ),
+    ]
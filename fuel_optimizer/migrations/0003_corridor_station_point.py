@@ -0,0 +1,23 @@
+# Generated by Django 3.2.23 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fuel_optimizer", "0002_lane_corridors"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="corridorstation",
+            name="latitude",
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name="corridorstation",
+            name="longitude",
+            field=models.FloatField(null=True),
+        ),
+    ]
@@ -33,3 +33,49 @@ class FuelStation(models.Model):
     @property
     def coordinates(self):
         return (float(self.latitude), float(self.longitude))
+
+
+class LaneCorridor(models.Model):
+    """Frequently run lane with its stored route, see build_lane_corridors"""
+
+    name = models.CharField(max_length=100, unique=True)
+    start_location = models.CharField(max_length=200)
+    end_location = models.CharField(max_length=200)
+
+    # Route packed like the route cache (encoded polyline)
+    polyline = models.TextField()
+    polyline_precision = models.PositiveSmallIntegerField(default=5)
+    distance_miles = models.FloatField()
+
+    corridor_radius_miles = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.start_location} -> {self.end_location}"
+
+    @property
+    def packed_route(self):
+        return {
+            "polyline": self.polyline,
+            "precision": self.polyline_precision,
+            "distance_miles": self.distance_miles,
+        }
+
+
+class CorridorStation(models.Model):
+    """Station within the corridor of a lane, ordered by mile marker"""
+
+    lane = models.ForeignKey(
+        LaneCorridor, on_delete=models.CASCADE, related_name="stations"
+    )
+    opis_id = models.IntegerField()
+    mile_marker = models.FloatField()
+    detour_miles = models.FloatField()  # Off-route distance to the station
+
+    # Station point, the index keeps one station per point
+    latitude = models.FloatField(null=True)
+    longitude = models.FloatField(null=True)
+
+    class Meta:
+        ordering = ["lane", "mile_marker"]
+        indexes = [models.Index(fields=["lane", "mile_marker"])]
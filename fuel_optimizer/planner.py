@@ -0,0 +1,245 @@
+import bisect
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+class PlannedStop(NamedTuple):
+    """A refueling stop chosen by the planner"""
+
+    candidate: int  # Index into the candidate arrays passed to the planner
+    mile_marker: float
+    price: float
+    gallons: float
+    cost: float
+
+
+class RangeArgmin:
+    """Sparse table answering "cheapest station in [lo, hi)" in O(1)"""
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        self.levels = [np.arange(len(values))]
+        width = 1
+        while width * 2 <= len(values):
+            prev = self.levels[-1]
+            left, right = prev[: len(prev) - width], prev[width:]
+            self.levels.append(np.where(values[right] < values[left], right, left))
+            width *= 2
+
+    def __call__(self, lo: int, hi: int) -> int:
+        level = int(hi - lo).bit_length() - 1
+        left = self.levels[level][lo]
+        right = self.levels[level][hi - (1 << level)]
+        return int(right if self.values[right] < self.values[left] else left)
+
+
+def next_cheaper(prices: np.ndarray) -> np.ndarray:
+    """Index of the next strictly cheaper station for each station (or -1)"""
+    values = prices.tolist()
+    result = [-1] * len(values)
+    stack: List[int] = []
+    for i, price in enumerate(values):
+        while stack and price < values[stack[-1]]:
+            result[stack.pop()] = i
+        stack.append(i)
+    return np.array(result, dtype=np.int64)
+
+
+def reaches_destination(
+    arrive: np.ndarray,
+    leave: np.ndarray,
+    distance_miles: float,
+    range_miles: float,
+) -> np.ndarray:
+    """Mask of stations (in route order) a full tank gets to the destination
+    from, directly or through later such stations"""
+    limits = leave + range_miles
+    # Usually each station reaches the next and the last the destination
+    if not len(limits) or (
+        distance_miles <= limits[-1] and (arrive[1:] <= limits[:-1]).all()
+    ):
+        return np.ones(len(limits), dtype=bool)
+
+    result = np.zeros(len(limits), dtype=bool)
+    nearest = np.inf  # Lowest arrival mile of a later station that gets there
+    for i, (limit, here) in enumerate(
+        zip(limits.tolist()[::-1], arrive.tolist()[::-1])
+    ):
+        if distance_miles <= limit or nearest <= limit:
+            result[len(limits) - 1 - i] = True
+            nearest = min(nearest, here)
+    return result
+
+
+def effective_prices(
+    prices: Sequence[float],
+    detour_miles: Sequence[float],
+    range_miles: float,
+    detour_factor: float = 2.0,
+) -> np.ndarray:
+    """Per-gallon prices including the fuel burned leaving the route.
+
+    A station ``d`` miles off route costs ``detour_factor * d`` extra miles
+    of fuel. Spread over a full tank (``range_miles / mpg`` gallons) that is
+    a ``detour_factor * d / range_miles`` markup, the same at any MPG.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    detours = np.asarray(detour_miles, dtype=np.float64)
+    return prices * (1 + detour_factor * detours / range_miles)
+
+
+def prune_dominated(
+    mile_markers: Sequence[float], prices: Sequence[float], window_miles: float
+) -> np.ndarray:
+    """Indices of stations not beaten on price by a station within
+    ``window_miles`` along the route; ties are kept"""
+    miles = np.asarray(mile_markers, dtype=np.float64)
+    cost = np.asarray(prices, dtype=np.float64)
+    if not len(miles) or window_miles <= 0:
+        return np.arange(len(miles))
+
+    order = np.argsort(miles, kind="stable")
+    miles, cost = miles[order], cost[order]
+    lo = np.searchsorted(miles, miles - window_miles, side="left")
+    hi = np.searchsorted(miles, miles + window_miles, side="right")
+    cheapest = RangeArgmin(cost)
+    best = np.fromiter(
+        (cost[cheapest(a, b)] for a, b in zip(lo.tolist(), hi.tolist())),
+        dtype=np.float64,
+        count=len(miles),
+    )
+    return np.sort(order[cost <= best])
+
+
+def plan_refueling(
+    mile_markers: Sequence[float],
+    prices: Sequence[float],
+    distance_miles: float,
+    range_miles: float,
+    mpg: float,
+    start_fuel_miles: Optional[float] = None,
+    detour_miles: Optional[Sequence[float]] = None,
+) -> List[PlannedStop]:
+    """Greedy refueling plan along a route.
+
+    Classic greedy gas-station algorithm: from each stop, drive to the next
+    cheaper station if it is within range, buying only what is needed to get
+    there; otherwise fill up and drive to the cheapest station within range.
+    Fuel is tracked in miles of range and converted to gallons with ``mpg``.
+
+    ``detour_miles`` is the one-way distance between the route and each
+    station. It is burned on the way in and again on the way back, so a
+    station is only in range with fuel for both, and the fuel for it is
+    part of what the plan buys. Equal prices go to the shorter detour.
+    Without detours the plan is the cheapest possible; with them it is a
+    heuristic, as a cheaper station can cost more to reach than it saves.
+    Raises ValueError when the route has a gap longer than the vehicle range.
+    """
+    fuel = range_miles if start_fuel_miles is None else start_fuel_miles
+    if distance_miles <= fuel:
+        return []
+
+    miles = np.asarray(mile_markers, dtype=np.float64)
+    cost = np.asarray(prices, dtype=np.float64)
+    detours = (
+        np.zeros(len(miles))
+        if detour_miles is None
+        else np.asarray(detour_miles, dtype=np.float64)
+    )
+    on_route = np.nonzero((miles >= 0) & (miles <= distance_miles))[0]
+    order = on_route[np.argsort(miles[on_route], kind="stable")]
+    miles, cost, detours = miles[order], cost[order], detours[order]
+
+    # Route miles of fuel used on arriving at a station, and the point on
+    # the route a station is as good as once the way back is paid for
+    arrive = miles + detours
+    leave = miles - detours
+
+    # A long detour can lead to a dead end; only plan stations that don't
+    viable = reaches_destination(arrive, leave, distance_miles, range_miles)
+    order, miles, cost, detours = (
+        order[viable],
+        miles[viable],
+        cost[viable],
+        detours[viable],
+    )
+    arrive, leave = arrive[viable], leave[viable]
+
+    # Stations ranked by price, then detour, then mile marker
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[np.lexsort((detours, cost))] = np.arange(len(order))
+    cheaper = next_cheaper(rank).tolist()
+    cheapest = RangeArgmin(rank)
+    longest = float(detours.max()) if len(order) else 0.0
+    markers, arrive, leave, rank = (
+        miles.tolist(),
+        arrive.tolist(),
+        leave.tolist(),
+        rank.tolist(),
+    )
+
+    def cheapest_reachable(lo: int, limit: float) -> int:
+        """Cheapest station from ``lo`` on that fuel up to route mile
+        ``limit`` reaches, or -1"""
+        hi = bisect.bisect_right(markers, limit)
+        # Every station before ``safe`` is in reach whatever its detour
+        safe = min(max(bisect.bisect_left(markers, limit - longest), lo), hi)
+        found = cheapest(lo, safe) if safe > lo else -1
+        for position in range(safe, hi):
+            if arrive[position] <= limit and (
+                found < 0 or rank[position] < rank[found]
+            ):
+                found = position
+        return found
+
+    # Drive to the cheapest station the fuel in the tank reaches
+    current = cheapest_reachable(0, fuel)
+    if current < 0:
+        raise ValueError("No fuel stations within vehicle range along route")
+    fuel -= arrive[current]
+    purchased = {}
+
+    while distance_miles - leave[current] > fuel:
+        limit = leave[current] + range_miles
+        target = cheaper[current]
+        if target < 0 or arrive[target] > limit:
+            # The next cheaper station is out of reach; a later one may not be
+            target = cheapest_reachable(current + 1, limit)
+
+        if target >= 0 and rank[target] < rank[current]:
+            # Buy just enough to reach the next cheaper station
+            needed = arrive[target] - leave[current] - fuel
+        elif distance_miles <= limit:
+            # Cheapest within reach of the destination: buy what is left
+            purchased[current] = purchased.get(current, 0.0) + (
+                distance_miles - leave[current] - fuel
+            )
+            break
+        else:
+            # Cheapest within range: fill up and move to the next cheapest
+            if target < 0:
+                raise ValueError("No fuel stations within vehicle range along route")
+            needed = range_miles - fuel
+
+        if needed > 0:
+            purchased[current] = purchased.get(current, 0.0) + needed
+            fuel += needed
+        fuel -= arrive[target] - leave[current]
+        current = target
+
+    stops = []
+    for position in sorted(purchased):
+        gallons = purchased[position] / mpg
+        if gallons <= 1e-9:
+            continue
+        stops.append(
+            PlannedStop(
+                candidate=int(order[position]),
+                mile_marker=float(miles[position]),
+                price=float(cost[position]),
+                gallons=gallons,
+                cost=gallons * float(cost[position]),
+            )
+        )
+    return stops
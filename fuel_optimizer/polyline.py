@@ -0,0 +1,101 @@
+from typing import Dict, List
+
+import numpy as np
+
+from .geometry import point_segment_distance
+
+
+def simplify(
+    coordinates: List[List[float]], tolerance_miles: float
+) -> List[List[float]]:
+    """Douglas-Peucker simplification of a (lng, lat) polyline.
+
+    Drops vertices that are closer than ``tolerance_miles`` to the line
+    between the vertices kept around them. A tolerance of 0 disables it.
+    """
+    points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    if len(points) < 3 or tolerance_miles <= 0:
+        return points.tolist()
+
+    lng, lat = points[:, 0], points[:, 1]
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        inner = slice(first + 1, last)
+        distance, _ = point_segment_distance(
+            lat[inner], lng[inner], lat[first], lng[first], lat[last], lng[last]
+        )
+        farthest = int(np.argmax(distance))
+        if distance[farthest] > tolerance_miles:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return points[keep].tolist()
+
+
+def _encode_values(values: np.ndarray) -> str:
+    chunks = []
+    for value in values.tolist():
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def encode(coordinates: List[List[float]], precision: int = 5) -> str:
+    """Encode a (lng, lat) polyline with Google's encoded polyline format"""
+    points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    scaled = np.round(points[:, ::-1] * 10**precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    return _encode_values(deltas.ravel())
+
+
+def decode(encoded: str, precision: int = 5) -> List[List[float]]:
+    """Decode a Google encoded polyline back into (lng, lat) pairs"""
+    values, value, shift = [], 0, 0
+    for char in encoded:
+        byte = ord(char) - 63
+        value |= (byte & 0x1F) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+
+    deltas = np.asarray(values, dtype=np.int64).reshape(-1, 2)
+    points = np.cumsum(deltas, axis=0) / 10**precision
+    return points[:, ::-1].tolist()
+
+
+def pack_route(route: Dict, precision: int = 5) -> Dict:
+    """Compact cache representation of a route dict"""
+    packed = {
+        "polyline": encode(route["coordinates"], precision),
+        "precision": precision,
+        "distance_miles": route["distance_miles"],
+    }
+    if "leg_distances_miles" in route:
+        packed["leg_distances_miles"] = route["leg_distances_miles"]
+    return packed
+
+
+def unpack_route(packed: Dict) -> Dict:
+    """Inverse of ``pack_route``"""
+    coordinates = decode(packed["polyline"], packed["precision"])
+    route = {
+        "geometry": {"type": "LineString", "coordinates": coordinates},
+        "distance_miles": packed["distance_miles"],
+        "coordinates": coordinates,
+    }
+    if "leg_distances_miles" in packed:
+        route["leg_distances_miles"] = packed["leg_distances_miles"]
+    return route
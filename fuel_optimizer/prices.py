@@ -0,0 +1,38 @@
+from typing import Iterator
+
+import pandas as pd
+
+# Normalized column name -> dtype; other CSV columns are never loaded
+COLUMNS = {
+    "opis_truckstop_id": "int64",
+    "truckstop_name": "string",
+    "city": "string",
+    "state": "string",
+    "retail_price": "float64",
+}
+
+
+def normalize_column(column: str) -> str:
+    return column.strip().lower().replace(" ", "_")
+
+
+def read_chunks(csv_file: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Stream the price file in typed chunks with normalized column names"""
+    header = pd.read_csv(csv_file, nrows=0).columns
+    names = {column: normalize_column(column) for column in header}
+    missing = set(COLUMNS) - set(names.values())
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
+
+    usecols = [column for column, name in names.items() if name in COLUMNS]
+    reader = pd.read_csv(
+        csv_file,
+        usecols=usecols,
+        dtype={column: COLUMNS[names[column]] for column in usecols},
+        chunksize=chunk_size,
+    )
+    for chunk in reader:
+        chunk = chunk.rename(columns=names)
+        chunk["city"] = chunk["city"].str.strip()
+        chunk["state"] = chunk["state"].str.strip().str.upper()
+        yield chunk
@@ -0,0 +1,11 @@
+from rest_framework.renderers import JSONRenderer
+
+from .metrics import span
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that records serialization as a pipeline stage"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with span("serialize"):
+            return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,491 @@
+import functools
+import heapq
+import json
+import math
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .geometry import (
+    EARTH_RADIUS_MILES,
+    MILES_PER_DEGREE_LAT,
+    GridBuckets,
+    haversine_miles,
+)
+
+# CSR arrays of a road graph directory, stored as .npy files
+ARRAYS = ("latitudes", "longitudes", "indptr", "indices", "weights")
+# Snap grid and contraction hierarchy arrays, stored with these prefixes
+GRID_ARRAYS = ("order", "keys", "starts", "counts")
+HIERARCHY_ARRAYS = ("indptr", "indices", "weights", "middles")
+
+# Nodes a witness search may settle before a shortcut is added anyway;
+# lower builds faster at the cost of some unneeded shortcuts
+WITNESS_SETTLE_LIMIT = 64
+
+
+def _haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Scalar great-circle miles, the A* heuristic"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(min(a, 1.0)))
+
+
+class Hierarchy(NamedTuple):
+    """Contraction hierarchy of a road graph in CSR form.
+
+    Row ``v`` holds the edges from ``v`` to nodes contracted after it:
+    roads, and shortcuts standing for the two-edge path through the
+    contracted node in ``middles`` (-1 for roads).
+    """
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+    middles: np.ndarray
+
+
+def _witness_distances(
+    adjacency: List[Dict[int, Tuple[float, int]]],
+    source: int,
+    skip: int,
+    limit: float,
+    targets: Iterable[int],
+) -> Dict[int, float]:
+    """Miles of paths from ``source`` that avoid ``skip``, searched up to
+    ``limit`` miles or ``WITNESS_SETTLE_LIMIT`` settled nodes"""
+    distances = {source: 0.0}
+    remaining = set(targets)
+    heap = [(0.0, source)]
+    settled = 0
+    while heap and remaining and settled < WITNESS_SETTLE_LIMIT:
+        miles, node = heapq.heappop(heap)
+        if miles > limit:
+            break
+        if miles > distances[node]:
+            continue
+        settled += 1
+        remaining.discard(node)
+        for neighbour, (weight, _) in adjacency[node].items():
+            total = miles + weight
+            if neighbour != skip and total < distances.get(neighbour, math.inf):
+                distances[neighbour] = total
+                heapq.heappush(heap, (total, neighbour))
+    return distances
+
+
+def _shortcuts(
+    adjacency: List[Dict[int, Tuple[float, int]]], node: int
+) -> List[Tuple[int, int, float]]:
+    """Shortcuts needed to keep distances when ``node`` is removed"""
+    edges = adjacency[node]
+    neighbours = list(edges)
+    shortcuts = []
+    for i, u in enumerate(neighbours):
+        via = {w: edges[u][0] + edges[w][0] for w in neighbours[i + 1 :]}
+        if not via:
+            continue
+        witness = _witness_distances(adjacency, u, node, max(via.values()), via)
+        shortcuts.extend(
+            (u, w, miles)
+            for w, miles in via.items()
+            if witness.get(w, math.inf) > miles
+        )
+    return shortcuts
+
+
+def contract(graph: "RoadGraph") -> Hierarchy:
+    """Contraction hierarchy of ``graph``.
+
+    Nodes are contracted in order of edge difference (shortcuts added minus
+    edges removed) plus contracted neighbours, with lazy priority updates.
+    """
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+    weights = graph.weights.tolist()
+    adjacency = [
+        {indices[e]: (weights[e], -1) for e in range(indptr[v], indptr[v + 1])}
+        for v in range(len(graph))
+    ]
+    contracted_neighbours = [0] * len(graph)
+
+    def priority(node: int) -> Tuple[int, List[Tuple[int, int, float]]]:
+        shortcuts = _shortcuts(adjacency, node)
+        edge_difference = len(shortcuts) - len(adjacency[node])
+        return edge_difference + contracted_neighbours[node], shortcuts
+
+    heap = [(priority(v)[0], v) for v in range(len(graph))]
+    heapq.heapify(heap)
+    upward: List[List[Tuple[int, float, int]]] = [[] for _ in range(len(graph))]
+    while heap:
+        _, node = heapq.heappop(heap)
+        current, shortcuts = priority(node)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, node))
+            continue
+
+        edges = adjacency[node]
+        upward[node] = [(other, w, middle) for other, (w, middle) in edges.items()]
+        for other in edges:
+            del adjacency[other][node]
+            contracted_neighbours[other] += 1
+        for u, w, miles in shortcuts:
+            if miles < adjacency[u].get(w, (math.inf, -1))[0]:
+                adjacency[u][w] = adjacency[w][u] = (miles, node)
+        adjacency[node] = {}
+
+    counts = [len(edges) for edges in upward]
+    rows = [edge for edges in upward for edge in edges]
+    hierarchy_indptr = np.zeros(len(graph) + 1, dtype=np.int64)
+    np.cumsum(counts, out=hierarchy_indptr[1:])
+    return Hierarchy(
+        hierarchy_indptr,
+        np.array([edge[0] for edge in rows], dtype=np.int32),
+        np.array([edge[1] for edge in rows], dtype=np.float64),
+        np.array([edge[2] for edge in rows], dtype=np.int32),
+    )
+
+
+class RoadGraph:
+    """Undirected road network in compressed sparse row form.
+
+    Nodes are polyline vertices with their coordinates; edge weights are
+    great-circle miles between consecutive vertices. Graphs built with a
+    contraction hierarchy answer shortest paths with a bidirectional search
+    over it that settles few nodes; without one, A* with the straight-line
+    distance is used. Arrays loaded from disk, including the hierarchy and
+    the snap grid, are memory-mapped and shared between worker processes by
+    the page cache.
+    """
+
+    def __init__(
+        self,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        weights: np.ndarray,
+        hierarchy: Optional[Hierarchy] = None,
+        grid: Optional[GridBuckets] = None,
+    ):
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.hierarchy = hierarchy
+        self.grid = grid or GridBuckets(
+            latitudes, longitudes, settings.ROAD_GRAPH_SNAP_CELL_DEGREES
+        )
+
+    @classmethod
+    def from_lines(
+        cls, lines: Iterable[Sequence[Sequence[float]]], precision: int = 5
+    ) -> "RoadGraph":
+        """Build a graph from (lng, lat) polylines, joining vertices that
+        coincide after rounding to ``precision`` decimals"""
+        points = []
+        for line in lines:
+            line = np.asarray(line, dtype=np.float64).reshape(-1, 2)
+            if len(line) >= 2:
+                points.append(np.round(line, precision))
+
+        if not points:
+            raise ValueError("No road lines to build a graph from")
+
+        sizes = np.array([len(line) for line in points])
+        vertices = np.concatenate(points)
+        coordinates, node = np.unique(vertices, axis=0, return_inverse=True)
+        node = node.reshape(-1)
+
+        # Consecutive vertices within a line form the edges
+        follows = np.ones(len(vertices), dtype=bool)
+        follows[np.cumsum(sizes) - 1] = False
+        tails = np.nonzero(follows)[0]
+        u, v = node[tails], node[tails + 1]
+        keep = u != v
+        u, v = u[keep], v[keep]
+        u, v = np.concatenate((u, v)), np.concatenate((v, u))
+        lat, lng = coordinates[:, 1], coordinates[:, 0]
+        w = haversine_miles(lat[u], lng[u], lat[v], lng[v])
+
+        # Parallel edges keep the shortest
+        order = np.lexsort((w, v, u))
+        u, v, w = u[order], v[order], w[order]
+        first = np.ones(len(u), dtype=bool)
+        first[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+        u, v, w = u[first], v[first], w[first]
+
+        indptr = np.zeros(len(coordinates) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(u, minlength=len(coordinates)), out=indptr[1:])
+        return cls(
+            lat.copy(),
+            lng.copy(),
+            indptr,
+            v.astype(np.int32),
+            w.astype(np.float32),
+        )
+
+    @classmethod
+    def load(cls, directory: Path) -> "RoadGraph":
+        directory = Path(directory)
+
+        def array(name: str) -> np.ndarray:
+            return np.load(directory / f"{name}.npy", mmap_mode="r")
+
+        meta_file = directory / "meta.json"
+        meta = json.loads(meta_file.read_text()) if meta_file.exists() else {}
+        hierarchy = None
+        if meta.get("hierarchy"):
+            hierarchy = Hierarchy(*(array(f"ch_{name}") for name in HIERARCHY_ARRAYS))
+        grid = None
+        if meta.get("snap_cell_degrees") == settings.ROAD_GRAPH_SNAP_CELL_DEGREES:
+            grid = GridBuckets.from_arrays(
+                meta["snap_cell_degrees"],
+                *(array(f"grid_{name}") for name in GRID_ARRAYS),
+            )
+        return cls(*(array(name) for name in ARRAYS), hierarchy=hierarchy, grid=grid)
+
+    def save(self, directory: Path, **meta):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(directory / f"{name}.npy", np.asarray(getattr(self, name)))
+        for name in GRID_ARRAYS:
+            np.save(
+                directory / f"grid_{name}.npy", np.asarray(getattr(self.grid, name))
+            )
+        if self.hierarchy is not None:
+            for name in HIERARCHY_ARRAYS:
+                np.save(
+                    directory / f"ch_{name}.npy",
+                    np.asarray(getattr(self.hierarchy, name)),
+                )
+        with open(directory / "meta.json", "w") as f:
+            json.dump(
+                {
+                    "nodes": len(self),
+                    "edges": len(self.indices),
+                    "hierarchy": self.hierarchy is not None,
+                    "snap_cell_degrees": self.grid.cell,
+                    **meta,
+                },
+                f,
+            )
+
+    def contract(self) -> Hierarchy:
+        """Build and keep the contraction hierarchy used for routing"""
+        self.hierarchy = contract(self)
+        return self.hierarchy
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    def nearest(self, lat: float, lng: float, max_miles: float) -> Optional[int]:
+        """Closest node within ``max_miles`` of a point"""
+        cell_miles = self.grid.cell * MILES_PER_DEGREE_LAT
+        ring_rows = math.ceil(max_miles / cell_miles)
+        ring_cols = math.ceil(ring_rows / max(math.cos(math.radians(lat)), 0.1))
+        _, candidates = self.grid.pairs(
+            np.array([lat]), np.array([lng]), ring_rows, ring_cols
+        )
+        if not len(candidates):
+            return None
+
+        distances = haversine_miles(
+            lat, lng, self.latitudes[candidates], self.longitudes[candidates]
+        )
+        best = int(np.argmin(distances))
+        return int(candidates[best]) if distances[best] <= max_miles else None
+
+    def shortest_path(
+        self, source: int, target: int
+    ) -> Optional[Tuple[List[int], float]]:
+        """Shortest path from source to target; returns the node path and
+        its miles"""
+        if self.hierarchy is not None:
+            return self._hierarchy_path(source, target)
+        return self._astar_path(source, target)
+
+    def _hierarchy_path(
+        self, source: int, target: int
+    ) -> Optional[Tuple[List[int], float]]:
+        """Bidirectional Dijkstra over the hierarchy's upward edges, then
+        shortcuts expanded back into roads"""
+        # Plain views of memory-mapped arrays index without memmap overhead
+        indptr = np.asarray(self.hierarchy.indptr)
+        indices = np.asarray(self.hierarchy.indices)
+        weights = np.asarray(self.hierarchy.weights)
+
+        distances: Tuple[Dict[int, float], ...] = ({source: 0.0}, {target: 0.0})
+        # Node each node was reached from, and the hierarchy edge used
+        parents: Tuple[Dict[int, Tuple[int, int]], ...] = ({}, {})
+        heaps = ([(0.0, source)], [(0.0, target)])
+        best, meeting = math.inf, -1
+        while heaps[0] or heaps[1]:
+            for side in (0, 1):
+                heap = heaps[side]
+                if not heap:
+                    continue
+                miles, node = heapq.heappop(heap)
+                if miles >= best:
+                    # Nothing left on this side can improve the path
+                    heap.clear()
+                    continue
+                if miles > distances[side][node]:
+                    continue
+
+                other = distances[1 - side].get(node)
+                if other is not None and miles + other < best:
+                    best, meeting = miles + other, node
+
+                start, end = int(indptr[node]), int(indptr[node + 1])
+                for edge, (neighbour, weight) in enumerate(
+                    zip(indices[start:end].tolist(), weights[start:end].tolist()),
+                    start,
+                ):
+                    total = miles + weight
+                    if total < distances[side].get(neighbour, math.inf):
+                        distances[side][neighbour] = total
+                        parents[side][neighbour] = (node, edge)
+                        heapq.heappush(heap, (total, neighbour))
+
+        if meeting < 0:
+            return None
+
+        # Hierarchy edges from the source up to the meeting node and down
+        up, node = [], meeting
+        while node in parents[0]:
+            previous, edge = parents[0][node]
+            up.append((previous, node, edge))
+            node = previous
+        down, node = [], meeting
+        while node in parents[1]:
+            following, edge = parents[1][node]
+            down.append((node, following, edge))
+            node = following
+
+        path = [source]
+        for a, b, edge in up[::-1] + down:
+            path.extend(self._unpack(a, b, edge))
+        return path, best
+
+    def _unpack(self, a: int, b: int, edge: int) -> List[int]:
+        """Road nodes after ``a`` up to ``b`` along hierarchy ``edge``. The
+        two halves of a shortcut start at its middle node, the lowest of the
+        three, so they are found in the middle node's row."""
+        indptr = np.asarray(self.hierarchy.indptr)
+        indices = np.asarray(self.hierarchy.indices)
+        middles = np.asarray(self.hierarchy.middles)
+        nodes = []
+        stack = [(a, b, edge)]
+        while stack:
+            u, w, edge = stack.pop()
+            middle = int(middles[edge])
+            if middle < 0:
+                nodes.append(w)
+                continue
+            start, end = int(indptr[middle]), int(indptr[middle + 1])
+            row = indices[start:end].tolist()
+            stack.append((middle, w, start + row.index(w)))
+            stack.append((u, middle, start + row.index(u)))
+        return nodes
+
+    def _astar_path(
+        self, source: int, target: int
+    ) -> Optional[Tuple[List[int], float]]:
+        """A* with the straight-line distance, for graphs without a hierarchy"""
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        latitudes, longitudes = self.latitudes, self.longitudes
+        target_lat, target_lng = float(latitudes[target]), float(longitudes[target])
+
+        def estimate(node: int) -> float:
+            return _haversine(
+                float(latitudes[node]), float(longitudes[node]), target_lat, target_lng
+            )
+
+        cost: Dict[int, float] = {source: 0.0}
+        parent: Dict[int, int] = {source: -1}
+        closed = set()
+        heap = [(estimate(source), 0.0, source)]
+        while heap:
+            _, miles, node = heapq.heappop(heap)
+            if node == target:
+                break
+            if node in closed:
+                continue
+            closed.add(node)
+
+            start, end = int(indptr[node]), int(indptr[node + 1])
+            for neighbour, weight in zip(
+                indices[start:end].tolist(), weights[start:end].tolist()
+            ):
+                total = miles + weight
+                if total < cost.get(neighbour, math.inf):
+                    cost[neighbour] = total
+                    parent[neighbour] = node
+                    heapq.heappush(
+                        heap, (total + estimate(neighbour), total, neighbour)
+                    )
+        else:
+            return None
+
+        path = [target]
+        while parent[path[-1]] != -1:
+            path.append(parent[path[-1]])
+        return path[::-1], cost[target]
+
+
+@functools.lru_cache(maxsize=None)
+def load_road_graph(directory: str) -> RoadGraph:
+    return RoadGraph.load(Path(directory))
+
+
+class RoadGraphRouter:
+    """In-process routing client with the ``openrouteservice.Client`` call
+    shape, answering from a local road graph"""
+
+    def __init__(self, graph: RoadGraph):
+        self.graph = graph
+
+    def directions(
+        self, coordinates, profile="driving-car", format="geojson", **kwargs
+    ):
+        graph = self.graph
+        nodes = []
+        for lng, lat in coordinates:
+            node = graph.nearest(lat, lng, settings.ROAD_GRAPH_MAX_SNAP_MILES)
+            if node is None:
+                return {"type": "FeatureCollection", "features": []}
+            nodes.append(node)
+
+        path: List[int] = []
+        segments = []
+        for source, target in zip(nodes, nodes[1:]):
+            leg = graph.shortest_path(source, target)
+            if leg is None:
+                return {"type": "FeatureCollection", "features": []}
+            path.extend(leg[0] if not path else leg[0][1:])
+            segments.append({"distance": leg[1] / settings.METERS_TO_MILES})
+
+        if len(path) == 1:
+            path.append(path[0])
+        geometry = np.column_stack((graph.longitudes[path], graph.latitudes[path]))
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "LineString",
+                        "coordinates": geometry.tolist(),
+                    },
+                    "properties": {"segments": segments},
+                }
+            ],
+        }
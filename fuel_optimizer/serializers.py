@@ -1,11 +1,47 @@
+from django.conf import settings
 from django.core.validators import RegexValidator
 from rest_framework import serializers
 
+from .vehicles import VehicleProfile
+
 INVALID_LOCATION = (
     "Location must contain only letters, numbers, spaces, commas, periods, and hyphens"
 )
 
 
+class VehicleProfileSerializer(serializers.Serializer):
+    name = serializers.CharField(
+        max_length=50, default="", help_text="Label in the response"
+    )
+    mpg = serializers.FloatField(min_value=0.5, max_value=100)
+    range_miles = serializers.FloatField(
+        min_value=1, required=False, help_text="Miles on a full tank"
+    )
+    tank_gallons = serializers.FloatField(
+        min_value=1, required=False, help_text="Usable tank capacity"
+    )
+    start_fuel_gallons = serializers.FloatField(
+        min_value=0, required=False, help_text="Fuel at departure; full if omitted"
+    )
+    reserve_miles = serializers.FloatField(
+        min_value=0, default=0, help_text="Range never planned to be used"
+    )
+
+    def validate(self, data):
+        if "range_miles" not in data and "tank_gallons" not in data:
+            raise serializers.ValidationError(
+                "Either range_miles or tank_gallons is required"
+            )
+        if data.get("start_fuel_gallons", 0) > data.get("tank_gallons", float("inf")):
+            raise serializers.ValidationError(
+                "start_fuel_gallons cannot exceed tank_gallons"
+            )
+        vehicle = VehicleProfile.create(**data)
+        if vehicle.reserve_miles >= vehicle.range_miles:
+            raise serializers.ValidationError("reserve_miles must be below the range")
+        return vehicle
+
+
 class RouteOptimizationRequestSerializer(serializers.Serializer):
     start = serializers.CharField(
         max_length=200,
@@ -21,10 +57,64 @@ class RouteOptimizationRequestSerializer(serializers.Serializer):
             RegexValidator(regex=r"^[a-zA-Z0-9\s,.-]+$", message=INVALID_LOCATION)
         ],
     )
+    waypoints = serializers.ListField(
+        child=serializers.CharField(
+            max_length=200,
+            validators=[
+                RegexValidator(regex=r"^[a-zA-Z0-9\s,.-]+$", message=INVALID_LOCATION)
+            ],
+        ),
+        required=False,
+        max_length=settings.MAX_WAYPOINTS,
+        help_text="Intermediate stops visited in order between start and end",
+    )
+    geometry_format = serializers.ChoiceField(
+        choices=["geojson", "polyline"],
+        required=False,
+        help_text="Route geometry format: GeoJSON LineString or encoded polyline",
+    )
+    vehicles = VehicleProfileSerializer(
+        many=True,
+        required=False,
+        allow_empty=False,
+        help_text="Vehicle profiles to plan on the same route, each separately",
+    )
+
+    def validate_vehicles(self, vehicles):
+        if len(vehicles) > settings.MAX_VEHICLE_PROFILES:
+            raise serializers.ValidationError(
+                f"At most {settings.MAX_VEHICLE_PROFILES} vehicles per route"
+            )
+        vehicles = [
+            vehicle if vehicle.name else vehicle._replace(name=f"vehicle {i}")
+            for i, vehicle in enumerate(vehicles, 1)
+        ]
+        if len({vehicle.name for vehicle in vehicles}) < len(vehicles):
+            raise serializers.ValidationError("Vehicle names must be unique")
+        return vehicles
 
     def validate(self, data):
-        if data["start"].lower().strip() == data["end"].lower().strip():
+        # Round trips are fine as long as they visit somewhere in between
+        if (
+            not data.get("waypoints")
+            and data["start"].lower().strip() == data["end"].lower().strip()
+        ):
             raise serializers.ValidationError(
                 "Start and end locations must be different"
             )
         return data
+
+
+class RouteOptimizationBatchSerializer(serializers.Serializer):
+    routes = RouteOptimizationRequestSerializer(
+        many=True,
+        allow_empty=False,
+        help_text="Start/end pairs to optimize, each with its own options",
+    )
+
+    def validate_routes(self, routes):
+        if len(routes) > settings.BATCH_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"At most {settings.BATCH_MAX_ITEMS} routes per batch"
+            )
+        return routes
@@ -1,43 +1,288 @@
+import asyncio
+import contextvars
+import functools
 import hashlib
 import logging
-from typing import Dict, List, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import openrouteservice
 from django.conf import settings
-from django.core.cache import cache
 from geopy.exc import GeocoderServiceError, GeocoderTimedOut
-from geopy.geocoders import ArcGIS
 
-from .models import FuelStation
+from .backends import get_geocoder, get_routing_client
+from .boundary import get_us_boundary
+from .cache import SingleFlight, get_cache
+from .gazetteer import get_gazetteer
+from .geocoding import normalize_location
+from .geometry import RouteGeometry
+from .lanes import Lane, get_lane_table
+from .metrics import RESULT_CACHE_TOTAL, metrics, span, timed
+from .planner import effective_prices, plan_refueling, prune_dominated
+from .polyline import encode, pack_route, simplify, unpack_route
+from .spatial import StationIndex, get_station_index, station_version
+from .vehicles import VehicleProfile, default_vehicle
 
 logger = logging.getLogger("fuel_optimizer")
 
+# Station index with positions, mile markers and off-route distances of the
+# stations along a route
+Corridor = Tuple[StationIndex, np.ndarray, np.ndarray, np.ndarray]
+
+_optimize_flights = SingleFlight()
+
+
+def capture(fn, *args) -> Tuple[Any, Optional[Exception]]:
+    """Call ``fn`` and return (result, None) or (None, exception)"""
+    try:
+        return fn(*args), None
+    except Exception as e:
+        return None, e
+
+
+def _describe(result: Dict) -> str:
+    if "vehicles" in result:
+        return f"{len(result['vehicles'])} vehicle plans"
+    return f"{result['stops_count']} stops, ${result['total_fuel_cost']:.2f}"
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValueError):
+        return str(error)
+    logger.error(f"Unexpected error: {error}")
+    return "Internal server error"
+
 
 class RouteOptimizationService:
     """Route optimization service"""
 
     def __init__(self):
-        self.ors_client = openrouteservice.Client(key=settings.OPENROUTE_API_KEY)
-        self.geocoder = ArcGIS(timeout=10)
+        self.ors_client = get_routing_client()
+        self.geocoder = get_geocoder()
+        self.cache = get_cache()
+
+    def optimize_route(
+        self,
+        start_location: str,
+        end_location: str,
+        geometry_format: Optional[str] = None,
+        waypoints: Sequence[str] = (),
+        vehicles: Optional[Sequence[VehicleProfile]] = None,
+    ) -> Dict:
+        """Main optimization method, cached per normalized lane"""
+        cache_key = self.result_cache_key(
+            start_location, end_location, geometry_format, waypoints, vehicles
+        )
+        result = self.cache.get(cache_key)
+        metrics.increment(RESULT_CACHE_TOTAL, outcome="hit" if result else "miss")
 
-    def optimize_route(self, start_location: str, end_location: str) -> Dict:
-        """Main optimization method"""
-        try:
-            # Geocode locations
-            start_coords = self.geocode(start_location)
-            end_coords = self.geocode(end_location)
+        if result:
+            return result
 
-            # Get route
-            route_data = self.get_route(start_coords, end_coords)
+        # Concurrent identical requests share one computation
+        return _optimize_flights.do(
+            cache_key,
+            lambda: self._optimize_and_cache(
+                cache_key,
+                start_location,
+                end_location,
+                geometry_format,
+                waypoints,
+                vehicles,
+            ),
+        )
 
-            # Find fuel stops
-            fuel_stops = self.find_fuel_stops(route_data)
+    def result_cache_key(
+        self,
+        start_location: str,
+        end_location: str,
+        geometry_format: Optional[str] = None,
+        waypoints: Sequence[str] = (),
+        vehicles: Optional[Sequence[VehicleProfile]] = None,
+    ) -> str:
+        """Cache key for a full result; changes when station data is reloaded"""
+        lane = "|".join(
+            [
+                normalize_location(start_location),
+                normalize_location(end_location),
+                str(settings.VEHICLE_RANGE_MILES),
+                str(settings.VEHICLE_MPG),
+                geometry_format or settings.ROUTE_GEOMETRY_FORMAT,
+                str(station_version()),
+                *(normalize_location(waypoint) for waypoint in waypoints),
+            ]
+        )
+        if vehicles is not None:
+            lane += "|vehicles:" + ",".join(v.cache_key() for v in vehicles)
+        return f"optimize_{hashlib.md5(lane.encode()).hexdigest()}"
+
+    def optimize_batch(self, items: List[Dict]) -> List[Dict]:
+        """Optimize many start/end pairs in one call.
+
+        Cached results are reused, each distinct address is geocoded once and
+        each distinct route fetched once, with at most BATCH_WORKERS lookups
+        in flight. Every trip is planned against the same station index
+        snapshot. Returns a ``result`` or an ``error`` for each item, in order.
+        """
+        outcomes: List[Dict] = [{} for _ in items]
+        pending: Dict[str, List[int]] = {}
+        for i, item in enumerate(items):
+            key = self.result_cache_key(
+                item["start"],
+                item["end"],
+                item.get("geometry_format"),
+                item.get("waypoints", ()),
+                item.get("vehicles"),
+            )
+            cached = self.cache.get(key)
+            metrics.increment(RESULT_CACHE_TOTAL, outcome="hit" if cached else "miss")
+            if cached:
+                outcomes[i]["result"] = cached
+            else:
+                pending.setdefault(key, []).append(i)
+
+        if pending:
+            index = get_station_index()
+            trips = {key: items[positions[0]] for key, positions in pending.items()}
+            lanes = {
+                key: (
+                    None
+                    if item.get("waypoints")
+                    else self.match_lane(item["start"], item["end"])
+                )
+                for key, item in trips.items()
+            }
 
-            # Calculate costs
-            result = self.calculate_costs(route_data, fuel_stops)
+            with ThreadPoolExecutor(max_workers=settings.BATCH_WORKERS) as pool:
+                # Geocode each distinct address once
+                addresses = {}
+                for key, item in trips.items():
+                    if not lanes[key]:
+                        for address in self.trip_stops(item):
+                            addresses.setdefault(normalize_location(address), address)
+                geocodes = dict(
+                    zip(
+                        addresses,
+                        pool.map(
+                            functools.partial(capture, self.geocode),
+                            addresses.values(),
+                        ),
+                    )
+                )
+
+                # Fetch each distinct route once
+                endpoints, errors = {}, {}
+                for key, item in trips.items():
+                    if lanes[key]:
+                        continue
+                    stops = [
+                        geocodes[normalize_location(a)] for a in self.trip_stops(item)
+                    ]
+                    errors[key] = next((e for _, e in stops if e), None)
+                    if not errors[key]:
+                        endpoints[key] = tuple(coords for coords, _ in stops)
+                pairs = list(dict.fromkeys(endpoints.values()))
+                routes = dict(
+                    zip(
+                        pairs,
+                        pool.map(
+                            lambda p: capture(self.get_route, p[0], p[-1], p[1:-1]),
+                            pairs,
+                        ),
+                    )
+                )
+
+            for key, item in trips.items():
+                lane = lanes[key]
+                if lane:
+                    route_data, error = lane.route, None
+                elif key in endpoints:
+                    route_data, error = routes[endpoints[key]]
+                else:
+                    error = errors[key]
+
+                if not error:
+                    result, error = capture(
+                        self.plan_route,
+                        route_data,
+                        item.get("geometry_format"),
+                        lane,
+                        index,
+                        item.get("vehicles"),
+                    )
+                if error:
+                    outcome = {"error": _error_message(error)}
+                else:
+                    self.cache.set(key, result, settings.OPTIMIZE_CACHE_TIMEOUT)
+                    outcome = {"result": result}
+                for i in pending[key]:
+                    outcomes[i] = outcome
+
+            logger.info(
+                f"Batch optimized: {len(items)} items, {len(trips)} computed, "
+                f"{len(addresses)} geocodes, {len(pairs)} routes"
+            )
+
+        return [
+            {"start": item["start"], "end": item["end"], **outcome}
+            for item, outcome in zip(items, outcomes)
+        ]
+
+    @staticmethod
+    def trip_stops(item: Dict) -> List[str]:
+        """Locations of a trip or batch item in driving order"""
+        return [item["start"], *item.get("waypoints", ()), item["end"]]
+
+    def _optimize_and_cache(
+        self,
+        cache_key: str,
+        start_location: str,
+        end_location: str,
+        geometry_format: Optional[str],
+        waypoints: Sequence[str] = (),
+        vehicles: Optional[Sequence[VehicleProfile]] = None,
+    ) -> Dict:
+        # Another process may have finished the same lane while we waited
+        result = self.cache.get(cache_key)
+        if result:
+            return result
+
+        result = self._optimize(
+            start_location, end_location, geometry_format, waypoints, vehicles
+        )
+        self.cache.set(cache_key, result, settings.OPTIMIZE_CACHE_TIMEOUT)
+        return result
+
+    def _optimize(
+        self,
+        start_location: str,
+        end_location: str,
+        geometry_format: Optional[str] = None,
+        waypoints: Sequence[str] = (),
+        vehicles: Optional[Sequence[VehicleProfile]] = None,
+    ) -> Dict:
+        try:
+            # Precomputed lanes skip geocoding, routing and the corridor query
+            lane = None if waypoints else self.match_lane(start_location, end_location)
+            if lane:
+                result = self.plan_route(
+                    lane.route, geometry_format, lane, vehicles=vehicles
+                )
+            else:
+                # Geocode locations
+                start_coords = self.geocode(start_location)
+                via_coords = [self.geocode(waypoint) for waypoint in waypoints]
+                end_coords = self.geocode(end_location)
+
+                # Get route, all legs in one request
+                route_data = self.get_route(start_coords, end_coords, via_coords)
+
+                result = self.plan_route(route_data, geometry_format, vehicles=vehicles)
             logger.info(
                 f"Route optimized: {start_location} -> {end_location}, "
-                f"{len(fuel_stops)} stops, ${result['total_fuel_cost']:.2f}"
+                f"{_describe(result)}"
             )
 
             return result
@@ -46,37 +291,109 @@ class RouteOptimizationService:
             logger.error(f"Route optimization failed: {e}")
             raise
 
+    def match_lane(self, start_location: str, end_location: str) -> Optional[Lane]:
+        """Precomputed lane for this start and end, if one was built"""
+        return get_lane_table().match(start_location, end_location)
+
+    def plan_route(
+        self,
+        route_data: Dict,
+        geometry_format: Optional[str] = None,
+        lane: Optional[Lane] = None,
+        index: Optional[StationIndex] = None,
+        vehicles: Optional[Sequence[VehicleProfile]] = None,
+    ):
+        """Fuel stops and costs for an already routed trip.
+
+        Without ``vehicles`` the configured vehicle is planned in the classic
+        response shape. With them, the route, its projection and the corridor
+        stations are computed once and each profile gets its own plan.
+        """
+        # Project the route once and share it with stop selection
+        geometry = None if lane else RouteGeometry.from_route(route_data)
+
+        if vehicles is None:
+            # Find fuel stops
+            fuel_stops = self.find_fuel_stops(route_data, geometry, lane, index)
+
+            # Calculate costs
+            return self.calculate_costs(route_data, fuel_stops, geometry_format)
+
+        corridor = None
+        if any(route_data["distance_miles"] > v.usable_start_miles for v in vehicles):
+            corridor = self.corridor_stations(route_data, geometry, lane, index)
+
+        plans = []
+        for vehicle in vehicles:
+            try:
+                fuel_stops = self.find_fuel_stops(
+                    route_data, geometry, lane, index, vehicle, corridor
+                )
+                plans.append(
+                    {
+                        "vehicle": vehicle.name,
+                        **self.fuel_summary(route_data, fuel_stops, vehicle),
+                    }
+                )
+            except ValueError as e:
+                plans.append({"vehicle": vehicle.name, "error": str(e)})
+
+        return {
+            **self.route_summary(route_data, geometry_format),
+            "vehicles": plans,
+        }
+
+    @timed("geocode")
     def geocode(self, address: str) -> Tuple[float, float]:
-        """Geocode address and validate it's in the USA using reverse geocoding"""
+        """Geocode address and validate it's in the USA, reverse geocoding only
+        near land borders. "City, ST" inputs found in the gazetteer never
+        leave the process."""
+        if settings.GAZETTEER_ENABLED:
+            coords = get_gazetteer().lookup(address)
+            if coords:
+                return coords
+
         cache_key = (
             f"geocode_{hashlib.md5(address.lower().strip().encode()).hexdigest()}"
         )
-        cached_result = cache.get(cache_key)
+        cached_result = self.cache.get(cache_key)
 
         if cached_result:
             return cached_result
 
         try:
             # First, geocode the address to get coordinates
-            location = self.geocoder.geocode(address, timeout=10)
+            location = self.geocoder.geocode(address)
 
             if not location:
                 raise ValueError(f"Location not found: {address}")
 
             coords = (location.latitude, location.longitude)
 
-            # Reverse geocode to get country information
-            reverse_location = self.geocoder.reverse(coords, timeout=5)
-            country_code = reverse_location[0].rsplit(",", maxsplit=1)[-1].strip()
-            usa_codes = ["USA", "US", "UNITED STATES", "UNITED STATES OF AMERICA"]
-
-            if country_code.upper() not in usa_codes:
+            # Offline boundary check; only points near a border go remote
+            in_usa = get_us_boundary().contains(*coords)
+            if in_usa is False:
                 raise ValueError(
-                    f"Location must be within the USA. '{address}' is in {country_code}"
+                    f"Location must be within the USA. '{address}' is outside the USA"
                 )
 
+            if in_usa is None:
+                # Reverse geocode to get country information
+                with span("reverse_geocode"):
+                    reverse_location = self.geocoder.reverse(
+                        coords, timeout=settings.GEOCODER_REVERSE_TIMEOUT
+                    )
+                country_code = reverse_location[0].rsplit(",", maxsplit=1)[-1].strip()
+                usa_codes = ["USA", "US", "UNITED STATES", "UNITED STATES OF AMERICA"]
+
+                if country_code.upper() not in usa_codes:
+                    raise ValueError(
+                        f"Location must be within the USA. "
+                        f"'{address}' is in {country_code}"
+                    )
+
             # Cache the result
-            cache.set(cache_key, coords, settings.GEOCODING_CACHE_TIMEOUT)
+            self.cache.set(cache_key, coords, settings.GEOCODING_CACHE_TIMEOUT)
             return coords
 
         except (GeocoderTimedOut, GeocoderServiceError) as e:
@@ -95,22 +412,25 @@ class RouteOptimizationService:
             logger.error(f"Unexpected geocoding error for '{address}': {e}")
             raise ValueError(f"Location must be within the USA: {address}")
 
+    @timed("route")
     def get_route(
-        self, start_coords: Tuple[float, float], end_coords: Tuple[float, float]
+        self,
+        start_coords: Tuple[float, float],
+        end_coords: Tuple[float, float],
+        via_coords: Sequence[Tuple[float, float]] = (),
     ) -> Dict:
-        """Get route between two points"""
-        route_key = f"{start_coords}:{end_coords}"
-        cache_key = f"route_{hashlib.md5(route_key.encode()).hexdigest()}"
-        route = cache.get(cache_key)
+        """Get route between two points, through any waypoints in order"""
+        points = [start_coords, *via_coords, end_coords]
+        route_key = ":".join(str(point) for point in points)
+        cache_key = f"route_v2_{hashlib.md5(route_key.encode()).hexdigest()}"
+        packed = self.cache.get(cache_key)
 
-        if route:
-            return route
+        if packed:
+            return unpack_route(packed)
 
         try:
-            coordinates = [
-                [start_coords[1], start_coords[0]],  # OpenRouteService wants (lng, lat)
-                [end_coords[1], end_coords[0]],
-            ]
+            # OpenRouteService wants (lng, lat)
+            coordinates = [[lng, lat] for lat, lng in points]
 
             routes = self.ors_client.directions(
                 coordinates=coordinates, profile="driving-car", format="geojson"
@@ -121,15 +441,28 @@ class RouteOptimizationService:
 
             feature = routes["features"][0]
             properties = feature["properties"]
+            coordinates = simplify(
+                feature["geometry"]["coordinates"],
+                settings.ROUTE_SIMPLIFY_TOLERANCE_MILES,
+            )
 
+            legs = [
+                segment["distance"] * settings.METERS_TO_MILES
+                for segment in properties["segments"]
+            ]
             route = {
-                "geometry": feature["geometry"],
-                "distance_miles": properties["segments"][0]["distance"]
-                * settings.METERS_TO_MILES,
-                "coordinates": feature["geometry"]["coordinates"],
+                "geometry": {"type": "LineString", "coordinates": coordinates},
+                "distance_miles": sum(legs),
+                "coordinates": coordinates,
             }
+            if len(legs) > 1:
+                route["leg_distances_miles"] = legs
 
-            cache.set(cache_key, route, settings.ROUTE_CACHE_TIMEOUT)
+            self.cache.set(
+                cache_key,
+                pack_route(route, settings.POLYLINE_PRECISION),
+                settings.ROUTE_CACHE_TIMEOUT,
+            )
             return route
 
         except openrouteservice.exceptions.ApiError as e:
@@ -139,82 +472,355 @@ class RouteOptimizationService:
             logger.error(f"Unexpected routing error: {e}")
             raise ValueError("Routing service unavailable")
 
-    def find_fuel_stops(self, route_data: Dict) -> List[Dict]:
-        """Find optimal fuel stops along route"""
+    def corridor_stations(
+        self,
+        route_data: Dict,
+        geometry: Optional[RouteGeometry] = None,
+        lane: Optional[Lane] = None,
+        index: Optional[StationIndex] = None,
+    ) -> Corridor:
+        """Station index with positions, mile markers and detours of the
+        stations in the corridor around the route, cached with the route"""
+        if index is None:
+            index = get_station_index()
+        if lane is not None and lane.version == index.version:
+            # Corridor stations precomputed for this lane
+            return index, lane.positions, lane.mile_markers, lane.detour_miles
+
+        # Fresh and cached (polyline encoded) routes must share the key
+        points = np.asarray(route_data["coordinates"], dtype=np.float64)
+        points = np.rint(points * 10**settings.POLYLINE_PRECISION).astype(np.int64)
+        route_hash = hashlib.md5(points.tobytes()).hexdigest()
+        cache_key = (
+            f"corridor_{index.fingerprint}_"
+            f"{settings.CORRIDOR_RADIUS_MILES:g}_{route_hash}"
+        )
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return (index, *cached)
+
+        # Get stations within the corridor around the route polyline
+        geometry = geometry or RouteGeometry.from_route(route_data)
+        positions, detours, mile_markers = index.near_route(
+            geometry, settings.CORRIDOR_RADIUS_MILES
+        )
+        self.cache.set(
+            cache_key,
+            (positions, mile_markers, detours),
+            settings.ROUTE_CACHE_TIMEOUT,
+        )
+        return index, positions, mile_markers, detours
+
+    @timed("fuel_stops")
+    def find_fuel_stops(
+        self,
+        route_data: Dict,
+        geometry: Optional[RouteGeometry] = None,
+        lane: Optional[Lane] = None,
+        index: Optional[StationIndex] = None,
+        vehicle: Optional[VehicleProfile] = None,
+        corridor: Optional[Corridor] = None,
+    ) -> List[Dict]:
+        """Find optimal fuel stops along route, pricing in the detour to
+        each station"""
         distance_miles = route_data["distance_miles"]
+        vehicle = vehicle or default_vehicle()
 
         # No stops needed for short trips
-        if distance_miles <= settings.VEHICLE_RANGE_MILES:
+        if distance_miles <= vehicle.usable_start_miles:
             return []
 
         try:
-            # Get all stations within route bounding box
-            coordinates = route_data["coordinates"]
-            min_lat = min(coord[1] for coord in coordinates)
-            max_lat = max(coord[1] for coord in coordinates)
-            min_lng = min(coord[0] for coord in coordinates)
-            max_lng = max(coord[0] for coord in coordinates)
-
-            stations = FuelStation.objects.filter(
-                latitude__gte=min_lat,
-                latitude__lte=max_lat,
-                longitude__gte=min_lng,
-                longitude__lte=max_lng,
-            ).order_by("retail_price")
-
-            if not stations.exists():
-                logger.warning("No fuel stations found in route area")
-                return []
-
-            # Calculate number of fuel stops needed
-            stops_needed = max(1, int(distance_miles / settings.VEHICLE_RANGE_MILES))
-
-            # Find the cheapest station for each stop
+            index, positions, mile_markers, detours = (
+                corridor or self.corridor_stations(route_data, geometry, lane, index)
+            )
+
+            if not len(positions):
+                logger.warning("No fuel stations found along route")
+
+            prices = effective_prices(
+                index.prices[positions],
+                detours,
+                vehicle.usable_range_miles,
+                settings.DETOUR_DISTANCE_FACTOR,
+            )
+            candidates = prune_dominated(
+                mile_markers, prices, settings.DETOUR_PRUNE_WINDOW_MILES
+            )
+
+            # Plan the cheapest range-feasible sequence of stops
+            def plan(candidates):
+                return plan_refueling(
+                    mile_markers[candidates],
+                    prices[candidates],
+                    distance_miles,
+                    vehicle.usable_range_miles,
+                    vehicle.mpg,
+                    vehicle.usable_start_miles,
+                    # Half the detour is driven leaving the route, half back
+                    detours[candidates] * settings.DETOUR_DISTANCE_FACTOR / 2,
+                )
+
+            try:
+                stops = plan(candidates)
+            except ValueError:
+                # Pruning can leave a gap longer than the range; use them all
+                candidates = np.arange(len(positions))
+                stops = plan(candidates)
+
             fuel_stops = []
-            for _ in range(stops_needed):
-                station = self.find_cheapest_station(stations)
-                if station:
-                    fuel_stops.append(
-                        {
-                            "name": station.name,
-                            "city": station.city,
-                            "state": station.state,
-                            "price": float(station.retail_price),
-                            "coordinates": list(station.coordinates),
-                        }
-                    )
+            for stop in stops:
+                candidate = candidates[stop.candidate]
+                station = index.station(positions[candidate])
+                detour = float(detours[candidate])
+                # Planned gallons include the fuel burned on detours
+                gallons = stop.gallons
+                fuel_stops.append(
+                    {
+                        "name": station.name,
+                        "city": station.city,
+                        "state": station.state,
+                        "price": float(station.retail_price),
+                        "coordinates": list(station.coordinates),
+                        "mile_marker": round(stop.mile_marker, 1),
+                        "detour_miles": round(detour, 1),
+                        "gallons": round(gallons, 2),
+                        "cost": round(gallons * float(station.retail_price), 2),
+                    }
+                )
 
             return fuel_stops
 
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Error finding fuel stops: {e}")
             return []
 
-    def find_cheapest_station(self, stations) -> Optional[FuelStation]:
-        """Find cheapest fuel station from available stations"""
-        cheapest, min_price = None, float("inf")
-        for st in stations:
-            if st.retail_price < min_price:
-                cheapest, min_price = st, st.retail_price
-        return cheapest
-
-    def calculate_costs(self, route_data: Dict, fuel_stops: List[Dict]) -> Dict:
+    @timed("costs")
+    def calculate_costs(
+        self,
+        route_data: Dict,
+        fuel_stops: List[Dict],
+        geometry_format: Optional[str] = None,
+        vehicle: Optional[VehicleProfile] = None,
+    ) -> Dict:
         """Calculate trip costs"""
-        distance_miles = route_data["distance_miles"]
-        total_gallons = distance_miles / settings.VEHICLE_MPG
+        fuel = self.fuel_summary(route_data, fuel_stops, vehicle)
+        route = self.route_summary(route_data, geometry_format)
+        return {
+            "fuel_stops": fuel.pop("fuel_stops"),
+            "total_distance_miles": route.pop("total_distance_miles"),
+            **fuel,
+            **route,
+        }
 
-        if not fuel_stops:
-            # No stops → no cost
-            total_cost = 0.0
-        else:
-            avg_price = sum(stop["price"] for stop in fuel_stops) / len(fuel_stops)
-            total_cost = total_gallons * avg_price
+    def fuel_summary(
+        self,
+        route_data: Dict,
+        fuel_stops: List[Dict],
+        vehicle: Optional[VehicleProfile] = None,
+    ) -> Dict:
+        """Fuel used and bought by one vehicle"""
+        mpg = (vehicle or default_vehicle()).mpg
+        detour_miles = settings.DETOUR_DISTANCE_FACTOR * sum(
+            stop.get("detour_miles", 0.0) for stop in fuel_stops
+        )
 
+        # Fuel already in the tank is paid for, so cost is what gets bought
+        total_cost = sum(stop["cost"] for stop in fuel_stops)
         return {
-            "route_geometry": route_data["geometry"],
             "fuel_stops": fuel_stops,
-            "total_distance_miles": round(distance_miles, 1),
             "total_fuel_cost": round(total_cost, 2),
-            "estimated_gallons": round(total_gallons, 1),
+            "estimated_gallons": round(
+                (route_data["distance_miles"] + detour_miles) / mpg, 1
+            ),
             "stops_count": len(fuel_stops),
         }
+
+    def route_summary(
+        self, route_data: Dict, geometry_format: Optional[str] = None
+    ) -> Dict:
+        """Distance and geometry of the trip, shared by every vehicle"""
+        result = {"total_distance_miles": round(route_data["distance_miles"], 1)}
+
+        if "leg_distances_miles" in route_data:
+            result["leg_distances_miles"] = [
+                round(leg, 1) for leg in route_data["leg_distances_miles"]
+            ]
+
+        if (geometry_format or settings.ROUTE_GEOMETRY_FORMAT) == "polyline":
+            result["route_polyline"] = encode(
+                route_data["coordinates"], settings.POLYLINE_PRECISION
+            )
+        else:
+            result["route_geometry"] = route_data["geometry"]
+        return result
+
+
+class AsyncRouteOptimizationService:
+    """Async front end for RouteOptimizationService.
+
+    Blocking geocoder, ORS and database calls run on a shared thread pool so
+    one ASGI worker can keep many requests in flight. Start and end are
+    geocoded concurrently, and all requests share the wrapped service's HTTP
+    sessions.
+    """
+
+    def __init__(
+        self,
+        service: Optional[RouteOptimizationService] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ):
+        self.service = service or get_route_optimization_service()
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=settings.ASYNC_IO_WORKERS, thread_name_prefix="optimize-io"
+        )
+        self._flights: Dict[str, asyncio.Future] = {}
+
+    async def _run(self, fn, *args):
+        # Carry the request context (stage timings) into the worker thread
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(context.run, fn, *args)
+        )
+
+    async def optimize_route(
+        self,
+        start_location: str,
+        end_location: str,
+        geometry_format: Optional[str] = None,
+        waypoints: Sequence[str] = (),
+        vehicles: Optional[Sequence[VehicleProfile]] = None,
+    ) -> Dict:
+        """Main optimization method, cached per normalized lane"""
+        cache_key = await self._run(
+            self.service.result_cache_key,
+            start_location,
+            end_location,
+            geometry_format,
+            waypoints,
+            vehicles,
+        )
+        result = await self._run(self.service.cache.get, cache_key)
+        metrics.increment(RESULT_CACHE_TOTAL, outcome="hit" if result else "miss")
+
+        if result:
+            return result
+
+        # Concurrent identical requests on this event loop await one task
+        flight = self._flights.get(cache_key)
+        if flight is None:
+            flight = asyncio.ensure_future(
+                self._optimize_and_cache(
+                    cache_key,
+                    start_location,
+                    end_location,
+                    geometry_format,
+                    waypoints,
+                    vehicles,
+                )
+            )
+            self._flights[cache_key] = flight
+            flight.add_done_callback(lambda _: self._flights.pop(cache_key, None))
+
+        return await asyncio.shield(flight)
+
+    async def _optimize_and_cache(
+        self,
+        cache_key: str,
+        start_location: str,
+        end_location: str,
+        geometry_format: Optional[str],
+        waypoints: Sequence[str] = (),
+        vehicles: Optional[Sequence[VehicleProfile]] = None,
+    ) -> Dict:
+        result = await self._optimize(
+            start_location, end_location, geometry_format, waypoints, vehicles
+        )
+        await self._run(
+            self.service.cache.set, cache_key, result, settings.OPTIMIZE_CACHE_TIMEOUT
+        )
+        return result
+
+    async def _optimize(
+        self,
+        start_location: str,
+        end_location: str,
+        geometry_format: Optional[str] = None,
+        waypoints: Sequence[str] = (),
+        vehicles: Optional[Sequence[VehicleProfile]] = None,
+    ) -> Dict:
+        try:
+            # Precomputed lanes skip geocoding, routing and the corridor query
+            lane = None
+            if not waypoints:
+                lane = await self._run(
+                    self.service.match_lane, start_location, end_location
+                )
+            if lane:
+                result = await self._run(
+                    self.service.plan_route,
+                    lane.route,
+                    geometry_format,
+                    lane,
+                    None,
+                    vehicles,
+                )
+            else:
+                # Geocode all locations concurrently
+                start_coords, *via_coords, end_coords = await asyncio.gather(
+                    self._run(self.service.geocode, start_location),
+                    *(self._run(self.service.geocode, w) for w in waypoints),
+                    self._run(self.service.geocode, end_location),
+                )
+
+                # Get route, all legs in one request
+                route_data = await self._run(
+                    self.service.get_route, start_coords, end_coords, via_coords
+                )
+
+                result = await self._run(
+                    self.service.plan_route,
+                    route_data,
+                    geometry_format,
+                    None,
+                    None,
+                    vehicles,
+                )
+            logger.info(
+                f"Route optimized: {start_location} -> {end_location}, "
+                f"{_describe(result)}"
+            )
+
+            return result
+
+        except Exception as e:
+            logger.error(f"Route optimization failed: {e}")
+            raise
+
+
+_service: Optional[RouteOptimizationService] = None
+_service_lock = threading.Lock()
+_async_service: Optional[AsyncRouteOptimizationService] = None
+
+
+def get_route_optimization_service() -> RouteOptimizationService:
+    """Return the process-wide service so HTTP sessions are reused"""
+    global _service
+
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = RouteOptimizationService()
+    return _service
+
+
+def get_async_service() -> AsyncRouteOptimizationService:
+    """Return the worker's shared async service"""
+    global _async_service
+
+    if _async_service is None:
+        _async_service = AsyncRouteOptimizationService()
+    return _async_service
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import FuelStation
+from .spatial import invalidate_station_index
+
+
+@receiver(post_save, sender=FuelStation)
+@receiver(post_delete, sender=FuelStation)
+def fuel_station_changed(sender, **kwargs):
+    """Rebuild the station index after admin edits or data loads"""
+    invalidate_station_index()
@@ -0,0 +1,360 @@
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .geometry import MILES_PER_DEGREE_LAT, GridBuckets, RouteGeometry, cell_key
+from .metrics import span
+from .models import FuelStation
+
+logger = logging.getLogger("fuel_optimizer")
+
+STATION_INDEX_VERSION_KEY = "station_index_version"
+
+
+class IndexedStation(NamedTuple):
+    """Lightweight station record returned by the spatial index"""
+
+    opis_id: int
+    name: str
+    city: str
+    state: str
+    retail_price: float
+    latitude: float
+    longitude: float
+
+    @property
+    def coordinates(self) -> Tuple[float, float]:
+        return (self.latitude, self.longitude)
+
+
+class InternedColumn(Sequence[str]):
+    """Read-only string column stored as codes into a table of distinct values"""
+
+    def __init__(self, table: Sequence[str], codes: np.ndarray):
+        self.table = list(table)
+        self.codes = codes
+
+    @classmethod
+    def from_values(cls, values: Sequence[str]) -> "InternedColumn":
+        table: Dict[str, int] = {}
+        codes = [table.setdefault(value, len(table)) for value in values]
+        return cls(list(table), np.asarray(codes, dtype=np.int32))
+
+    def __getitem__(self, position):
+        return self.table[self.codes[position]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+def first_per_point(rows: List[tuple]) -> List[tuple]:
+    """Keep the first row for each (latitude, longitude), the last two fields"""
+    if not rows:
+        return rows
+    points = np.array([row[-2:] for row in rows], dtype=np.float64)
+    _, first = np.unique(points, axis=0, return_index=True)
+    return [rows[i] for i in np.sort(first)]
+
+
+def _interned(values: Sequence[str]) -> InternedColumn:
+    if isinstance(values, InternedColumn):
+        return values
+    return InternedColumn.from_values(values)
+
+
+class StationIndex:
+    """Process-wide grid index over fuel station coordinates"""
+
+    def __init__(
+        self,
+        opis_ids: Sequence[int],
+        names: Sequence[str],
+        cities: Sequence[str],
+        states: Sequence[str],
+        prices: Sequence[float],
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        cell: Optional[float] = None,
+        version: int = 0,
+    ):
+        self.opis_ids = np.asanyarray(opis_ids, dtype=np.int64)
+        self.names = _interned(names)
+        self.cities = _interned(cities)
+        self.states = _interned(states)
+        self.prices = np.asanyarray(prices, dtype=np.float64)
+        self.latitudes = np.asanyarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asanyarray(longitudes, dtype=np.float64)
+        self.cell = cell or settings.STATION_INDEX_CELL_DEGREES
+        self.version = version
+        self.grid = GridBuckets(self.latitudes, self.longitudes, self.cell)
+
+    @classmethod
+    def from_database(cls, version: int = 0) -> "StationIndex":
+        """Build the index from every geocoded FuelStation row.
+
+        Stations geocoded to the same point (typically a city centroid) are
+        collapsed to the cheapest one, the only one the planner would pick.
+        """
+        rows = list(
+            FuelStation.objects.order_by("retail_price", "opis_id").values_list(
+                "opis_id",
+                "name",
+                "city",
+                "state",
+                "retail_price",
+                "latitude",
+                "longitude",
+            )
+        )
+        rows = first_per_point(rows)
+        columns = list(zip(*rows)) if rows else [[]] * 7
+        return cls(*columns, version=version)
+
+    @classmethod
+    def load(cls, directory: Path, version: int = 0) -> "StationIndex":
+        """Open a snapshot written by ``save`` with memory-mapped columns"""
+        directory = Path(directory)
+        with open(directory / "strings.json") as f:
+            tables = json.load(f)
+
+        def column(name: str) -> np.ndarray:
+            return np.load(directory / f"{name}.npy", mmap_mode="r")
+
+        return cls(
+            column("opis_ids"),
+            *(
+                InternedColumn(tables[name], column(f"{name}_codes"))
+                for name in ("names", "cities", "states")
+            ),
+            column("prices"),
+            column("latitudes"),
+            column("longitudes"),
+            version=version,
+        )
+
+    def save(self, directory: Path):
+        """Write the columns as .npy files and the interned strings as JSON"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ("opis_ids", "prices", "latitudes", "longitudes"):
+            np.save(directory / f"{name}.npy", np.asarray(getattr(self, name)))
+        tables = {}
+        for name in ("names", "cities", "states"):
+            strings = getattr(self, name)
+            np.save(directory / f"{name}_codes.npy", np.asarray(strings.codes))
+            tables[name] = strings.table
+        with open(directory / "strings.json", "w") as f:
+            json.dump(tables, f)
+
+    def __len__(self) -> int:
+        return len(self.opis_ids)
+
+    @functools.cached_property
+    def fingerprint(self) -> str:
+        """Hash of the ids, points and cell that positions refer to, so
+        cached corridor positions are only reused with the same layout"""
+        digest = hashlib.md5(f"{self.cell:g}".encode())
+        for column in (self.opis_ids, self.latitudes, self.longitudes):
+            digest.update(np.ascontiguousarray(column).tobytes())
+        return digest.hexdigest()
+
+    def station(self, position: int) -> IndexedStation:
+        return IndexedStation(
+            opis_id=int(self.opis_ids[position]),
+            name=self.names[position],
+            city=self.cities[position],
+            state=self.states[position],
+            retail_price=float(self.prices[position]),
+            latitude=float(self.latitudes[position]),
+            longitude=float(self.longitudes[position]),
+        )
+
+    def _rings(self, route: RouteGeometry, radius_miles: float) -> Tuple[int, int]:
+        """Grid cells to scan in each direction to cover ``radius_miles``"""
+        # Segments are bucketed by their start, so pad by the longest segment
+        reach = radius_miles + route.max_segment_miles
+        max_lat = min(85.0, float(np.abs(route.latitudes).max()))
+        lng_miles = MILES_PER_DEGREE_LAT * math.cos(math.radians(max_lat))
+        ring_rows = math.ceil(reach / (MILES_PER_DEGREE_LAT * self.cell))
+        ring_cols = math.ceil(reach / (lng_miles * self.cell))
+        return ring_rows, ring_cols
+
+    def near_route(
+        self, route: Union[RouteGeometry, List[List[float]]], radius_miles: float
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Positions, off-route distances and along-route mile markers of
+        stations within ``radius_miles`` of the route polyline"""
+        if not isinstance(route, RouteGeometry) or route.max_step > self.cell:
+            coordinates = (
+                np.column_stack((route.longitudes, route.latitudes))
+                if isinstance(route, RouteGeometry)
+                else route
+            )
+            route = RouteGeometry(coordinates, max_step=self.cell)
+
+        empty = (
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.float64),
+            np.empty(0, dtype=np.float64),
+        )
+        if not len(self) or not len(route):
+            return empty
+        ring_rows, ring_cols = self._rings(route, radius_miles)
+
+        # Coarse pass: stations in cells around any segment start cell
+        segment_grid = route.segment_grid(self.cell)
+        starts_lat, starts_lng = route.latitudes[:-1], route.longitudes[:-1]
+        _, cell_index = np.unique(
+            cell_key(*segment_grid.cells(starts_lat, starts_lng)), return_index=True
+        )
+        _, stations = self.grid.pairs(
+            starts_lat[cell_index], starts_lng[cell_index], ring_rows, ring_cols
+        )
+        candidates = np.unique(stations)
+        if not len(candidates):
+            return empty
+
+        # Fine pass: project each candidate onto its nearby segments at once
+        latitudes = self.latitudes[candidates]
+        longitudes = self.longitudes[candidates]
+        station_idx, segment_idx = segment_grid.pairs(
+            latitudes, longitudes, ring_rows, ring_cols
+        )
+        found, distance, miles = route.project(
+            latitudes, longitudes, station_idx, segment_idx
+        )
+
+        within = distance <= radius_miles
+        return candidates[found[within]], distance[within], miles[within]
+
+
+_station_index: Optional[StationIndex] = None
+_station_index_lock = threading.Lock()
+_station_version: Optional[int] = None
+_station_version_checked = 0.0
+
+
+def _new_version() -> int:
+    """Starting station data version, later than any used before it so a
+    lost cache entry cannot bring back an old snapshot"""
+    return int(time.time() * 1000)
+
+
+def station_version() -> int:
+    """Current station data version, re-read at most every
+    STATION_INDEX_CHECK_SECONDS"""
+    global _station_version, _station_version_checked
+
+    now = time.monotonic()
+    if (
+        _station_version is None
+        or now - _station_version_checked >= settings.STATION_INDEX_CHECK_SECONDS
+    ):
+        version = cache.get(STATION_INDEX_VERSION_KEY)
+        if version is None:
+            cache.add(STATION_INDEX_VERSION_KEY, _new_version(), None)
+            version = cache.get(STATION_INDEX_VERSION_KEY, 0)
+        _station_version = version
+        _station_version_checked = now
+    return _station_version
+
+
+def snapshot_path(version: int) -> Path:
+    return Path(settings.STATION_SNAPSHOT_DIR) / f"v{version}"
+
+
+def publish_station_snapshot(index: StationIndex):
+    """Write ``index`` as the snapshot of its version and prune old ones.
+
+    The snapshot is written to a temporary directory and renamed into place,
+    so readers never see a partial one; if another process got there first
+    its copy is kept.
+    """
+    target = snapshot_path(index.version)
+    if target.exists():
+        return
+
+    tmp = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    index.save(tmp)
+    try:
+        os.rename(tmp, target)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    snapshots = sorted(
+        (
+            path
+            for path in target.parent.glob("v*")
+            if path.is_dir() and path.name[1:].isdigit()
+        ),
+        key=lambda path: int(path.name[1:]),
+    )
+    for path in snapshots[: -settings.STATION_SNAPSHOT_KEEP]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def load_station_index(version: int) -> StationIndex:
+    """Open the shared snapshot of ``version``, building it from the
+    database first if no process has yet"""
+    path = snapshot_path(version)
+    if (path / "strings.json").exists():
+        try:
+            return StationIndex.load(path, version)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Station snapshot {path} unreadable, rebuilding: {e}")
+
+    index = StationIndex.from_database(version=version)
+    try:
+        publish_station_snapshot(index)
+        return StationIndex.load(path, version)
+    except OSError as e:
+        logger.warning(f"Station snapshot {path} not written: {e}")
+        return index
+
+
+def get_station_index() -> StationIndex:
+    """Return the shared station index, reloading it when stations change"""
+    global _station_index
+
+    version = station_version()
+    index = _station_index
+    if index is not None and index.version == version:
+        return index
+
+    with _station_index_lock:
+        if _station_index is None or _station_index.version != version:
+            started = time.perf_counter()
+            with span("station_index"):
+                _station_index = load_station_index(version)
+            logger.info(
+                f"Station index loaded: {len(_station_index)} stations, "
+                f"version {version}, {time.perf_counter() - started:.3f}s"
+            )
+        return _station_index
+
+
+def invalidate_station_index() -> int:
+    """Signal every process that station data changed; returns the new
+    station data version"""
+    global _station_version
+
+    try:
+        version = cache.incr(STATION_INDEX_VERSION_KEY)
+    except ValueError:
+        version = _new_version()
+        cache.set(STATION_INDEX_VERSION_KEY, version, None)
+    _station_version = None
+    return version
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from geopy.location import Location
+
+from .boundary import get_us_boundary
+from .geometry import haversine_miles
+
+logger = logging.getLogger("fuel_optimizer")
+
+GEOCODE_PATH = "/arcgis/rest/services/World/GeocodeServer/findAddressCandidates"
+REVERSE_PATH = "/arcgis/rest/services/World/GeocodeServer/reverseGeocode"
+DIRECTIONS_PATH = "/v2/directions/"
+
+# Synthetic geocodes fall inside this box and inside the US outline
+LAT_RANGE = (25.0, 49.0)
+LNG_RANGE = (-124.0, -67.0)
+
+METERS_PER_MILE = 1609.344
+POINTS_PER_MILE = 2  # Density of great-circle route geometry, like ORS output
+
+
+def _route_key(coordinates: Sequence[Sequence[float]]) -> str:
+    return ";".join(f"{lng:.4f},{lat:.4f}" for lng, lat in coordinates)
+
+
+def great_circle(
+    start: Tuple[float, float], end: Tuple[float, float], points: int
+) -> np.ndarray:
+    """``points`` (lng, lat) pairs along the great circle from start to end"""
+    lat = np.radians([start[0], end[0]])
+    lng = np.radians([start[1], end[1]])
+    xyz = np.column_stack(
+        (np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat))
+    )
+    angle = np.arccos(np.clip(np.dot(xyz[0], xyz[1]), -1.0, 1.0))
+    t = np.linspace(0.0, 1.0, max(2, points))[:, None]
+    if angle < 1e-12:
+        path = np.repeat(xyz[:1], len(t), axis=0)
+    else:
+        first, second = np.sin((1 - t) * angle), np.sin(t * angle)
+        path = (first * xyz[0] + second * xyz[1]) / np.sin(angle)
+    return np.column_stack(
+        (
+            np.degrees(np.arctan2(path[:, 1], path[:, 0])),
+            np.degrees(np.arcsin(np.clip(path[:, 2], -1.0, 1.0))),
+        )
+    )
+
+
+class StandIn:
+    """Deterministic stand-in for the geocoding and routing services.
+
+    Addresses hash to fixed points inside the US and routes follow great
+    circles stretched by ``road_factor``, or replay recorded OpenRouteService
+    responses matched on their query coordinates. Every call sleeps for
+    ``latency_ms`` plus up to ``jitter_ms`` to mimic the remote services.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        road_factor: float = 1.2,
+        routes_file: Optional[str] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.road_factor = road_factor
+        self.recorded: Dict[str, Dict] = {}
+        if routes_file:
+            with open(routes_file) as f:
+                for response in json.load(f):
+                    query = response["metadata"]["query"]["coordinates"]
+                    self.recorded[_route_key(query)] = response
+
+    def wait(self):
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def geocode(self, address: str) -> Optional[Tuple[float, float]]:
+        """Fixed point for an address; "lat, lng" strings map to themselves"""
+        address = " ".join(address.lower().split())
+        if not address:
+            return None
+
+        try:
+            lat, lng = (float(part) for part in address.split(","))
+            return lat, lng
+        except ValueError:
+            pass
+
+        boundary = get_us_boundary()
+        for salt in range(100):
+            digest = hashlib.sha256(f"{salt}:{address}".encode()).digest()
+            u = int.from_bytes(digest[:8], "big") / 2**64
+            v = int.from_bytes(digest[8:16], "big") / 2**64
+            lat = round(LAT_RANGE[0] + u * (LAT_RANGE[1] - LAT_RANGE[0]), 5)
+            lng = round(LNG_RANGE[0] + v * (LNG_RANGE[1] - LNG_RANGE[0]), 5)
+            if boundary.contains(lat, lng):
+                return lat, lng
+        return None
+
+    def reverse(self, lat: float, lng: float) -> Dict:
+        """ArcGIS-style address; the country is decided by the US outline"""
+        in_usa = get_us_boundary().contains(lat, lng) is not False
+        country = "USA" if in_usa else "XX"
+        return {
+            "LongLabel": f"{lat:.4f}, {lng:.4f}, {country}",
+            "CountryCode": country,
+        }
+
+    def directions(self, coordinates: List[List[float]]) -> Dict:
+        """OpenRouteService GeoJSON directions through (lng, lat) points"""
+        recorded = self.recorded.get(_route_key(coordinates))
+        if recorded:
+            return recorded
+
+        geometry: List[np.ndarray] = []
+        segments = []
+        for (a_lng, a_lat), (b_lng, b_lat) in zip(coordinates, coordinates[1:]):
+            miles = float(haversine_miles(a_lat, a_lng, b_lat, b_lng))
+            path = great_circle(
+                (a_lat, a_lng), (b_lat, b_lng), int(miles * POINTS_PER_MILE)
+            )
+            geometry.append(path if not geometry else path[1:])
+            segments.append({"distance": miles * self.road_factor * METERS_PER_MILE})
+
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "LineString",
+                        "coordinates": np.round(np.concatenate(geometry), 6).tolist(),
+                    },
+                    "properties": {"segments": segments},
+                }
+            ],
+            "metadata": {"query": {"coordinates": coordinates}},
+        }
+
+
+class StandInRouter:
+    """In-process routing client with the ``openrouteservice.Client`` call shape"""
+
+    def __init__(self, standin: StandIn):
+        self.standin = standin
+
+    def directions(
+        self, coordinates, profile="driving-car", format="geojson", **kwargs
+    ):
+        self.standin.wait()
+        return self.standin.directions(coordinates)
+
+
+class StandInGeocoder:
+    """In-process geocoder with the geopy call shape"""
+
+    def __init__(self, standin: StandIn):
+        self.standin = standin
+
+    def geocode(self, query: str, **kwargs) -> Optional[Location]:
+        self.standin.wait()
+        point = self.standin.geocode(query)
+        return Location(query, point, {}) if point else None
+
+    def reverse(self, query, **kwargs) -> Location:
+        self.standin.wait()
+        lat, lng = query
+        address = self.standin.reverse(lat, lng)
+        return Location(address["LongLabel"], (lat, lng), address)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """HTTP front of a StandIn speaking the ArcGIS and OpenRouteService APIs"""
+
+    standin: StandIn
+
+    def send_json(self, body: Dict, status: int = 200):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.standin.wait()
+
+        if url.path == GEOCODE_PATH:
+            query = params.get("singleLine", "")
+            point = self.standin.geocode(query)
+            candidates = (
+                [{"address": query, "location": {"x": point[1], "y": point[0]}}]
+                if point
+                else []
+            )
+            self.send_json({"candidates": candidates})
+        elif url.path == REVERSE_PATH:
+            lng, lat = (float(part) for part in params["location"].split(","))
+            self.send_json(
+                {
+                    "address": self.standin.reverse(lat, lng),
+                    "location": {"x": lng, "y": lat},
+                }
+            )
+        else:
+            self.send_json({"error": {"code": 404, "message": "Not found"}}, 404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.standin.wait()
+
+        if url.path.startswith(DIRECTIONS_PATH) and body.get("coordinates"):
+            self.send_json(self.standin.directions(body["coordinates"]))
+        else:
+            self.send_json({"error": {"code": 2000, "message": "Bad request"}}, 400)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Stand-in {self.address_string()} {format % args}")
+
+
+def make_server(host: str, port: int, standin: StandIn) -> ThreadingHTTPServer:
+    handler = type("Handler", (StandInHandler,), {"standin": standin})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
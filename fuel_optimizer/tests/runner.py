@@ -0,0 +1,29 @@
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class IsolatedTestRunner(DiscoverRunner):
+    """Keeps the suite out of the persistent cache and station snapshots of
+    a dev checkout"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.snapshot_dir = tempfile.mkdtemp(prefix="station-snapshots-")
+        self.isolated = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "fuel-optimizer-tests",
+                }
+            },
+            STATION_SNAPSHOT_DIR=self.snapshot_dir,
+        )
+        self.isolated.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.isolated.disable()
+        shutil.rmtree(self.snapshot_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
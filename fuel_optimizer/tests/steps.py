@@ -1,13 +1,36 @@
+import json
+import tempfile
+import threading
+from pathlib import Path
 from unittest.mock import Mock
 
-from fuel_optimizer.services import RouteOptimizationService
+import numpy as np
+from django.core.cache.backends.locmem import LocMemCache
+
+from fuel_optimizer.cache import LRUCache, TieredCache
+from fuel_optimizer.geocoding import GeocodeCache
+from fuel_optimizer.services import (
+    AsyncRouteOptimizationService,
+    RouteOptimizationService,
+)
+from fuel_optimizer.spatial import StationIndex
+from fuel_optimizer.standin import StandIn, make_server
+from fuel_optimizer.vehicles import VehicleProfile
 
 
 def route_optimization_service_is_ready():
     """Step to create route optimization service"""
 
     def step(context):
+        # LocMemCache storage is shared by name and ids get reused, so clear it
+        shared = LocMemCache(f"service-test-{id(context)}", {})
+        shared.clear()
         context.service = RouteOptimizationService()
+        context.service.cache = TieredCache(
+            LRUCache(100, max_bytes=1024 * 1024, default_timeout=60),
+            shared,
+            local_timeout=60,
+        )
 
     return step
 
@@ -43,7 +66,7 @@ def long_route_is_configured():
     def step(context):
         context.route_data = {
             "geometry": {"type": "LineString", "coordinates": []},
-            "distance_miles": 2800.0,
+            "distance_miles": 2445.0,
             "coordinates": [[-74.0, 40.7], [-118.2, 34.0]],
         }
 
@@ -51,23 +74,30 @@ def long_route_is_configured():
 
 
 def fuel_stations_are_available():
-    """Step to mock fuel stations in database"""
+    """Step to build a station index with stations along the route"""
 
     def step(context):
-        mock_station = Mock()
-        mock_station.name = "Test Station"
-        mock_station.city = "Denver"
-        mock_station.state = "CO"
-        mock_station.retail_price = 3.50
-        mock_station.coordinates = (39.7392, -104.9903)
+        fractions = [i / 10 for i in range(1, 10)]
+        context.station_index = StationIndex(
+            opis_ids=list(range(1, 11)),
+            names=[f"Route Station {i}" for i in range(1, 10)] + ["Far Station"],
+            cities=["Route City"] * 9 + ["Denver"],
+            states=["KS"] * 9 + ["CO"],
+            prices=[3.50, 3.20, 3.90, 3.10, 3.60, 3.40, 3.80, 3.30, 3.70, 2.10],
+            latitudes=[40.7 + f * (34.0 - 40.7) for f in fractions] + [39.7392],
+            longitudes=[-74.0 + f * (-118.2 + 74.0) for f in fractions] + [-104.9903],
+        )
+
+    return step
 
-        # Create proper mock queryset
-        mock_queryset = Mock()
-        mock_queryset.exists.return_value = True
-        mock_queryset.__iter__ = Mock(return_value=iter([mock_station]))
 
-        context.mock_queryset = mock_queryset
-        context.mock_station = mock_station
+def stations_are_placed_along_a_route():
+    """Step to provide mile markers and prices for the planner"""
+
+    def step(context):
+        context.mile_markers = [100.0, 300.0, 600.0, 800.0]
+        context.prices = [3.0, 2.0, 4.0, 1.0]
+        context.distance_miles = 1000.0
 
     return step
 
@@ -90,3 +120,272 @@ def invalid_location_is_provided():
         context.end_location = "Los Angeles, CA"
 
     return step
+
+
+def reference_polyline_is_provided():
+    """Step to provide the reference polyline from Google's documentation"""
+
+    def step(context):
+        context.coordinates = [[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]]
+        context.encoded = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+    return step
+
+
+def tiered_cache_is_configured(max_entries=2):
+    """Step to build a tiered cache over an in-memory shared backend"""
+
+    def step(context):
+        context.shared = LocMemCache("tiered-cache-test", {})
+        context.shared.clear()
+        context.local = LRUCache(max_entries, max_bytes=1024 * 1024, default_timeout=60)
+        context.cache = TieredCache(context.local, context.shared, local_timeout=60)
+
+    return step
+
+
+def async_route_optimization_service_is_ready():
+    """Step to wrap the route optimization service for async use"""
+
+    def step(context):
+        route_optimization_service_is_ready()(context)
+        context.async_service = AsyncRouteOptimizationService(context.service)
+
+    return step
+
+
+def geocode_cache_is_configured():
+    """Step to provide an empty geocode cache file and a counting geocoder"""
+
+    def step(context):
+        context.cache_dir = tempfile.TemporaryDirectory()
+        context.cache_path = Path(context.cache_dir.name) / "geocodes.json"
+        context.geocode_cache = GeocodeCache(context.cache_path)
+        context.geocoder = Mock(
+            side_effect=lambda address: (
+                None
+                if address.startswith("Nowhere")
+                else Mock(latitude=35.0, longitude=-97.0)
+            )
+        )
+
+    return step
+
+
+def price_feed_is_provided():
+    """Step to provide an OPIS price file with an existing and a repeated new id"""
+
+    def step(context):
+        context.feed_dir = tempfile.TemporaryDirectory()
+        context.csv_file = Path(context.feed_dir.name) / "prices.csv"
+        context.csv_file.write_text(
+            "OPIS Truckstop ID,Truckstop Name,Address,City,State,Rack ID,"
+            "Retail Price\n"
+            "101,EXISTING STOP,I-44 EXIT 1,Tulsa,OK,1,3.1234\n"
+            "102,NEW STOP,I-35 EXIT 2,Norman,OK,1,3.4567\n"
+            "102,NEW STOP,I-35 EXIT 2,Norman,OK,2,2.9999\n"
+        )
+        context.cache_file = Path(context.feed_dir.name) / "geocodes.json"
+
+    return step
+
+
+def price_feed_repeating_an_existing_id_is_provided():
+    """Step to provide an OPIS price file repeating an existing id"""
+
+    def step(context):
+        context.feed_dir = tempfile.TemporaryDirectory()
+        context.csv_file = Path(context.feed_dir.name) / "prices.csv"
+        context.csv_file.write_text(
+            "OPIS Truckstop ID,Truckstop Name,Address,City,State,Rack ID,"
+            "Retail Price\n"
+            "101,EXISTING STOP,I-44 EXIT 1,Tulsa,OK,1,3.1234\n"
+            "101,EXISTING STOP,I-44 EXIT 1,Tulsa,OK,2,2.5000\n"
+        )
+        context.cache_file = Path(context.feed_dir.name) / "geocodes.json"
+
+    return step
+
+
+def batch_of_routes_is_provided():
+    """Step to provide a batch with a repeated pair and an unknown location"""
+
+    def step(context):
+        context.items = [
+            {"start": "New York, NY", "end": "Philadelphia, PA"},
+            {"start": "Invalid City", "end": "Philadelphia, PA"},
+            {"start": "new york, ny", "end": "Boston, MA"},
+            {"start": "New York, NY", "end": "Philadelphia, PA"},
+        ]
+
+        def geocode(address):
+            if address == "Invalid City":
+                raise ValueError(f"Location not found: {address}")
+            return (40.0 + len(address) / 100, -75.0)
+
+        context.geocode = geocode
+
+    return step
+
+
+def multi_stop_trip_is_provided():
+    """Step to provide a trip with one waypoint and the two-leg ORS response"""
+
+    def step(context):
+        context.start_location = "New York, NY"
+        context.waypoints = ["Wichita, KS"]
+        context.end_location = "Los Angeles, CA"
+        context.geocodes = {
+            "New York, NY": (40.7, -74.0),
+            "Wichita, KS": (37.35, -96.1),
+            "Los Angeles, CA": (34.0, -118.2),
+        }
+        context.directions = {
+            "features": [
+                {
+                    "geometry": {
+                        "type": "LineString",
+                        "coordinates": [[-74.0, 40.7], [-96.1, 37.35], [-118.2, 34.0]],
+                    },
+                    "properties": {
+                        "segments": [{"distance": 1967000.0}, {"distance": 1967000.0}]
+                    },
+                }
+            ]
+        }
+
+    return step
+
+
+def vehicle_profiles_are_provided():
+    """Step to provide a long-haul truck and a van that keeps a reserve"""
+
+    def step(context):
+        context.vehicles = [
+            VehicleProfile.create(name="truck", mpg=6, tank_gallons=200),
+            VehicleProfile.create(
+                name="van", mpg=20, range_miles=500, reserve_miles=100
+            ),
+        ]
+
+    return step
+
+
+def benchmark_output_is_configured():
+    """Step to provide a results file and a tiny benchmark configuration"""
+
+    def step(context):
+        context.output_dir = tempfile.TemporaryDirectory()
+        context.output_file = Path(context.output_dir.name) / "benchmark.json"
+        context.options = {
+            "stations": [500],
+            "route_miles": [700],
+            "iterations": 2,
+            "output": str(context.output_file),
+        }
+
+    return step
+
+
+def request_log_is_provided():
+    """Step to provide a service log mixing log lines and request bodies"""
+
+    def step(context):
+        context.log_dir = tempfile.TemporaryDirectory()
+        context.log_file = Path(context.log_dir.name) / "requests.log"
+        nyc_la = "Route optimized: New York, NY -> Los Angeles, CA, 5 stops, $632.41"
+        boston_denver = "Route optimized: Boston, MA -> Denver, CO, 2 vehicle plans"
+        context.log_file.write_text(
+            "\n".join(
+                [
+                    f"INFO {nyc_la}",
+                    f"INFO {boston_denver}",
+                    '{"start": "Chicago, IL", "end": "Houston, TX"}',
+                    "WARNING No fuel stations found along route",
+                    f"INFO {nyc_la.replace('New York', 'new york')}",
+                    json.dumps({"start": "Boston, MA", "end": "Denver, CO"}),
+                    f"INFO {nyc_la}",
+                ]
+            )
+        )
+
+    return step
+
+
+def places_file_is_provided():
+    """Step to provide a places file with a city missing from the stations"""
+
+    def step(context):
+        context.places_dir = tempfile.TemporaryDirectory()
+        context.places_file = Path(context.places_dir.name) / "places.csv"
+        context.places_file.write_text(
+            "city,state,latitude,longitude\n"
+            "St. Louis,MO,38.627,-90.1994\n"
+            "Williamsburg,KY,36.7434,-84.1597\n"
+        )
+
+    return step
+
+
+def standin_server_is_running():
+    """Step to serve the geocoding and routing stand-in on a free local port"""
+
+    def step(context):
+        context.standin = StandIn()
+        context.server = make_server("127.0.0.1", 0, context.standin)
+        context.address = f"127.0.0.1:{context.server.server_address[1]}"
+        threading.Thread(target=context.server.serve_forever, daemon=True).start()
+
+    return step
+
+
+def road_network_is_provided():
+    """Step to provide road centerlines with a direct road and a long detour"""
+
+    def step(context):
+        context.graph_dir = tempfile.TemporaryDirectory()
+        context.geojson_file = Path(context.graph_dir.name) / "roads.geojson"
+        context.geojson_file.write_text(
+            json.dumps(
+                {
+                    "type": "FeatureCollection",
+                    "features": [
+                        {
+                            "type": "Feature",
+                            "geometry": {
+                                "type": "LineString",
+                                "coordinates": [[-97.0, 35.0], [-96.5, 35.0]],
+                            },
+                        },
+                        {
+                            "type": "Feature",
+                            "geometry": {
+                                "type": "MultiLineString",
+                                "coordinates": [
+                                    [[-96.5, 35.0], [-96.0, 35.0]],
+                                    [[-97.0, 35.0], [-96.5, 36.0], [-96.0, 35.0]],
+                                ],
+                            },
+                        },
+                    ],
+                }
+            )
+        )
+
+    return step
+
+
+def road_grid_is_provided(size=8):
+    """Step to provide a jittered grid of roads with many near-equal paths"""
+
+    def step(context):
+        rng = np.random.default_rng(7)
+        points = np.stack(
+            np.meshgrid(np.arange(size) * 0.1 - 97.0, np.arange(size) * 0.1 + 35.0),
+            axis=-1,
+        ) + rng.normal(0, 0.02, (size, size, 2))
+        context.road_lines = [points[i].tolist() for i in range(size)] + [
+            points[:, j].tolist() for j in range(size)
+        ]
+
+    return step
@@ -0,0 +1,73 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from django.test import AsyncClient
+from givenpy import given, then, when
+from hamcrest import assert_that, equal_to, is_, less_than
+
+from .steps import (
+    async_route_optimization_service_is_ready,
+    short_route_is_configured,
+    us_locations_are_provided,
+)
+
+
+class AsyncRouteOptimizationTest(unittest.TestCase):
+
+    def test_start_and_end_should_be_geocoded_concurrently(self):
+        """Test that the async service overlaps the two geocoding calls"""
+        with given(
+            [
+                async_route_optimization_service_is_ready(),
+                us_locations_are_provided(),
+                short_route_is_configured(),
+            ]
+        ) as context:
+
+            def slow_geocode(address):
+                time.sleep(0.3)
+                return context.start_coords
+
+            with (
+                patch.object(context.service, "geocode") as mock_geocode,
+                patch.object(context.service, "get_route") as mock_get_route,
+            ):
+                mock_geocode.side_effect = slow_geocode
+                mock_get_route.return_value = context.route_data
+
+                with when("I optimize the route asynchronously"):
+                    started = time.perf_counter()
+                    context.result = asyncio.run(
+                        context.async_service.optimize_route(
+                            context.start_location, context.end_location
+                        )
+                    )
+                    context.elapsed = time.perf_counter() - started
+
+                with then("it should take about one geocoding round trip"):
+                    assert_that(mock_geocode.call_count, is_(equal_to(2)))
+                    assert_that(context.elapsed, is_(less_than(0.55)))
+                    assert_that(context.result["stops_count"], is_(equal_to(0)))
+
+    def test_async_endpoint_should_validate_request_body(self):
+        """Test that the async endpoint rejects invalid payloads"""
+        with given([]) as context:
+
+            with when("I post a request without an end location"):
+                context.response = asyncio.run(
+                    AsyncClient().post(
+                        "/api/optimize/async/",
+                        {"start": "New York, NY"},
+                        content_type="application/json",
+                    )
+                )
+
+            with then("it should return a validation error"):
+                assert_that(context.response.status_code, is_(equal_to(400)))
+                assert_that("end" in context.response.json(), is_(True))
+
+
+if __name__ == "__main__":
+    unittest.main()
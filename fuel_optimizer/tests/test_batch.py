@@ -0,0 +1,68 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from django.test import Client
+from givenpy import given, then, when
+from hamcrest import assert_that, equal_to, has_entries, has_key, is_, not_
+
+from .steps import (
+    batch_of_routes_is_provided,
+    route_optimization_service_is_ready,
+    short_route_is_configured,
+)
+
+
+class BatchOptimizationTest(unittest.TestCase):
+
+    def test_batch_should_share_geocodes_and_routes(self):
+        """Test that a batch geocodes and routes each distinct input once"""
+        with given(
+            [
+                route_optimization_service_is_ready(),
+                short_route_is_configured(),
+                batch_of_routes_is_provided(),
+            ]
+        ) as context:
+
+            with (
+                patch.object(context.service, "geocode") as mock_geocode,
+                patch.object(context.service, "get_route") as mock_get_route,
+                patch.object(context.service, "match_lane", return_value=None),
+            ):
+                mock_geocode.side_effect = context.geocode
+                mock_get_route.return_value = context.route_data
+
+                with when("I optimize the batch"):
+                    context.results = context.service.optimize_batch(context.items)
+
+                with then("each address and route should be looked up once"):
+                    assert_that(mock_geocode.call_count, is_(equal_to(4)))
+                    assert_that(mock_get_route.call_count, is_(equal_to(2)))
+                    assert_that(
+                        context.results[1],
+                        has_entries(error="Location not found: Invalid City"),
+                    )
+                    assert_that(context.results[0], has_key("result"))
+                    assert_that(context.results[2], has_key("result"))
+                    assert_that(context.results[0], is_(equal_to(context.results[3])))
+                    assert_that(context.results[0], not_(has_key("error")))
+
+    def test_batch_endpoint_should_reject_empty_batches(self):
+        """Test that the batch endpoint validates the list of routes"""
+        with given([]) as context:
+
+            with when("I post a batch without routes"):
+                context.response = Client().post(
+                    "/api/optimize/batch/",
+                    data=json.dumps({"routes": []}),
+                    content_type="application/json",
+                )
+
+            with then("it should return a validation error"):
+                assert_that(context.response.status_code, is_(equal_to(400)))
+                assert_that(context.response.json(), has_key("routes"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import json
+import unittest
+from io import StringIO
+
+from django.core.management import call_command
+from givenpy import given, then, when
+from hamcrest import (
+    assert_that,
+    contains_inanyorder,
+    equal_to,
+    greater_than,
+    has_entries,
+    has_length,
+    is_,
+)
+
+from .steps import benchmark_output_is_configured
+
+
+class BenchmarkCommandTest(unittest.TestCase):
+
+    def test_benchmark_should_write_results_and_compare_to_baseline(self):
+        """Test that benchmark results are written as JSON and compared to a
+        baseline run with matching cases"""
+        with given([benchmark_output_is_configured()]) as context:
+
+            with when("I run the benchmark twice, the second against the first"):
+                call_command(
+                    "benchmark_optimizer", stdout=StringIO(), **context.options
+                )
+                baseline = context.output_file.with_name("baseline.json")
+                context.output_file.rename(baseline)
+                call_command(
+                    "benchmark_optimizer",
+                    stdout=StringIO(),
+                    baseline=str(baseline),
+                    **context.options,
+                )
+                report = json.loads(context.output_file.read_text())
+
+            with then("each hot path should be timed and compared"):
+                assert_that(
+                    [result["benchmark"] for result in report["results"]],
+                    contains_inanyorder(
+                        "find_fuel_stops", "calculate_costs", "optimize_route"
+                    ),
+                )
+                assert_that(
+                    report["results"][0],
+                    has_entries(stations=500, route_miles=700, iterations=2),
+                )
+                assert_that(report["results"][0]["p50_ms"], is_(greater_than(0)))
+                assert_that(report["comparison"], has_length(3))
+                assert_that(report["meta"]["seed"], is_(equal_to(0)))
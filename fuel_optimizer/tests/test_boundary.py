@@ -0,0 +1,53 @@
+import unittest
+
+from givenpy import given, then, when
+from hamcrest import assert_that, equal_to, is_, none
+
+from fuel_optimizer.boundary import get_us_boundary
+
+
+class USBoundaryTest(unittest.TestCase):
+
+    def test_interior_points_should_be_inside(self):
+        """Test that points far from any land border are decided locally"""
+        with given([]) as context:
+            context.boundary = get_us_boundary()
+
+            with when("I check Chicago, Honolulu and Anchorage"):
+                context.results = [
+                    context.boundary.contains(41.8781, -87.6298),
+                    context.boundary.contains(21.3069, -157.8583),
+                    context.boundary.contains(61.2181, -149.9003),
+                ]
+
+            with then("all of them should be inside the USA"):
+                assert_that(context.results, is_(equal_to([True, True, True])))
+
+    def test_foreign_points_should_be_outside(self):
+        """Test that points well beyond the border are rejected locally"""
+        with given([]) as context:
+            context.boundary = get_us_boundary()
+
+            with when("I check Mexico City and Calgary"):
+                context.results = [
+                    context.boundary.contains(19.4326, -99.1332),
+                    context.boundary.contains(51.0447, -114.0719),
+                ]
+
+            with then("both should be outside the USA"):
+                assert_that(context.results, is_(equal_to([False, False])))
+
+    def test_border_points_should_be_undecided(self):
+        """Test that points near a land border are left to reverse geocoding"""
+        with given([]) as context:
+            context.boundary = get_us_boundary()
+
+            with when("I check Detroit, across the river from Windsor"):
+                context.result = context.boundary.contains(42.3314, -83.0458)
+
+            with then("it should be undecided"):
+                assert_that(context.result, is_(none()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from givenpy import given, then, when
+from hamcrest import assert_that, equal_to, has_entries, is_, none
+
+from .steps import tiered_cache_is_configured
+
+
+class TieredCacheTest(unittest.TestCase):
+
+    def test_local_tier_should_evict_least_recently_used(self):
+        """Test that the LRU tier evicts the oldest entry when full"""
+        with given([tiered_cache_is_configured(max_entries=2)]) as context:
+
+            with when("I store three entries after reading the first"):
+                context.cache.set("a", 1)
+                context.cache.set("b", 2)
+                context.cache.get("a")
+                context.cache.set("c", 3)
+
+            with then("it should evict only the least recently used entry"):
+                assert_that(context.local.get("b"), is_(none()))
+                assert_that(context.local.get("a"), is_(equal_to(1)))
+                assert_that(context.local.stats(), has_entries(evictions=1))
+
+    def test_shared_tier_should_refill_local_tier(self):
+        """Test that a local miss falls back to the shared backend"""
+        with given([tiered_cache_is_configured()]) as context:
+            context.shared.set("route", {"distance_miles": 95.0})
+
+            with when("I read the key twice"):
+                context.first = context.cache.get("route")
+                context.second = context.cache.get("route")
+
+            with then("it should hit the shared tier once, then the local tier"):
+                assert_that(context.second, is_(equal_to({"distance_miles": 95.0})))
+                assert_that(
+                    context.cache.stats(),
+                    has_entries(
+                        local=has_entries(hits=1, misses=1),
+                        shared=has_entries(hits=1, misses=0),
+                    ),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from givenpy import given, then, when
+from hamcrest import assert_that, contains_exactly, equal_to, is_, none
+
+from fuel_optimizer.gazetteer import Gazetteer
+
+from .steps import (
+    fuel_stations_are_available,
+    places_file_is_provided,
+    route_optimization_service_is_ready,
+)
+
+
+class GazetteerTest(unittest.TestCase):
+
+    def test_city_state_inputs_should_resolve_locally(self):
+        """Test exact, abbreviated and misspelled cities against the stations,
+        and that an unknown town spelled like a known one is not resolved"""
+        with given(
+            [fuel_stations_are_available(), places_file_is_provided()]
+        ) as context:
+
+            with when("I build the gazetteer and look up several inputs"):
+                gazetteer = Gazetteer.from_index(
+                    context.station_index, str(context.places_file)
+                )
+                context.results = [
+                    gazetteer.lookup(location)
+                    for location in [
+                        " denver ,co",
+                        "Denvr, CO, USA",
+                        "Saint Louis, MO",
+                        "Denver, KS",
+                        "Denver",
+                        "Willisburg, KY",
+                    ]
+                ]
+
+            with then("only known cities in the right state should resolve"):
+                assert_that(
+                    context.results,
+                    contains_exactly(
+                        (39.7392, -104.9903),
+                        (39.7392, -104.9903),
+                        (38.627, -90.1994),
+                        none(),
+                        none(),
+                        none(),
+                    ),
+                )
+
+    def test_gazetteer_hit_should_skip_the_geocoder(self):
+        """Test that a known city never reaches ArcGIS"""
+        with given(
+            [route_optimization_service_is_ready(), fuel_stations_are_available()]
+        ) as context:
+            context.service.geocoder = Mock()
+            gazetteer = Gazetteer.from_index(context.station_index)
+
+            with patch("fuel_optimizer.services.get_gazetteer", return_value=gazetteer):
+
+                with when("I geocode a city served by a station"):
+                    context.coords = context.service.geocode("Denver, CO")
+
+            with then("it should return the station city without a remote call"):
+                assert_that(context.coords, is_(equal_to((39.7392, -104.9903))))
+                context.service.geocoder.geocode.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
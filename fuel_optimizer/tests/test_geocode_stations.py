@@ -0,0 +1,143 @@
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from givenpy import given, then, when
+from hamcrest import assert_that, contains_string, equal_to, is_
+
+from fuel_optimizer.models import FuelStation
+
+from .steps import (
+    price_feed_is_provided,
+    price_feed_repeating_an_existing_id_is_provided,
+)
+
+
+class GeocodeStationsCommandTest(TestCase):
+
+    def test_update_prices_should_refresh_existing_stations(self):
+        """Test that existing prices are updated and only new stations geocoded"""
+        with (
+            given([price_feed_is_provided()]) as context,
+            patch("fuel_optimizer.signals.invalidate_station_index"),
+        ):
+            FuelStation.objects.create(
+                opis_id=101,
+                name="EXISTING STOP",
+                city="Tulsa",
+                state="OK",
+                retail_price=Decimal("2.999"),
+                latitude=Decimal("36.1540"),
+                longitude=Decimal("-95.9928"),
+            )
+
+            with (
+                patch(
+                    "fuel_optimizer.management.commands.geocode_stations.ArcGIS"
+                ) as mock_arcgis,
+                patch(
+                    "fuel_optimizer.management.commands.geocode_stations"
+                    ".invalidate_station_index"
+                ) as mock_invalidate,
+                patch(
+                    "fuel_optimizer.management.commands.geocode_stations"
+                    ".publish_station_snapshot"
+                ) as mock_publish,
+            ):
+                mock_arcgis.return_value.geocode.return_value = Mock(
+                    latitude=35.2226, longitude=-97.4395
+                )
+
+                with when("I ingest the price file with --update-prices"):
+                    context.output = StringIO()
+                    call_command(
+                        "geocode_stations",
+                        str(context.csv_file),
+                        "--update-prices",
+                        "--chunk-size",
+                        "1",
+                        "--cache-file",
+                        str(context.cache_file),
+                        stdout=context.output,
+                    )
+
+                with then("prices should update and the first repeated id wins"):
+                    assert_that(
+                        context.output.getvalue(),
+                        contains_string("dropped 1 repeated OPIS ids"),
+                    )
+                    assert_that(
+                        context.output.getvalue(),
+                        contains_string("Skipped 1 existing stations"),
+                    )
+                    assert_that(
+                        FuelStation.objects.get(opis_id=101).retail_price,
+                        is_(equal_to(Decimal("3.123"))),
+                    )
+                    assert_that(
+                        FuelStation.objects.get(opis_id=102).retail_price,
+                        is_(equal_to(Decimal("3.457"))),
+                    )
+                    mock_arcgis.return_value.geocode.assert_called_once()
+                    mock_invalidate.assert_called_once()
+                    mock_publish.assert_called_once()
+
+            context.feed_dir.cleanup()
+
+    def test_repeated_existing_id_should_keep_the_first_price(self):
+        """Test that a later row for an existing id does not overwrite the first"""
+        with (
+            given([price_feed_repeating_an_existing_id_is_provided()]) as context,
+            patch("fuel_optimizer.signals.invalidate_station_index"),
+        ):
+            FuelStation.objects.create(
+                opis_id=101,
+                name="EXISTING STOP",
+                city="Tulsa",
+                state="OK",
+                retail_price=Decimal("2.999"),
+                latitude=Decimal("36.1540"),
+                longitude=Decimal("-95.9928"),
+            )
+
+            with (
+                patch("fuel_optimizer.management.commands.geocode_stations.ArcGIS"),
+                patch(
+                    "fuel_optimizer.management.commands.geocode_stations"
+                    ".invalidate_station_index"
+                ),
+                patch(
+                    "fuel_optimizer.management.commands.geocode_stations"
+                    ".publish_station_snapshot"
+                ),
+            ):
+                with when("I ingest the rows in separate chunks"):
+                    context.output = StringIO()
+                    call_command(
+                        "geocode_stations",
+                        str(context.csv_file),
+                        "--update-prices",
+                        "--chunk-size",
+                        "1",
+                        "--cache-file",
+                        str(context.cache_file),
+                        stdout=context.output,
+                    )
+
+                with then("the first row's price should win"):
+                    assert_that(
+                        context.output.getvalue(),
+                        contains_string("dropped 1 repeated OPIS ids"),
+                    )
+                    assert_that(
+                        context.output.getvalue(),
+                        contains_string("Updated prices for 1 existing stations"),
+                    )
+                    assert_that(
+                        FuelStation.objects.get(opis_id=101).retail_price,
+                        is_(equal_to(Decimal("3.123"))),
+                    )
+
+            context.feed_dir.cleanup()
@@ -0,0 +1,69 @@
+import unittest
+
+from geopy.exc import GeocoderServiceError
+from givenpy import given, then, when
+from hamcrest import assert_that, equal_to, has_entries, is_, none
+
+from fuel_optimizer.geocoding import GeocodeCache, geocode_places
+
+from .steps import geocode_cache_is_configured
+
+
+class BulkGeocodingTest(unittest.TestCase):
+
+    def test_places_should_be_geocoded_once(self):
+        """Test that duplicate places share a single lookup"""
+        with given([geocode_cache_is_configured()]) as context:
+
+            with when("I geocode a list with repeated places"):
+                context.result = geocode_places(
+                    [("Tulsa", "OK"), ("Nowhere", "ZZ"), ("Tulsa", "OK")],
+                    context.geocoder,
+                    context.geocode_cache,
+                    workers=4,
+                )
+
+            with then("each unique place should be looked up once"):
+                assert_that(context.geocoder.call_count, is_(equal_to(2)))
+                assert_that(
+                    context.result,
+                    has_entries(
+                        {("Tulsa", "OK"): (35.0, -97.0), ("Nowhere", "ZZ"): None}
+                    ),
+                )
+
+            context.cache_dir.cleanup()
+
+    def test_interrupted_run_should_resume_from_checkpoint(self):
+        """Test that a new run reuses saved lookups and retries failures"""
+        with given([geocode_cache_is_configured()]) as context:
+            context.geocoder.side_effect = [
+                GeocoderServiceError("unavailable"),
+                None,
+            ]
+            geocode_places(
+                [("Tulsa", "OK"), ("Nowhere", "ZZ")],
+                context.geocoder,
+                context.geocode_cache,
+                workers=1,
+            )
+
+            with when("I run again with a fresh cache loaded from disk"):
+                context.geocoder.reset_mock(side_effect=True)
+                context.geocoder.return_value = None
+                context.result = geocode_places(
+                    [("Tulsa", "OK"), ("Nowhere", "ZZ")],
+                    context.geocoder,
+                    GeocodeCache(context.cache_path),
+                    workers=1,
+                )
+
+            with then("only the failed place should be looked up again"):
+                context.geocoder.assert_called_once_with("Tulsa, OK, USA")
+                assert_that(context.result[("Nowhere", "ZZ")], is_(none()))
+
+            context.cache_dir.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+from givenpy import given, then, when
+from hamcrest import assert_that, close_to, contains_exactly
+
+from fuel_optimizer.geometry import RouteGeometry
+
+from .steps import long_route_is_configured
+
+
+class RouteGeometryTest(unittest.TestCase):
+
+    def test_mile_markers_should_follow_route_distance(self):
+        """Test that projected mile markers are scaled to the routed distance"""
+        with given([long_route_is_configured()]) as context:
+
+            with when("I project the route midpoint and endpoints"):
+                geometry = RouteGeometry.from_route(context.route_data)
+                latitudes = np.array([40.7, geometry.latitudes[-1]])
+                longitudes = np.array([-74.0, geometry.longitudes[-1]])
+                segments = np.arange(len(geometry))
+                _, context.distances, context.miles = geometry.project(
+                    latitudes,
+                    longitudes,
+                    np.repeat([0, 1], len(segments)),
+                    np.tile(segments, 2),
+                )
+
+            with then("it should place them at mile 0 and the route distance"):
+                assert_that(
+                    list(context.miles),
+                    contains_exactly(
+                        close_to(0.0, 1e-6),
+                        close_to(context.route_data["distance_miles"], 1e-6),
+                    ),
+                )
+                assert_that(float(context.distances.max()), close_to(0.0, 1e-6))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from givenpy import given, then, when
+from hamcrest import assert_that, equal_to, greater_than, is_, is_not, none
+
+from fuel_optimizer.lanes import LaneTable, get_lane_table, save_lane
+from fuel_optimizer.spatial import StationIndex, station_version
+
+from .steps import (
+    fuel_stations_are_available,
+    long_route_is_configured,
+    route_optimization_service_is_ready,
+)
+
+
+class LaneCorridorTest(TestCase):
+
+    def test_lane_should_match_normalized_locations(self):
+        """Test that a stored lane is found regardless of case and spacing"""
+        with given(
+            [long_route_is_configured(), fuel_stations_are_available()]
+        ) as context:
+            save_lane(
+                "NYC-LA",
+                "New York, NY",
+                "Los Angeles, CA",
+                context.route_data,
+                context.station_index,
+            )
+
+            with when("I load the lane table and look up both lanes"):
+                context.table = LaneTable.from_database(context.station_index)
+                context.lane = context.table.match("new york,ny ", "LOS ANGELES, CA")
+                context.reverse = context.table.match("Los Angeles, CA", "New York, NY")
+
+            with then("only the stored direction should match, in route order"):
+                assert_that(context.reverse, is_(none()))
+                assert_that(len(context.lane.positions), is_(equal_to(9)))
+                assert_that(
+                    list(context.lane.mile_markers),
+                    is_(equal_to(sorted(context.lane.mile_markers))),
+                )
+
+    def test_known_lane_should_skip_geocoding_and_routing(self):
+        """Test that optimize_route plans straight from the lane table"""
+        with given(
+            [
+                route_optimization_service_is_ready(),
+                long_route_is_configured(),
+                fuel_stations_are_available(),
+            ]
+        ) as context:
+            save_lane(
+                "NYC-LA",
+                "New York, NY",
+                "Los Angeles, CA",
+                context.route_data,
+                context.station_index,
+            )
+            table = LaneTable.from_database(context.station_index)
+
+            with (
+                patch.object(context.service, "geocode") as mock_geocode,
+                patch.object(context.service, "get_route") as mock_get_route,
+                patch("fuel_optimizer.services.get_lane_table", return_value=table),
+                patch(
+                    "fuel_optimizer.services.get_station_index",
+                    return_value=context.station_index,
+                ),
+            ):
+
+                with when("I optimize the known lane"):
+                    context.result = context.service.optimize_route(
+                        "New York, NY", "Los Angeles, CA"
+                    )
+
+                with then("it should plan stops without geocoding or routing"):
+                    mock_geocode.assert_not_called()
+                    mock_get_route.assert_not_called()
+                    assert_that(context.result["stops_count"], is_(greater_than(0)))
+
+    def test_lane_should_resolve_stations_by_point_after_repricing(self):
+        """Test that a station repriced at a shared point keeps the lane whole"""
+        with given(
+            [long_route_is_configured(), fuel_stations_are_available()]
+        ) as context:
+            save_lane(
+                "NYC-LA",
+                "New York, NY",
+                "Los Angeles, CA",
+                context.route_data,
+                context.station_index,
+            )
+            index = context.station_index
+            repriced = StationIndex(
+                [99 if opis_id == 4 else opis_id for opis_id in index.opis_ids],
+                index.names,
+                index.cities,
+                index.states,
+                index.prices,
+                index.latitudes,
+                index.longitudes,
+                version=1,
+            )
+
+            with when("another station now represents one of the lane's points"):
+                context.lane = LaneTable.from_database(repriced).match(
+                    "New York, NY", "Los Angeles, CA"
+                )
+
+            with then("the lane should still hold every corridor station"):
+                assert_that(len(context.lane.positions), is_(equal_to(9)))
+                assert_that(context.lane.version, is_(equal_to(1)))
+
+    def test_lane_with_missing_point_should_be_stale(self):
+        """Test that a lane is not served when a stored point left the index"""
+        with given(
+            [long_route_is_configured(), fuel_stations_are_available()]
+        ) as context:
+            save_lane(
+                "NYC-LA",
+                "New York, NY",
+                "Los Angeles, CA",
+                context.route_data,
+                context.station_index,
+            )
+            index = context.station_index
+            keep = slice(1, None)
+            shrunk = StationIndex(
+                index.opis_ids[keep],
+                list(index.names)[keep],
+                list(index.cities)[keep],
+                list(index.states)[keep],
+                index.prices[keep],
+                index.latitudes[keep],
+                index.longitudes[keep],
+                version=1,
+            )
+
+            with when("I build the lane table for the smaller index"):
+                context.lane = LaneTable.from_database(shrunk).match(
+                    "New York, NY", "Los Angeles, CA"
+                )
+
+            with then("the lane should be marked stale for a fresh corridor"):
+                assert_that(context.lane.version, is_(equal_to(LaneTable.STALE)))
+
+    def test_rebuilt_lanes_should_reload_only_the_lane_table(self):
+        """Test that rebuilding lanes leaves the station data version alone"""
+        with given(
+            [long_route_is_configured(), fuel_stations_are_available()]
+        ) as context:
+            index = context.station_index
+            with (
+                patch("fuel_optimizer.lanes.get_station_index", return_value=index),
+                patch(
+                    "fuel_optimizer.management.commands.build_lane_corridors"
+                    ".get_station_index",
+                    return_value=index,
+                ),
+            ):
+                get_lane_table()
+                save_lane(
+                    "NYC-LA",
+                    "New York, NY",
+                    "Los Angeles, CA",
+                    context.route_data,
+                    index,
+                )
+                context.version = station_version()
+
+                with when("I rebuild the stored lanes"):
+                    call_command("build_lane_corridors", stdout=StringIO())
+                    context.lane = get_lane_table().match(
+                        "New York, NY", "Los Angeles, CA"
+                    )
+
+                with then("the lane table should reload without a station reload"):
+                    assert_that(context.lane, is_not(none()))
+                    assert_that(station_version(), is_(equal_to(context.version)))
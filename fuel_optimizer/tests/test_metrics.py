@@ -0,0 +1,76 @@
+import unittest
+
+from django.http import HttpResponse
+from django.test import Client, override_settings
+from givenpy import given, then, when
+from hamcrest import assert_that, contains_string, equal_to, is_, starts_with
+
+from fuel_optimizer.metrics import MetricsRegistry, span
+from fuel_optimizer.middleware import server_timing_middleware
+
+
+class MetricsTest(unittest.TestCase):
+
+    def test_registry_should_render_prometheus_histograms(self):
+        """Test that observations become cumulative buckets and counters"""
+        with given([]) as context:
+            context.registry = MetricsRegistry()
+
+            with when("I record two stage timings and a cache miss"):
+                context.registry.observe("stage_seconds", 0.003, stage="geocode")
+                context.registry.observe("stage_seconds", 0.3, stage="geocode")
+                context.registry.increment("cache_total", outcome="miss")
+                context.output = context.registry.render()
+
+            with then("the text format should hold buckets, sum, count and counter"):
+                for line in [
+                    'stage_seconds_bucket{stage="geocode",le="0.005"} 1',
+                    'stage_seconds_bucket{stage="geocode",le="+Inf"} 2',
+                    'stage_seconds_count{stage="geocode"} 2',
+                    'cache_total{outcome="miss"} 1',
+                ]:
+                    assert_that(context.output, contains_string(line))
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_server_timing_header_should_list_request_stages(self):
+        """Test that stages timed during a request appear in Server-Timing"""
+        with given([]) as context:
+
+            def view(request):
+                with span("geocode"):
+                    pass
+                with span("route"):
+                    pass
+                return HttpResponse("ok")
+
+            with when("a request runs through the middleware"):
+                context.response = server_timing_middleware(view)(None)
+
+            with then("the header should have each stage and the total"):
+                assert_that(
+                    context.response["Server-Timing"], starts_with("geocode;dur=")
+                )
+                assert_that(
+                    context.response["Server-Timing"], contains_string(", route;dur=")
+                )
+                assert_that(
+                    context.response["Server-Timing"], contains_string(", total;dur=")
+                )
+
+    def test_metrics_endpoint_should_expose_cache_stats(self):
+        """Test that the metrics endpoint serves the text exposition format"""
+        with given([]) as context:
+
+            with when("I request the metrics endpoint"):
+                context.response = Client().get("/api/metrics/")
+
+            with then("it should include tiered cache gauges"):
+                assert_that(context.response.status_code, is_(equal_to(200)))
+                assert_that(
+                    context.response.content.decode(),
+                    contains_string('fuel_optimizer_cache_hits{tier="local"}'),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
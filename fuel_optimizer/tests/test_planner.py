@@ -0,0 +1,152 @@
+import unittest
+
+from givenpy import given, then, when
+from hamcrest import assert_that, close_to, contains_exactly, equal_to, is_
+
+from fuel_optimizer.planner import (
+    effective_prices,
+    plan_refueling,
+    prune_dominated,
+)
+
+from .steps import stations_are_placed_along_a_route
+
+
+class RefuelingPlannerTest(unittest.TestCase):
+
+    def test_planner_should_buy_just_enough_before_cheaper_stations(self):
+        """Test that fuel is bought only where it is cheapest within range"""
+        with given([stations_are_placed_along_a_route()]) as context:
+
+            with when("I plan refueling for a 500 mile range vehicle"):
+                context.plan = plan_refueling(
+                    context.mile_markers,
+                    context.prices,
+                    context.distance_miles,
+                    range_miles=500,
+                    mpg=10,
+                )
+
+            with then("it should stop at the $2 and $1 stations only"):
+                assert_that(
+                    [stop.mile_marker for stop in context.plan],
+                    contains_exactly(300.0, 800.0),
+                )
+                assert_that(
+                    [stop.gallons for stop in context.plan],
+                    contains_exactly(close_to(30.0, 1e-6), close_to(20.0, 1e-6)),
+                )
+                assert_that(
+                    sum(stop.cost for stop in context.plan), close_to(80.0, 1e-6)
+                )
+
+    def test_planner_should_reject_gaps_longer_than_range(self):
+        """Test that an infeasible route raises instead of returning a plan"""
+        with given([stations_are_placed_along_a_route()]) as context:
+
+            with when("I plan refueling with only the first station available"):
+                context.exception = None
+                try:
+                    plan_refueling([100.0], [3.0], context.distance_miles, 500, 10)
+                except ValueError as e:
+                    context.exception = e
+
+            with then("it should reject the route"):
+                assert_that(
+                    str(context.exception),
+                    is_(equal_to("No fuel stations within vehicle range along route")),
+                )
+
+    def test_detour_should_put_cheapest_station_out_of_reach(self):
+        """Test that a station is only reached with fuel for its detour"""
+        with given([stations_are_placed_along_a_route()]) as context:
+
+            with when("the $1 station at mile 450 is 60 miles off route"):
+                context.plan = plan_refueling(
+                    [100.0, 450.0],
+                    [3.0, 1.0],
+                    800.0,
+                    range_miles=500,
+                    mpg=10,
+                    detour_miles=[0.0, 60.0],
+                )
+
+            with then("it should stop first to afford the way there and back"):
+                assert_that(
+                    [stop.mile_marker for stop in context.plan],
+                    contains_exactly(100.0, 450.0),
+                )
+                assert_that(
+                    [stop.gallons for stop in context.plan],
+                    contains_exactly(close_to(1.0, 1e-6), close_to(41.0, 1e-6)),
+                )
+
+    def test_detour_should_not_lead_to_a_dead_end(self):
+        """Test that a cheap station with no way on is never planned"""
+        with given([stations_are_placed_along_a_route()]) as context:
+
+            with when("the $1 station leaves too little range to go on"):
+                context.plan = plan_refueling(
+                    [300.0, 350.0, 780.0],
+                    [3.0, 1.0, 2.0],
+                    1200.0,
+                    range_miles=500,
+                    mpg=10,
+                    detour_miles=[0.0, 100.0, 0.0],
+                )
+
+            with then("it should route through the stations that get there"):
+                assert_that(
+                    [stop.mile_marker for stop in context.plan],
+                    contains_exactly(300.0, 780.0),
+                )
+                assert_that(
+                    [stop.gallons for stop in context.plan],
+                    contains_exactly(close_to(28.0, 1e-6), close_to(42.0, 1e-6)),
+                )
+
+    def test_equal_prices_should_prefer_the_shorter_detour(self):
+        """Test that ties between stations go to the one closer to the route"""
+        with given([stations_are_placed_along_a_route()]) as context:
+
+            with when("two $2 stations are 5 miles and 0 miles off route"):
+                context.plan = plan_refueling(
+                    [100.0, 200.0, 600.0],
+                    [2.0, 2.0, 3.0],
+                    800.0,
+                    range_miles=500,
+                    mpg=10,
+                    detour_miles=[5.0, 0.0, 0.0],
+                )
+
+            with then("it should fill up at the one on the route"):
+                assert_that(
+                    [stop.mile_marker for stop in context.plan],
+                    contains_exactly(200.0, 600.0),
+                )
+                assert_that(
+                    [stop.gallons for stop in context.plan],
+                    contains_exactly(close_to(20.0, 1e-6), close_to(10.0, 1e-6)),
+                )
+
+    def test_detours_should_raise_price_and_prune_nearby_stations(self):
+        """Test that a cheap station far off route loses to a close one"""
+        with given([stations_are_placed_along_a_route()]) as context:
+
+            with when("the $1 station is 50 miles off a 500 mile range route"):
+                context.prices = effective_prices(
+                    context.prices, [0.0, 0.0, 0.0, 50.0], range_miles=500
+                )
+                context.kept = prune_dominated(
+                    [100.0, 110.0, 600.0, 615.0], context.prices, window_miles=25
+                )
+
+            with then("it should cost 20% more per gallon"):
+                assert_that(context.prices[3], close_to(1.2, 1e-9))
+
+            with then("only the cheaper station of each nearby pair is kept"):
+                assert_that(list(context.kept), contains_exactly(1, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from givenpy import given, then, when
+from hamcrest import assert_that, contains_exactly, equal_to, is_
+
+from fuel_optimizer.polyline import decode, encode, simplify
+
+from .steps import reference_polyline_is_provided
+
+
+class PolylineTest(unittest.TestCase):
+
+    def test_encoding_should_match_reference_polyline(self):
+        """Test that encoding and decoding follow Google's polyline format"""
+        with given([reference_polyline_is_provided()]) as context:
+
+            with when("I encode and decode the coordinates"):
+                context.result = encode(context.coordinates)
+                context.decoded = decode(context.encoded)
+
+            with then("it should round-trip through the reference string"):
+                assert_that(context.result, is_(equal_to(context.encoded)))
+                assert_that(context.decoded, is_(equal_to(context.coordinates)))
+
+    def test_simplify_should_drop_vertices_within_tolerance(self):
+        """Test that nearly collinear vertices are removed"""
+        with given([]) as context:
+
+            with when("I simplify a line with a tiny kink and a large one"):
+                context.result = simplify(
+                    [[-100.0, 40.0], [-99.5, 40.0001], [-99.0, 40.0], [-98.5, 41.0]],
+                    tolerance_miles=0.1,
+                )
+
+            with then("it should keep only the significant vertices"):
+                assert_that(
+                    context.result,
+                    contains_exactly([-100.0, 40.0], [-99.0, 40.0], [-98.5, 41.0]),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from givenpy import given, then, when
+from hamcrest import assert_that, contains_exactly, equal_to, is_
+
+from fuel_optimizer.prices import read_chunks
+
+from .steps import price_feed_is_provided
+
+
+class PriceFileTest(unittest.TestCase):
+
+    def test_price_file_should_stream_in_typed_chunks(self):
+        """Test that the reader yields fixed-size chunks of the needed columns"""
+        with given([price_feed_is_provided()]) as context:
+
+            with when("I read the file one row at a time"):
+                context.chunks = list(read_chunks(str(context.csv_file), 1))
+
+            with then("each chunk should hold one typed row"):
+                assert_that([len(chunk) for chunk in context.chunks], is_([1, 1, 1]))
+                assert_that(
+                    list(context.chunks[0].columns),
+                    contains_exactly(
+                        "opis_truckstop_id",
+                        "truckstop_name",
+                        "city",
+                        "state",
+                        "retail_price",
+                    ),
+                )
+                assert_that(
+                    str(context.chunks[0]["opis_truckstop_id"].dtype),
+                    is_(equal_to("int64")),
+                )
+
+            context.feed_dir.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+from django.core.management import call_command
+from django.test import override_settings
+from givenpy import given, then, when
+from hamcrest import assert_that, calling, close_to, equal_to, is_, raises
+
+from fuel_optimizer.geometry import haversine_miles
+from fuel_optimizer.roadgraph import RoadGraph, load_road_graph
+
+from .steps import (
+    road_grid_is_provided,
+    road_network_is_provided,
+    route_optimization_service_is_ready,
+)
+
+
+class RoadGraphTest(unittest.TestCase):
+
+    def test_road_graph_backend_should_route_the_shortest_way(self):
+        """Test that a built graph is memory-mapped and routes along the direct
+        road rather than the detour, in the shape ORS routes have"""
+        with given(
+            [road_network_is_provided(), route_optimization_service_is_ready()]
+        ) as context:
+            output = str(Path(context.graph_dir.name) / "graph")
+            call_command(
+                "build_road_graph",
+                str(context.geojson_file),
+                output=output,
+                stdout=StringIO(),
+            )
+
+            with override_settings(
+                ROUTING_BACKEND="fuel_optimizer.backends.road_graph_router",
+                ROAD_GRAPH_DIR=output,
+            ):
+                route_optimization_service_is_ready()(context)
+
+                with when("I route between points near both ends of the roads"):
+                    route = context.service.get_route((35.01, -97.0), (35.0, -95.99))
+
+                with then("it should follow the direct road, simplified"):
+                    graph = load_road_graph(output)
+                    for array in (
+                        graph.indices,
+                        graph.hierarchy.indices,
+                        graph.grid.keys,
+                    ):
+                        assert_that(isinstance(array, np.memmap), is_(True))
+                    assert_that(
+                        route["coordinates"],
+                        is_(equal_to([[-97.0, 35.0], [-96.0, 35.0]])),
+                    )
+                    assert_that(
+                        route["distance_miles"],
+                        is_(close_to(float(haversine_miles(35, -97, 35, -96)), 0.01)),
+                    )
+                    assert_that(
+                        calling(context.service.get_route).with_args(
+                            (40.0, -90.0), (35.0, -96.0)
+                        ),
+                        raises(ValueError),
+                    )
+
+    def test_hierarchy_should_find_the_same_shortest_paths(self):
+        """Test that contraction hierarchy routes match a plain search and
+        follow real roads once shortcuts are expanded"""
+        with given([road_grid_is_provided()]) as context:
+            graph = RoadGraph.from_lines(context.road_lines)
+            plain = RoadGraph(
+                graph.latitudes,
+                graph.longitudes,
+                graph.indptr,
+                graph.indices,
+                graph.weights,
+            )
+
+            with when("I contract the graph and route between every node pair"):
+                graph.contract()
+                pairs = [
+                    (source, target)
+                    for source in range(0, len(graph), 3)
+                    for target in range(len(graph))
+                ]
+                context.routes = [graph.shortest_path(*pair) for pair in pairs]
+                context.expected = [plain.shortest_path(*pair) for pair in pairs]
+
+            with then("distances should match and each step should be a road"):
+                roads = {
+                    (int(u), int(v))
+                    for u in range(len(graph))
+                    for v in graph.indices[graph.indptr[u] : graph.indptr[u + 1]]
+                }
+                for (path, miles), (_, expected) in zip(
+                    context.routes, context.expected
+                ):
+                    assert_that(miles, is_(close_to(expected, 1e-6)))
+                    assert_that(
+                        all(step in roads for step in zip(path, path[1:])),
+                        is_(True),
+                    )
@@ -1,16 +1,38 @@
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
 
+from django.conf import settings
 from givenpy import given, then, when
-from hamcrest import assert_that, empty, equal_to, greater_than, is_
+from hamcrest import (
+    assert_that,
+    empty,
+    equal_to,
+    greater_than,
+    has_item,
+    has_key,
+    is_,
+    not_,
+    only_contains,
+    same_instance,
+)
+
+from fuel_optimizer.serializers import RouteOptimizationRequestSerializer
+from fuel_optimizer.services import get_route_optimization_service
+from fuel_optimizer.spatial import StationIndex
+
 from .steps import (
     fuel_stations_are_available,
     invalid_location_is_provided,
     long_route_is_configured,
+    multi_stop_trip_is_provided,
     non_us_location_is_provided,
+    reference_polyline_is_provided,
     route_optimization_service_is_ready,
     short_route_is_configured,
     us_locations_are_provided,
+    vehicle_profiles_are_provided,
 )
 
 
@@ -44,6 +66,28 @@ class FuelRouteOptimizerTest(unittest.TestCase):
                     assert_that(context.result["total_fuel_cost"], is_(equal_to(0.0)))
                     assert_that(context.result["stops_count"], is_(equal_to(0)))
 
+    def test_polyline_format_should_return_encoded_geometry(self):
+        """Test that the encoded polyline replaces the GeoJSON geometry"""
+        with given(
+            [
+                route_optimization_service_is_ready(),
+                reference_polyline_is_provided(),
+                short_route_is_configured(),
+            ]
+        ) as context:
+            context.route_data["coordinates"] = context.coordinates
+
+            with when("I calculate costs with the polyline format"):
+                context.result = context.service.calculate_costs(
+                    context.route_data, [], geometry_format="polyline"
+                )
+
+            with then("it should return the encoded polyline only"):
+                assert_that(
+                    context.result["route_polyline"], is_(equal_to(context.encoded))
+                )
+                assert_that(context.result, is_(not_(has_key("route_geometry"))))
+
     def test_long_route_should_require_fuel_stops(self):
         """Test that long routes require fuel stops"""
         with given(
@@ -58,14 +102,12 @@ class FuelRouteOptimizerTest(unittest.TestCase):
             with (
                 patch.object(context.service, "geocode") as mock_geocode,
                 patch.object(context.service, "get_route") as mock_get_route,
-                patch("fuel_optimizer.services.FuelStation") as mock_fuel_station,
+                patch("fuel_optimizer.services.get_station_index") as mock_index,
             ):
 
                 mock_geocode.side_effect = [context.start_coords, (34.0522, -118.2437)]
                 mock_get_route.return_value = context.route_data
-                mock_fuel_station.objects.filter.return_value.order_by.return_value = (
-                    context.mock_queryset
-                )
+                mock_index.return_value = context.station_index
 
                 with when("I optimize the long route"):
                     context.result = context.service.optimize_route(
@@ -74,10 +116,257 @@ class FuelRouteOptimizerTest(unittest.TestCase):
 
                 with then("it should return fuel stops"):
                     assert_that(context.result["stops_count"], is_(greater_than(0)))
+                    assert_that(
+                        [stop["name"] for stop in context.result["fuel_stops"]],
+                        is_(not_(has_item("Far Station"))),
+                    )
                     assert_that(
                         context.result["total_fuel_cost"], is_(greater_than(0.0))
                     )
 
+    def test_corridor_should_be_cached_with_the_route(self):
+        """Test that a repeated route reuses its corridor and detours"""
+        with given(
+            [
+                route_optimization_service_is_ready(),
+                long_route_is_configured(),
+                fuel_stations_are_available(),
+            ]
+        ) as context:
+
+            index = context.station_index
+            with patch.object(index, "near_route", wraps=index.near_route) as query:
+
+                with when("I find fuel stops for the same route twice"):
+                    context.first = context.service.find_fuel_stops(
+                        context.route_data, index=index
+                    )
+                    context.second = context.service.find_fuel_stops(
+                        context.route_data, index=index
+                    )
+
+                with then("the corridor should be queried once"):
+                    query.assert_called_once()
+                    assert_that(context.second, equal_to(context.first))
+
+                with then("each stop should report its detour"):
+                    assert_that(context.first, only_contains(has_key("detour_miles")))
+
+    def test_corridor_cache_should_not_be_shared_between_indexes(self):
+        """Test that indexes of the same version with different stations
+        do not reuse each other's corridor positions"""
+        with given(
+            [
+                route_optimization_service_is_ready(),
+                long_route_is_configured(),
+                fuel_stations_are_available(),
+            ]
+        ) as context:
+            index = context.station_index
+            keep = slice(0, 4)
+            smaller = StationIndex(
+                index.opis_ids[keep],
+                list(index.names)[keep],
+                list(index.cities)[keep],
+                list(index.states)[keep],
+                index.prices[keep],
+                index.latitudes[keep],
+                index.longitudes[keep],
+                version=index.version,
+            )
+
+            with when("I query the corridor of one route with both indexes"):
+                _, context.small, _, _ = context.service.corridor_stations(
+                    context.route_data, index=smaller
+                )
+                _, context.full, _, _ = context.service.corridor_stations(
+                    context.route_data, index=index
+                )
+
+            with then("each index should get its own corridor"):
+                assert_that(len(context.small), is_(equal_to(4)))
+                assert_that(len(context.full), is_(equal_to(9)))
+
+    def test_vehicle_profiles_should_share_one_route_and_corridor(self):
+        """Test that each vehicle gets its own plan from one routed corridor"""
+        with given(
+            [
+                route_optimization_service_is_ready(),
+                us_locations_are_provided("New York, NY", "Los Angeles, CA"),
+                long_route_is_configured(),
+                fuel_stations_are_available(),
+                vehicle_profiles_are_provided(),
+            ]
+        ) as context:
+
+            with (
+                patch.object(context.service, "geocode") as mock_geocode,
+                patch.object(context.service, "get_route") as mock_get_route,
+                patch("fuel_optimizer.services.get_station_index") as mock_index,
+                patch.object(
+                    context.service,
+                    "corridor_stations",
+                    wraps=context.service.corridor_stations,
+                ) as mock_corridor,
+            ):
+
+                mock_geocode.side_effect = [context.start_coords, (34.0522, -118.2437)]
+                mock_get_route.return_value = context.route_data
+                mock_index.return_value = context.station_index
+
+                with when("I optimize the route for a truck and a van"):
+                    context.result = context.service.optimize_route(
+                        context.start_location,
+                        context.end_location,
+                        vehicles=context.vehicles,
+                    )
+
+                with then("the route and corridor should be computed once"):
+                    mock_get_route.assert_called_once()
+                    mock_corridor.assert_called_once()
+                    assert_that(context.result, has_key("route_geometry"))
+                    assert_that(context.result, not_(has_key("fuel_stops")))
+
+                with then("the van should stop more often than the truck"):
+                    truck, van = context.result["vehicles"]
+                    assert_that(truck["vehicle"], equal_to("truck"))
+                    assert_that(van["vehicle"], equal_to("van"))
+                    assert_that(
+                        van["stops_count"], is_(greater_than(truck["stops_count"]))
+                    )
+                    assert_that(
+                        truck["estimated_gallons"],
+                        is_(greater_than(van["estimated_gallons"])),
+                    )
+
+    def test_vehicle_profiles_should_be_validated(self):
+        """Test that vehicles need a range and a reserve below it"""
+        with given(
+            [us_locations_are_provided("New York, NY", "Los Angeles, CA")]
+        ) as context:
+
+            with when("I submit one vehicle without range and one with a big reserve"):
+                serializer = RouteOptimizationRequestSerializer(
+                    data={
+                        "start": context.start_location,
+                        "end": context.end_location,
+                        "vehicles": [
+                            {"mpg": 10},
+                            {"mpg": 10, "range_miles": 300, "reserve_miles": 300},
+                        ],
+                    }
+                )
+                context.valid = serializer.is_valid()
+
+            with then("both should be rejected"):
+                assert_that(context.valid, is_(False))
+                assert_that(len(serializer.errors["vehicles"]), equal_to(2))
+
+            with when("I submit unnamed vehicles with a tank size"):
+                serializer = RouteOptimizationRequestSerializer(
+                    data={
+                        "start": context.start_location,
+                        "end": context.end_location,
+                        "vehicles": [
+                            {"mpg": 10, "tank_gallons": 50, "start_fuel_gallons": 20},
+                            {"mpg": 25, "range_miles": 400},
+                        ],
+                    }
+                )
+                context.valid = serializer.is_valid()
+
+            with then("they should get default names and a range from the tank"):
+                assert_that(context.valid, is_(True))
+                first, second = serializer.validated_data["vehicles"]
+                assert_that(first.name, equal_to("vehicle 1"))
+                assert_that(first.range_miles, equal_to(500))
+                assert_that(first.start_fuel_miles, equal_to(200))
+                assert_that(second.name, equal_to("vehicle 2"))
+
+    def test_concurrent_identical_requests_should_share_one_computation(self):
+        """Test that identical in-flight requests are coalesced and cached"""
+        with given(
+            [
+                route_optimization_service_is_ready(),
+                us_locations_are_provided(),
+                short_route_is_configured(),
+            ]
+        ) as context:
+
+            def slow_route(*args):
+                time.sleep(0.2)
+                return context.route_data
+
+            with (
+                patch.object(context.service, "geocode") as mock_geocode,
+                patch.object(context.service, "get_route") as mock_get_route,
+            ):
+                mock_geocode.side_effect = lambda address: context.start_coords
+                mock_get_route.side_effect = slow_route
+
+                with when("five identical requests arrive at once, then a sixth"):
+                    with ThreadPoolExecutor(max_workers=5) as pool:
+                        context.results = list(
+                            pool.map(
+                                lambda _: context.service.optimize_route(
+                                    context.start_location, context.end_location
+                                ),
+                                range(5),
+                            )
+                        )
+                    context.results.append(
+                        context.service.optimize_route(
+                            context.start_location.upper(), context.end_location
+                        )
+                    )
+
+                with then("it should route once and return the same result"):
+                    assert_that(mock_get_route.call_count, is_(equal_to(1)))
+                    assert_that(
+                        context.results, only_contains(equal_to(context.results[0]))
+                    )
+
+    def test_waypoints_should_be_routed_in_one_request(self):
+        """Test that all legs come from one directions call and one fuel plan"""
+        with given(
+            [
+                route_optimization_service_is_ready(),
+                multi_stop_trip_is_provided(),
+                fuel_stations_are_available(),
+            ]
+        ) as context:
+            context.service.ors_client = Mock()
+            context.service.ors_client.directions.return_value = context.directions
+
+            with (
+                patch.object(context.service, "geocode") as mock_geocode,
+                patch.object(context.service, "match_lane", return_value=None),
+                patch("fuel_optimizer.services.get_station_index") as mock_index,
+            ):
+                mock_geocode.side_effect = context.geocodes.get
+                mock_index.return_value = context.station_index
+
+                with when("I optimize a trip through one waypoint"):
+                    context.result = context.service.optimize_route(
+                        context.start_location,
+                        context.end_location,
+                        waypoints=context.waypoints,
+                    )
+
+                with then("it should route all legs at once and report them"):
+                    context.service.ors_client.directions.assert_called_once()
+                    assert_that(
+                        context.service.ors_client.directions.call_args.kwargs[
+                            "coordinates"
+                        ],
+                        is_(equal_to([[-74.0, 40.7], [-96.1, 37.35], [-118.2, 34.0]])),
+                    )
+                    assert_that(
+                        context.result["leg_distances_miles"],
+                        is_(equal_to([1222.2, 1222.2])),
+                    )
+                    assert_that(context.result["stops_count"], is_(greater_than(0)))
+
     def test_non_us_location_should_be_rejected(self):
         """Test that non-US locations are rejected"""
         with given(
@@ -108,6 +397,21 @@ class FuelRouteOptimizerTest(unittest.TestCase):
                         ),
                     )
 
+    def test_interior_location_should_skip_reverse_geocoding(self):
+        """Test that the offline boundary check avoids the reverse lookup"""
+        with given([route_optimization_service_is_ready()]) as context:
+            context.service.geocoder = Mock()
+            context.service.geocoder.geocode.return_value = Mock(
+                latitude=39.7392, longitude=-104.9903
+            )
+
+            with when("I geocode a location in Denver"):
+                context.result = context.service.geocode("Offline Check, Denver, CO")
+
+            with then("it should not reverse geocode"):
+                assert_that(context.result, is_(equal_to((39.7392, -104.9903))))
+                context.service.geocoder.reverse.assert_not_called()
+
     def test_invalid_location_should_be_rejected(self):
         """Test that invalid locations are rejected"""
         with given(
@@ -134,27 +438,22 @@ class FuelRouteOptimizerTest(unittest.TestCase):
                         is_(equal_to("Location not found: Invalid City")),
                     )
 
-    def test_cheapest_station_should_be_selected(self):
-        """Test that the cheapest station is selected from available options"""
-        with given([route_optimization_service_is_ready()]) as context:
-
-            # Create mock stations with different prices
-            expensive_station = Mock()
-            expensive_station.retail_price = 3.75
-            expensive_station.name = "Expensive Station"
+    def test_service_should_be_shared_with_pooled_sessions(self):
+        """Test that requests reuse one service and its keep-alive pool"""
+        with given([]) as context:
 
-            cheap_station = Mock()
-            cheap_station.retail_price = 3.25
-            cheap_station.name = "Cheap Station"
+            with when("I ask for the service twice"):
+                context.first = get_route_optimization_service()
+                context.second = get_route_optimization_service()
 
-            context.stations = [expensive_station, cheap_station]
-
-            with when("I find the cheapest station"):
-                context.result = context.service.find_cheapest_station(context.stations)
-
-            with then("it should select the cheapest one"):
-                assert_that(context.result.name, is_(equal_to("Cheap Station")))
-                assert_that(context.result.retail_price, is_(equal_to(3.25)))
+            with then("it should return one instance with a sized ORS pool"):
+                assert_that(context.first, is_(same_instance(context.second)))
+                adapter = context.first.ors_client._session.get_adapter(
+                    "https://api.openrouteservice.org"
+                )
+                assert_that(
+                    adapter._pool_maxsize, is_(equal_to(settings.HTTP_POOL_SIZE))
+                )
 
 
 if __name__ == "__main__":
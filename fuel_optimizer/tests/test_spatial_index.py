@@ -0,0 +1,133 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from django.test import override_settings
+from givenpy import given, then, when
+from hamcrest import (
+    assert_that,
+    contains_exactly,
+    contains_inanyorder,
+    empty,
+    equal_to,
+    is_,
+)
+
+from fuel_optimizer.spatial import (
+    StationIndex,
+    first_per_point,
+    load_station_index,
+    publish_station_snapshot,
+)
+
+from .steps import fuel_stations_are_available, long_route_is_configured
+
+
+class StationIndexTest(unittest.TestCase):
+
+    def test_only_stations_near_the_route_should_be_returned(self):
+        """Test that the corridor query ignores stations far off the polyline"""
+        with given(
+            [long_route_is_configured(), fuel_stations_are_available()]
+        ) as context:
+
+            with when("I query stations within 10 miles of the route"):
+                positions, distances, _ = context.station_index.near_route(
+                    context.route_data["coordinates"], 10
+                )
+                context.names = [
+                    context.station_index.station(p).name for p in positions
+                ]
+
+            with then("it should return only the stations on the route"):
+                assert_that(
+                    context.names,
+                    contains_inanyorder(*[f"Route Station {i}" for i in range(1, 10)]),
+                )
+                assert_that(bool((distances < 1.0).all()), is_(True))
+
+    def test_empty_route_should_return_no_stations(self):
+        """Test that a route without geometry yields no candidates"""
+        with given([fuel_stations_are_available()]) as context:
+
+            with when("I query stations for an empty route"):
+                positions, _, _ = context.station_index.near_route([], 10)
+
+            with then("it should return no stations"):
+                assert_that(list(positions), is_(empty()))
+
+    def test_colocated_stations_should_collapse_to_the_first(self):
+        """Test that stations sharing a point keep only the first row"""
+        with given([]) as context:
+            context.rows = [
+                (1, "Cheap", 2.9, 36.15, -95.99),
+                (2, "Other Town", 3.0, 35.22, -97.44),
+                (3, "Pricier", 3.1, 36.15, -95.99),
+            ]
+
+            with when("I collapse rows sorted cheapest first"):
+                context.result = first_per_point(context.rows)
+
+            with then("the pricier co-located station should be dropped"):
+                assert_that(
+                    [row[1] for row in context.result],
+                    contains_exactly("Cheap", "Other Town"),
+                )
+
+    def test_snapshot_should_be_shared_memory_mapped_by_version(self):
+        """Test that a published snapshot loads memory-mapped with the same
+        stations and corridor results, and old versions are pruned"""
+        with (
+            given(
+                [long_route_is_configured(), fuel_stations_are_available()]
+            ) as context,
+            tempfile.TemporaryDirectory() as snapshot_dir,
+            override_settings(
+                STATION_SNAPSHOT_DIR=snapshot_dir, STATION_SNAPSHOT_KEEP=1
+            ),
+        ):
+            index = context.station_index
+            for version in (1, 2):
+                publish_station_snapshot(
+                    StationIndex(
+                        index.opis_ids,
+                        index.names,
+                        index.cities,
+                        index.states,
+                        index.prices,
+                        index.latitudes,
+                        index.longitudes,
+                        version=version,
+                    )
+                )
+
+            with when("I load the latest snapshot"):
+                context.loaded = load_station_index(2)
+                context.positions, _, _ = context.loaded.near_route(
+                    context.route_data["coordinates"], 10
+                )
+
+            with then("it should match the index it was written from"):
+                assert_that(isinstance(context.loaded.prices, np.memmap), is_(True))
+                assert_that(
+                    [context.loaded.station(p) for p in context.positions],
+                    is_(
+                        equal_to(
+                            [
+                                index.station(p)
+                                for p in index.near_route(
+                                    context.route_data["coordinates"], 10
+                                )[0]
+                            ]
+                        )
+                    ),
+                )
+                assert_that(
+                    sorted(path.name for path in Path(snapshot_dir).iterdir()),
+                    contains_exactly("v2"),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+from django.test import override_settings
+from givenpy import given, then, when
+from hamcrest import (
+    assert_that,
+    close_to,
+    equal_to,
+    has_entries,
+    has_length,
+    instance_of,
+    is_,
+)
+
+from fuel_optimizer.standin import StandInGeocoder, StandInRouter
+
+from .steps import route_optimization_service_is_ready, standin_server_is_running
+
+
+class StandInTest(unittest.TestCase):
+
+    def test_service_should_use_standin_server_through_real_clients(self):
+        """Test that ORS and ArcGIS clients pointed at the stand-in server get
+        the same deterministic answers as the in-process backends"""
+        with given([standin_server_is_running()]) as context:
+            remote = override_settings(
+                ORS_BASE_URL=f"http://{context.address}",
+                ARCGIS_DOMAIN=context.address,
+                ARCGIS_SCHEME="http",
+            )
+            local = override_settings(
+                ROUTING_BACKEND="fuel_optimizer.backends.standin_router",
+                GEOCODING_BACKEND="fuel_optimizer.backends.standin_geocoder",
+            )
+
+            with when("I geocode and route through both backends"):
+                results = []
+                for backend in (remote, local):
+                    with backend:
+                        route_optimization_service_is_ready()(context)
+                        context.service.cache.shared.clear()
+                        start = context.service.geocode("Tulsa, OK")
+                        end = context.service.geocode("Denver, CO")
+                        route = context.service.get_route(start, end)
+                        results.append((start, end, route))
+                context.server.shutdown()
+
+            with then("both should agree on points and route"):
+                assert_that(results[0], is_(equal_to(results[1])))
+                assert_that(context.service.ors_client, is_(instance_of(StandInRouter)))
+                assert_that(context.service.geocoder, is_(instance_of(StandInGeocoder)))
+                start, end, route = results[0]
+                assert_that(start, is_(equal_to(context.standin.geocode("Tulsa, OK"))))
+                assert_that(route["coordinates"][0][1], is_(close_to(start[0], 1e-6)))
+                assert_that(route["coordinates"][-1][0], is_(close_to(end[1], 1e-6)))
+
+    def test_standin_should_split_distance_by_leg(self):
+        """Test that multi-stop directions report one segment per leg"""
+        with given([standin_server_is_running()]) as context:
+
+            with when("I ask for directions through a waypoint"):
+                response = context.standin.directions(
+                    [[-96.0, 36.15], [-97.3, 37.7], [-104.99, 39.74]]
+                )
+                context.server.shutdown()
+
+            with then("there should be two legs and a stored query"):
+                feature = response["features"][0]
+                assert_that(feature["properties"]["segments"], has_length(2))
+                assert_that(
+                    response["metadata"],
+                    has_entries(query=has_entries(coordinates=has_length(3))),
+                )
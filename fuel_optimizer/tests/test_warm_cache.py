@@ -0,0 +1,122 @@
+import time
+import unittest
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.core.management import call_command
+from givenpy import given, then, when
+from hamcrest import (
+    assert_that,
+    contains_exactly,
+    contains_string,
+    equal_to,
+    greater_than_or_equal_to,
+    is_,
+)
+
+from fuel_optimizer.backends import RateLimitedRouter
+from fuel_optimizer.management.commands.warm_cache import read_trips, top_trips
+from fuel_optimizer.standin import StandIn, StandInGeocoder, StandInRouter
+
+from .steps import (
+    fuel_stations_are_available,
+    request_log_is_provided,
+    route_optimization_service_is_ready,
+)
+
+
+class WarmCacheTest(unittest.TestCase):
+
+    def test_log_should_be_ranked_by_trip_frequency(self):
+        """Test that log lines and request bodies count as the same trips"""
+        with given([request_log_is_provided()]) as context:
+
+            with when("I read the top two trips of the log"):
+                context.trips = top_trips(read_trips(str(context.log_file)), 2)
+
+            with then("the most frequent trips should come first"):
+                assert_that(
+                    [(trip["start"], trip["end"]) for trip in context.trips],
+                    contains_exactly(
+                        ("New York, NY", "Los Angeles, CA"),
+                        ("Boston, MA", "Denver, CO"),
+                    ),
+                )
+
+    def test_warmed_trips_should_not_reach_the_backends(self):
+        """Test that geocodes, routes and corridors are prefetched"""
+        with given(
+            [
+                route_optimization_service_is_ready(),
+                fuel_stations_are_available(),
+                request_log_is_provided(),
+            ]
+        ) as context:
+            standin = StandIn()
+            context.service.geocoder = StandInGeocoder(standin)
+            context.service.ors_client = StandInRouter(standin)
+            index = context.station_index
+            command = "fuel_optimizer.management.commands.warm_cache"
+
+            with (
+                patch(
+                    f"{command}.RouteOptimizationService",
+                    return_value=context.service,
+                ),
+                patch(f"{command}.get_station_index", return_value=index),
+                patch.object(context.service, "match_lane", return_value=None),
+            ):
+
+                with when("I warm the cache for the top two trips"):
+                    context.output = StringIO()
+                    call_command(
+                        "warm_cache",
+                        str(context.log_file),
+                        top=2,
+                        geocode_rate=1000,
+                        route_rate=1000,
+                        stdout=context.output,
+                    )
+
+            with then("it should report the prefetched entries"):
+                assert_that(
+                    context.output.getvalue(),
+                    contains_string("Warmed 4 geocodes, 2 routes and 2 corridors"),
+                )
+
+            with when("I route a warmed trip without any backends"):
+                context.service.geocoder = Mock()
+                context.service.ors_client = Mock()
+                with patch.object(index, "near_route", wraps=index.near_route) as query:
+                    route = context.service.get_route(
+                        context.service.geocode("New York, NY"),
+                        context.service.geocode("Los Angeles, CA"),
+                    )
+                    context.service.corridor_stations(route, index=index)
+
+            with then("everything should come from the cache"):
+                context.service.geocoder.geocode.assert_not_called()
+                context.service.ors_client.directions.assert_not_called()
+                query.assert_not_called()
+
+    def test_rate_limited_router_should_space_backend_requests(self):
+        """Test that the routing backend is called at most at the given rate"""
+        with given([route_optimization_service_is_ready()]) as context:
+            standin = StandIn()
+            context.service.ors_client = RateLimitedRouter(StandInRouter(standin), 20)
+
+            with when("I fetch three routes"):
+                started = time.perf_counter()
+                routes = [
+                    context.service.get_route((40.7, -74.0), (34.0 + i, -118.2))
+                    for i in range(3)
+                ]
+                context.elapsed = time.perf_counter() - started
+
+            with then("the requests should be 1/20 s apart"):
+                assert_that(len(routes), is_(equal_to(3)))
+                assert_that(context.elapsed, is_(greater_than_or_equal_to(0.1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,21 @@
 from django.urls import path
 
-from .views import HealthCheckView, RouteOptimizationView
+from .views import (
+    HealthCheckView,
+    RouteOptimizationBatchView,
+    RouteOptimizationView,
+    metrics_view,
+    optimize_route_async,
+)
 
 urlpatterns = [
     path("optimize/", RouteOptimizationView.as_view(), name="optimize"),
+    path(
+        "optimize/batch/",
+        RouteOptimizationBatchView.as_view(),
+        name="optimize-batch",
+    ),
+    path("optimize/async/", optimize_route_async, name="optimize-async"),
     path("health/", HealthCheckView.as_view(), name="health"),
+    path("metrics/", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,58 @@
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+
+
+class VehicleProfile(NamedTuple):
+    """Fuel parameters of one vehicle class, in miles of range and MPG"""
+
+    name: str
+    range_miles: float
+    mpg: float
+    start_fuel_miles: float
+    reserve_miles: float = 0.0
+
+    @classmethod
+    def create(
+        cls,
+        mpg: float,
+        name: str = "vehicle",
+        range_miles: Optional[float] = None,
+        tank_gallons: Optional[float] = None,
+        start_fuel_gallons: Optional[float] = None,
+        reserve_miles: float = 0.0,
+    ) -> "VehicleProfile":
+        """Profile from request units; range comes from the tank size when
+        not given (the smaller of the two if both are), and the trip starts
+        with a full tank unless ``start_fuel_gallons`` says otherwise"""
+        ranges = [r for r in (range_miles, tank_gallons and tank_gallons * mpg) if r]
+        if not ranges:
+            raise ValueError("Vehicle needs a range or a tank capacity")
+        full = min(ranges)
+        start = full if start_fuel_gallons is None else start_fuel_gallons * mpg
+        return cls(name, full, mpg, min(start, full), reserve_miles)
+
+    @property
+    def usable_range_miles(self) -> float:
+        """Range the planner may use; the reserve is never burned"""
+        return self.range_miles - self.reserve_miles
+
+    @property
+    def usable_start_miles(self) -> float:
+        return max(0.0, self.start_fuel_miles - self.reserve_miles)
+
+    def cache_key(self) -> str:
+        return (
+            f"{self.name}:{self.range_miles:g}:{self.mpg:g}:"
+            f"{self.start_fuel_miles:g}:{self.reserve_miles:g}"
+        )
+
+
+def default_vehicle() -> VehicleProfile:
+    """The configured single vehicle, starting with a full tank"""
+    return VehicleProfile(
+        "default",
+        settings.VEHICLE_RANGE_MILES,
+        settings.VEHICLE_MPG,
+        settings.VEHICLE_RANGE_MILES,
+    )
@@ -1,11 +1,20 @@
+import json
 import logging
 
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
 from rest_framework import status
 from rest_framework.response import Response
+from rest_framework.throttling import AnonRateThrottle
 from rest_framework.views import APIView
 
-from .serializers import RouteOptimizationRequestSerializer
-from .services import RouteOptimizationService
+from .cache import get_cache
+from .metrics import metrics, render_cache_stats, span
+from .serializers import (
+    RouteOptimizationBatchSerializer,
+    RouteOptimizationRequestSerializer,
+)
+from .services import get_async_service, get_route_optimization_service
 
 logger = logging.getLogger("fuel_optimizer")
 
@@ -20,9 +29,13 @@ class RouteOptimizationView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            service = RouteOptimizationService()
+            service = get_route_optimization_service()
             result = service.optimize_route(
-                serializer.validated_data["start"], serializer.validated_data["end"]
+                serializer.validated_data["start"],
+                serializer.validated_data["end"],
+                serializer.validated_data.get("geometry_format"),
+                serializer.validated_data.get("waypoints", ()),
+                serializer.validated_data.get("vehicles"),
             )
             return Response(result, status=status.HTTP_200_OK)
 
@@ -36,8 +49,86 @@ class RouteOptimizationView(APIView):
             )
 
 
+class RouteOptimizationBatchView(APIView):
+    """Batch route optimization endpoint"""
+
+    def post(self, request):
+        """Optimize many routes; each item gets a result or an error"""
+        serializer = RouteOptimizationBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            service = get_route_optimization_service()
+            results = service.optimize_batch(serializer.validated_data["routes"])
+            return Response(
+                {"results": results, "count": len(results)}, status=status.HTTP_200_OK
+            )
+
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+            return Response(
+                {"error": "Internal server error"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+async def optimize_route_async(request):
+    """Route optimization endpoint for ASGI workers"""
+    if request.method != "POST":
+        return JsonResponse(
+            {"error": f'Method "{request.method}" not allowed.'},
+            status=status.HTTP_405_METHOD_NOT_ALLOWED,
+        )
+
+    # Same anonymous rate limit as the DRF endpoint; it touches the cache
+    throttle = AnonRateThrottle()
+    if not await sync_to_async(throttle.allow_request)(request, None):
+        return JsonResponse(
+            {"error": "Request was throttled."},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse(
+            {"error": "Invalid JSON body"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    serializer = RouteOptimizationRequestSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        result = await get_async_service().optimize_route(
+            serializer.validated_data["start"],
+            serializer.validated_data["end"],
+            serializer.validated_data.get("geometry_format"),
+            serializer.validated_data.get("waypoints", ()),
+            serializer.validated_data.get("vehicles"),
+        )
+        with span("serialize"):
+            return JsonResponse(result, status=status.HTTP_200_OK)
+
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return JsonResponse(
+            {"error": "Internal server error"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
 class HealthCheckView(APIView):
     """Health check endpoint"""
 
     def get(self, request):
-        return Response({"status": "healthy"})
+        return Response({"status": "healthy", "cache": get_cache().stats()})
+
+
+def metrics_view(request):
+    """Prometheus-style metrics for the optimize pipeline and caches"""
+    body = metrics.render() + render_cache_stats(get_cache().stats())
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
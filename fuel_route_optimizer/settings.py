@@ -27,6 +27,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    "fuel_optimizer.middleware.server_timing_middleware",
 ]
 
 ROOT_URLCONF = "fuel_route_optimizer.urls"
@@ -51,20 +52,33 @@ DATABASES = {
     "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": BASE_DIR / "db.sqlite3"}
 }
 
+# Shared cache tier; point CACHE_BACKEND at a Redis/memcached backend to share
+# across hosts, the file cache shares across worker processes on one host
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
-        "LOCATION": "cache_table",
+        "BACKEND": config(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": config("CACHE_LOCATION", default=str(BASE_DIR / ".cache")),
         "TIMEOUT": 3600,
+        "OPTIONS": {"MAX_ENTRIES": 50000},
     }
 }
 
 # Cache timeout settings
 GEOCODING_CACHE_TIMEOUT = 86400  # 24 hours
 ROUTE_CACHE_TIMEOUT = 3600  # 1 hour
+OPTIMIZE_CACHE_TIMEOUT = 3600  # Full results, also reset by station reloads
+
+# Tiered cache for geocodes and routes: in-process LRU over a shared alias
+SHARED_CACHE_ALIAS = "default"
+LOCAL_CACHE_MAX_ENTRIES = 2048
+LOCAL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+LOCAL_CACHE_TIMEOUT = 300  # Max staleness of the in-process copy
 
 REST_FRAMEWORK = {
-    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+    "DEFAULT_RENDERER_CLASSES": ["fuel_optimizer.renderers.TimedJSONRenderer"],
     "DEFAULT_THROTTLE_CLASSES": ["rest_framework.throttling.AnonRateThrottle"],
     "DEFAULT_THROTTLE_RATES": {"anon": "100/hour"},
 }
@@ -73,6 +87,96 @@ REST_FRAMEWORK = {
 OPENROUTE_API_KEY = config("OPENROUTE_API_KEY")
 VEHICLE_RANGE_MILES = 500
 VEHICLE_MPG = 10
+ASYNC_IO_WORKERS = 32  # Threads for blocking I/O behind the async endpoint
+BATCH_MAX_ITEMS = 500  # Start/end pairs accepted per batch request
+BATCH_WORKERS = 8  # Concurrent geocoder/routing lookups per batch
+MAX_WAYPOINTS = 25  # Intermediate stops per route; ORS allows 50 points in total
+MAX_VEHICLE_PROFILES = 10  # Vehicle profiles planned on one route per request
+
+# Outbound HTTP: the service is shared per process and keeps these pools warm
+HTTP_POOL_SIZE = 32  # Keep-alive connections per host for ORS and ArcGIS
+ORS_TIMEOUT = 30  # Seconds
+GEOCODER_TIMEOUT = 10  # Seconds
+GEOCODER_REVERSE_TIMEOUT = 5  # Seconds
+
+# Routing and geocoding backends: factories returning ORS- and geopy-shaped
+# clients. fuel_optimizer.backends.standin_router/standin_geocoder run a
+# deterministic in-process stand-in; pointing ORS_BASE_URL and ARCGIS_DOMAIN
+# at `manage.py run_standin` exercises the real clients against it instead.
+ROUTING_BACKEND = config(
+    "ROUTING_BACKEND", default="fuel_optimizer.backends.openrouteservice_client"
+)
+GEOCODING_BACKEND = config(
+    "GEOCODING_BACKEND", default="fuel_optimizer.backends.arcgis_geocoder"
+)
+ORS_BASE_URL = config("ORS_BASE_URL", default="https://api.openrouteservice.org")
+ARCGIS_DOMAIN = config("ARCGIS_DOMAIN", default="geocode.arcgis.com")
+ARCGIS_SCHEME = config("ARCGIS_SCHEME", default="https")
+STANDIN_LATENCY_MS = config("STANDIN_LATENCY_MS", default=0.0, cast=float)
+STANDIN_JITTER_MS = config("STANDIN_JITTER_MS", default=0.0, cast=float)
+STANDIN_ROAD_FACTOR = 1.2  # Road miles per great-circle mile
+STANDIN_ROUTES_FILE = config("STANDIN_ROUTES_FILE", default=None)  # Recorded ORS
+
+# Local road graph for fuel_optimizer.backends.road_graph_router
+ROAD_GRAPH_DIR = config(
+    "ROAD_GRAPH_DIR", default=str(BASE_DIR / ".cache" / "road_graph")
+)
+ROAD_GRAPH_SNAP_CELL_DEGREES = 0.1  # Grid cell size for snapping points to nodes
+ROAD_GRAPH_MAX_SNAP_MILES = 10  # Points farther from any road are not routable
+
+# Local "City, ST" lookups answered before calling the geocoder
+GAZETTEER_ENABLED = config("GAZETTEER_ENABLED", default=True, cast=bool)
+GAZETTEER_PLACES_FILE = config(
+    "GAZETTEER_PLACES_FILE", default=""
+)  # Optional CSV of city,state,latitude,longitude; overrides station cities
+GAZETTEER_FUZZY_CUTOFF = 0.9  # difflib similarity needed for a misspelled city
+GAZETTEER_FUZZY_MIN_LENGTH = 5  # Shorter city names must match exactly
+GAZETTEER_FUZZY_MAX_EDITS = 1  # Typos a misspelled city may differ by
+
+# Points closer than this to a land border are checked by reverse geocoding
+US_BORDER_MARGIN_MILES = 25
+
+# Route geometry
+ROUTE_SIMPLIFY_TOLERANCE_MILES = 0.02  # Douglas-Peucker tolerance, 0 disables
+ROUTE_GEOMETRY_FORMAT = "geojson"  # Default response format: geojson or polyline
+POLYLINE_PRECISION = 5  # Decimal places kept in encoded polylines
+
+# Station index
+CORRIDOR_RADIUS_MILES = config(
+    "CORRIDOR_RADIUS_MILES", default=10, cast=float
+)  # Max detour: distance from the route polyline to a station
+DETOUR_DISTANCE_FACTOR = 2.0  # Miles driven per mile off route (there and back)
+DETOUR_PRUNE_WINDOW_MILES = 25  # Drop stations beaten on price by one this close
+STATION_INDEX_CELL_DEGREES = 0.25  # Grid cell size for the spatial index
+STATION_INDEX_CHECK_SECONDS = 30  # How often workers check for station changes
+STATION_SNAPSHOT_DIR = config(
+    "STATION_SNAPSHOT_DIR", default=str(BASE_DIR / ".cache" / "stations")
+)  # Memory-mapped station columns shared by worker processes, one per version
+STATION_SNAPSHOT_KEEP = 3  # Snapshot versions kept on disk
+
+# Bulk station geocoding (geocode_stations command)
+GEOCODE_CACHE_FILE = BASE_DIR / ".cache" / "station_geocodes.json"
+GEOCODE_WORKERS = 8  # Concurrent geocoder requests
+GEOCODE_RATE_PER_SECOND = 8  # Upper bound on geocoder requests per second
+GEOCODE_CHECKPOINT_EVERY = 100  # Save the geocode cache every N lookups
+STATION_BULK_BATCH_SIZE = 1000  # Rows per bulk_create/bulk_update query
+CSV_CHUNK_SIZE = 10000  # Price file rows read and processed at a time
+
+# Cache warm-up (warm_cache command)
+WARM_CACHE_WORKERS = 8  # Concurrent geocode, route and corridor lookups
+WARM_CACHE_GEOCODE_RATE = 8  # Geocoder requests per second, reverse included
+WARM_CACHE_ROUTE_RATE = 0.6  # ORS requests per second; free tier allows 40/min
+
+# Metrics; per-stage timings are also sent as a Server-Timing header when on
+SERVER_TIMING_HEADER = config("SERVER_TIMING_HEADER", default=False, cast=bool)
+
+# Offline benchmarks (benchmark_optimizer command)
+BENCHMARK_CSV_FILE = (
+    BASE_DIR / "fuel_optimizer" / "data" / "fuel-prices-for-be-assessment.csv"
+)
+BENCHMARK_STATION_COUNTS = [1000, 6738, 25000]  # Synthetic station set sizes
+BENCHMARK_ROUTE_MILES = [600, 1200, 2800]  # Synthetic route lengths, past one tank
+BENCHMARK_ITERATIONS = 20  # Timed runs per benchmark case
 
 # Logging
 LOGGING = {
@@ -87,6 +191,8 @@ TIME_ZONE = "UTC"
 USE_TZ = True
 STATIC_URL = "/static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+# Runs the suite on an in-memory cache and a temporary snapshot directory
+TEST_RUNNER = "fuel_optimizer.tests.runner.IsolatedTestRunner"
 
 
 # Constants